@@ -124,8 +124,12 @@ class SmartWalletSwapAlertNotify:
 
         tx_time = datetime.fromtimestamp(tx_event.timestamp).strftime("%Y-%m-%d %H:%M:%S")
 
-        token_info = await TokenInfoCache().get(tx_event.mint)
-        if token_info is None:
+        enrichment = tx_event.enrichment
+        if enrichment is not None and enrichment.symbol is not None:
+            # wallet-tracker 已附带代币信息，无需再查询
+            token_name = enrichment.token_name or enrichment.symbol
+            token_symbol = enrichment.symbol
+        elif (token_info := await TokenInfoCache().get(tx_event.mint)) is None:
             logger.warning(f"Failed to get token info: {tx_event.mint}")
             token_name = "Unknown"
             token_symbol = "Unknown"
@@ -1,3 +1,5 @@
+import time
+
 from solana.rpc.async_api import AsyncClient
 from solbot_cache.launch import LaunchCache
 from solbot_cache.rayidum import get_preferred_pool
@@ -41,14 +43,26 @@ class TradingExecutor:
         else:
             raise ValueError("swap_mode must be ExactIn or ExactOut")
 
-    async def find_route(self, swap_event: SwapEvent) -> TradingRoute:
-        """ Find the best route for executing the swap event """
-        # Check if you need to use it Pump Transactions with contract
+    def _get_route_hint(self, swap_event: SwapEvent, token_address: str) -> str | None:
+        """ Route hint attached by wallet-tracker, None if missing or stale """
+        tx_event = swap_event.tx_event
+        if tx_event is None or tx_event.mint != token_address or tx_event.enrichment is None:
+            return None
+        enrichment = tx_event.enrichment
+        if enrichment.route is None:
+            return None
+        # 代币毕业后路由会变化，超过缓存时间的提示（如 pump）可能已经过期
+        if (
+            enrichment.resolved_at is None
+            or time.time() - enrichment.resolved_at > settings.monitor.enrich_ttl
+        ):
+            logger.info(f"Ignore stale route hint of token {token_address}: {enrichment.route}")
+            return None
+        return enrichment.route
+
+    async def _should_use_pump(self, token_address: str, program_id: str | None) -> bool:
+        """ Check the graduation status of the token to decide whether to trade with Pump """
         should_use_pump = False
-        program_id = swap_event.program_id
-        
-        _, token_address = self._get_direction_address(swap_event)
-
         try:
             is_pump_token_graduated = await self._launch_cache.is_pump_token_graduated(token_address)
             logger.info(f"Pump token {token_address} is graduated: {is_pump_token_graduated}")
@@ -74,6 +88,22 @@ class TradingExecutor:
                     #swap_event.program_id = RAY_V4_PROGRAM_ID
         except Exception as e:
             logger.error(f"Failed graduation status check on PUMP, cause: {e}")
+        return should_use_pump
+
+    async def find_route(self, swap_event: SwapEvent) -> TradingRoute:
+        """ Find the best route for executing the swap event """
+        # Check if you need to use it Pump Transactions with contract
+        program_id = swap_event.program_id
+        
+        _, token_address = self._get_direction_address(swap_event)
+
+        # 跟单交易的 TxEvent 可能已附带路由提示，无需再查询毕业状态和池子
+        route_hint = self._get_route_hint(swap_event, token_address)
+        if route_hint is not None:
+            logger.info(f"Token {token_address} route hint from tx event: {route_hint}")
+            should_use_pump = program_id == PUMP_FUN_PROGRAM_ID or route_hint == "pump"
+        else:
+            should_use_pump = await self._should_use_pump(token_address, program_id)
 
         if should_use_pump:
             logger.info("Program ID is PUMP")
@@ -1,18 +1,24 @@
 from .decorator import (
+    finish,
     init,
     record_block_time,
     show_timeline,
     with_fetch_tx,
     with_parse_tx,
+    with_produce_tx,
 )
+from .histogram import LatencyHistogram
 from .service import BenchmarkService, benchmark_service
 
 __all__ = [
     "BenchmarkService",
+    "LatencyHistogram",
     "benchmark_service",
+    "finish",
     "init",
     "record_block_time",
     "show_timeline",
     "with_fetch_tx",
     "with_parse_tx",
+    "with_produce_tx",
 ]
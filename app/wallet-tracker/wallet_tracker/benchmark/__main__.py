@@ -0,0 +1,94 @@
+"""
+查看 wallet-tracker 写入 Redis 的延迟统计
+
+    python -m wallet_tracker.benchmark snapshots -n 5   # 最近 5 个时间窗口的各阶段分位数
+    python -m wallet_tracker.benchmark recent -n 20     # 最近完成的采样交易
+    python -m wallet_tracker.benchmark timeline <tx>    # 单笔采样交易的时间线
+"""
+
+import argparse
+import asyncio
+from datetime import datetime
+
+import orjson as json
+from solbot_db.redis import RedisClient
+
+from wallet_tracker.benchmark.service import (
+    SNAPSHOTS_KEY,
+    STAGES,
+    TIMELINES_KEY,
+    timeline_key,
+)
+
+
+def _format_time(timestamp: float) -> str:
+    return datetime.fromtimestamp(timestamp).strftime("%Y-%m-%d %H:%M:%S")
+
+
+async def show_snapshots(limit: int) -> None:
+    redis = RedisClient.get_instance()
+    snapshots = await redis.lrange(SNAPSHOTS_KEY, 0, limit - 1)
+    if not snapshots:
+        print("No snapshots")
+        return
+    for raw in snapshots:
+        snapshot = json.loads(raw)
+        print(f"{_format_time(snapshot['start'])} ~ {_format_time(snapshot['end'])}")
+        print(f"  {'stage':<8} {'count':>8} {'p50':>10} {'p90':>10} {'p99':>10} {'max':>10}")
+        for stage in STAGES:
+            stats = snapshot["stages"].get(stage)
+            if not stats or not stats["count"]:
+                continue
+            print(
+                f"  {stage:<8} {stats['count']:>8} {stats['p50_ms']:>8}ms"
+                f" {stats['p90_ms']:>8}ms {stats['p99_ms']:>8}ms {stats['max_ms']:>8}ms"
+            )
+
+
+async def show_recent(limit: int) -> None:
+    redis = RedisClient.get_instance()
+    items = await redis.zrevrange(TIMELINES_KEY, 0, limit - 1, withscores=True)
+    if not items:
+        print("No sampled transactions")
+        return
+    for tx_hash, finished in items:
+        print(f"{_format_time(finished)}  {tx_hash}")
+
+
+async def show_timeline(tx_hash: str) -> None:
+    redis = RedisClient.get_instance()
+    timeline = await redis.hgetall(timeline_key(tx_hash))
+    if not timeline:
+        print(f"Timeline of {tx_hash} not found, it may not be sampled or has expired")
+        return
+    steps = sorted(((float(value), step) for step, value in timeline.items()))
+    start = steps[0][0]
+    print(f"Transaction: {tx_hash}")
+    for timestamp, step in steps:
+        print(f"  {step:<18} +{(timestamp - start) * 1000:>10.1f}ms")
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(
+        description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter
+    )
+    subparsers = parser.add_subparsers(dest="command", required=True)
+    snapshots = subparsers.add_parser("snapshots", help="aggregated latency percentiles")
+    snapshots.add_argument("-n", type=int, default=1, help="number of windows")
+    recent = subparsers.add_parser("recent", help="recently sampled transactions")
+    recent.add_argument("-n", type=int, default=20, help="number of transactions")
+    timeline = subparsers.add_parser("timeline", help="timeline of a sampled transaction")
+    timeline.add_argument("tx_hash")
+    args = parser.parse_args()
+
+    if args.command == "snapshots":
+        coro = show_snapshots(args.n)
+    elif args.command == "recent":
+        coro = show_recent(args.n)
+    else:
+        coro = show_timeline(args.tx_hash)
+    asyncio.run(coro)
+
+
+if __name__ == "__main__":
+    main()
@@ -6,42 +6,23 @@ from solbot_common.log import logger
 from wallet_tracker.benchmark.service import benchmark_service
 
 
-async def _mark_start_fetch(tx_hash: str):
-    data = {"tx_hash": tx_hash, "step": "tx_start_fetch", "timestamp": time.time()}
-    await benchmark_service.add(data)
-    return data
-
-
-async def _mark_end_fetch(tx_hash: str):
-    data = {"tx_hash": tx_hash, "step": "tx_end_fetch", "timestamp": time.time()}
-    await benchmark_service.add(data)
-    return data
-
-
-async def _mark_start_parse(tx_hash: str):
-    data = {"tx_hash": tx_hash, "step": "tx_start_parse", "timestamp": time.time()}
-    await benchmark_service.add(data)
-    return data
-
-
-async def _mark_end_parse(tx_hash: str):
-    data = {"tx_hash": tx_hash, "step": "tx_end_parse", "timestamp": time.time()}
-    await benchmark_service.add(data)
-    return data
-
-
 async def init(tx_hash: str):
-    await benchmark_service.add(
-        {"tx_hash": tx_hash, "step": "tx_detected", "timestamp": time.time()}
-    )
+    benchmark_service.detect(tx_hash, time.time())
 
 
 async def record_block_time(tx_hash: str, block_time: int):
-    await benchmark_service.add({"tx_hash": tx_hash, "step": "block_time", "timestamp": block_time})
+    benchmark_service.block_time(tx_hash, block_time)
+
+
+async def finish(tx_hash: str):
+    benchmark_service.finish(tx_hash, time.time())
 
 
 async def show_timeline(tx_hash: str):
-    timeline = await benchmark_service.get_timeline(tx_hash)
+    """输出采样交易的时间线，未被采样的交易不输出，不访问 Redis"""
+    timeline = benchmark_service.local_timeline(tx_hash)
+    if not timeline:
+        return
 
     def _calc_elapsed(start: str, end: str) -> float | None:
         start_time = timeline.get(start)
@@ -60,43 +41,39 @@ async def show_timeline(tx_hash: str):
     # 解析耗时
     parse_elapsed = _calc_elapsed("tx_start_parse", "tx_end_parse")
 
+    # 发送 TxEvent 耗时
+    produce_elapsed = _calc_elapsed("tx_start_produce", "tx_end_produce")
+
     # 总耗时
-    total_elapsed = _calc_elapsed("block_time", "tx_end_parse")
+    total_elapsed = _calc_elapsed("block_time", "tx_finished")
 
     logger.info(
         f"\n Transaction: {tx_hash}"
         f"\n 发现交易耗时: {detect_elapsed}"
         f"\n 获取交易详情耗时: {fetch_tx_detail_elapsed}"
         f"\n 解析交易耗时: {parse_elapsed}"
+        f"\n 发送交易事件耗时: {produce_elapsed}"
         f"\n 总耗时: {total_elapsed}"
     )
 
 
-@asynccontextmanager
-async def with_fetch_tx(tx_hash: str):
-    data = await _mark_start_fetch(tx_hash)
-    start_time = data["timestamp"]
-    logger.info(f"Fetching transaction: {tx_hash}, start_time: {start_time}")
-    try:
-        yield
-    finally:
-        data = await _mark_end_fetch(tx_hash)
-        end_time = data["timestamp"]
-        logger.info(
-            f"Fetching transaction: {tx_hash}, end_time: {end_time}, elapsed: {end_time - start_time}"
-        )
-
-
-@asynccontextmanager
-async def with_parse_tx(tx_hash: str):
-    data = await _mark_start_parse(tx_hash)
-    start_time = data["timestamp"]
-    logger.info(f"Parsing transaction: {tx_hash}, start_time: {start_time}")
-    try:
-        yield
-    finally:
-        data = await _mark_end_parse(tx_hash)
-        end_time = data["timestamp"]
-        logger.info(
-            f"Parsing transaction: {tx_hash}, end_time: {end_time}, elapsed: {end_time - start_time}"
-        )
+def _stage(stage: str):
+    """记录 stage 的耗时，采样交易同时记录开始和结束的时间点"""
+
+    @asynccontextmanager
+    async def _with_stage(tx_hash: str):
+        start_time = time.time()
+        try:
+            yield
+        finally:
+            end_time = time.time()
+            benchmark_service.observe(stage, end_time - start_time)
+            benchmark_service.mark(tx_hash, f"tx_start_{stage}", start_time)
+            benchmark_service.mark(tx_hash, f"tx_end_{stage}", end_time)
+
+    return _with_stage
+
+
+with_fetch_tx = _stage("fetch")
+with_parse_tx = _stage("parse")
+with_produce_tx = _stage("produce")
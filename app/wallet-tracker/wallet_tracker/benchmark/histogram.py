@@ -0,0 +1,84 @@
+import math
+
+# 每个 2 的幂区间内的子桶数量，相对误差约为 1/SUB_BUCKET_COUNT
+SUB_BUCKET_BITS = 5
+SUB_BUCKET_COUNT = 1 << SUB_BUCKET_BITS
+# 记录的最大值（微秒），约 19 小时，超过的值记入最后一个桶
+MAX_VALUE_BITS = 36
+BUCKET_COUNT = (MAX_VALUE_BITS - SUB_BUCKET_BITS + 1) * SUB_BUCKET_COUNT
+
+
+def _bucket_index(value: int) -> int:
+    if value < SUB_BUCKET_COUNT * 2:
+        return value
+    exponent = value.bit_length() - SUB_BUCKET_BITS - 1
+    return min(SUB_BUCKET_COUNT * exponent + (value >> exponent), BUCKET_COUNT - 1)
+
+
+def _bucket_value(index: int) -> int:
+    """返回桶内的中间值"""
+    if index < SUB_BUCKET_COUNT * 2:
+        return index
+    exponent = index // SUB_BUCKET_COUNT - 1
+    mantissa = index % SUB_BUCKET_COUNT + SUB_BUCKET_COUNT
+    return (mantissa << exponent) + (1 << exponent) // 2
+
+
+class LatencyHistogram:
+    """HDR 风格的对数-线性延迟直方图
+
+    以微秒为单位记录，每个 2 的幂区间等分为 32 个桶，相对误差约 3%。
+    记录只是一次整数运算和列表自增，不分配内存，适合在每笔交易的热路径上调用。
+    """
+
+    __slots__ = ("count", "counts", "max", "total")
+
+    def __init__(self) -> None:
+        self.counts = [0] * BUCKET_COUNT
+        self.count = 0
+        self.total = 0
+        self.max = 0
+
+    def record(self, seconds: float) -> None:
+        # 区块时间只精确到秒，发现延迟可能为负数，按 0 记录
+        value = int(seconds * 1_000_000) if seconds > 0 else 0
+        self.counts[_bucket_index(value)] += 1
+        self.count += 1
+        self.total += value
+        if value > self.max:
+            self.max = value
+
+    def percentile(self, q: float) -> float | None:
+        """返回第 q 分位（0~1）的延迟（秒），没有记录时返回 None"""
+        if self.count == 0:
+            return None
+        target = max(1, math.ceil(self.count * q))
+        seen = 0
+        for index, count in enumerate(self.counts):
+            seen += count
+            if seen >= target:
+                return min(_bucket_value(index), self.max) / 1_000_000
+        return self.max / 1_000_000
+
+    def merge(self, other: "LatencyHistogram") -> None:
+        for index, count in enumerate(other.counts):
+            if count:
+                self.counts[index] += count
+        self.count += other.count
+        self.total += other.total
+        self.max = max(self.max, other.max)
+
+    def snapshot(self) -> dict:
+        """聚合后的统计结果，延迟单位为毫秒"""
+
+        def _ms(seconds: float | None) -> float | None:
+            return None if seconds is None else round(seconds * 1000, 3)
+
+        return {
+            "count": self.count,
+            "mean_ms": _ms(self.total / self.count / 1_000_000) if self.count else None,
+            "p50_ms": _ms(self.percentile(0.5)),
+            "p90_ms": _ms(self.percentile(0.9)),
+            "p99_ms": _ms(self.percentile(0.99)),
+            "max_ms": _ms(self.max / 1_000_000) if self.count else None,
+        }
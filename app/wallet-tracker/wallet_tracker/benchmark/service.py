@@ -1,68 +1,206 @@
-from asyncio.queues import Queue
+import asyncio
+import random
+import time
+from collections import OrderedDict
 
+import aioredis
+import orjson as json
+from solbot_common.config import settings
 from solbot_common.log import logger
 from solbot_db.redis import RedisClient
 
+from wallet_tracker.benchmark.histogram import LatencyHistogram
+
+# 统计的阶段：发现交易、拉取交易详情、解析交易、发送 TxEvent，total 为区块时间到发送完成
+STAGES = ("detect", "fetch", "parse", "produce", "total")
+# 聚合快照列表，最新的在最前面
+SNAPSHOTS_KEY = "benchmark:snapshots"
+# 采样交易的时间线，score 为交易完成处理的时间
+TIMELINES_KEY = "benchmark:timelines"
+TIMELINE_KEY_PREFIX = "benchmark:tx:"
+
+
+def timeline_key(tx_hash: str) -> str:
+    return f"{TIMELINE_KEY_PREFIX}{tx_hash}"
+
 
 class BenchmarkService:
+    """进程内的延迟统计
+
+    每个阶段的耗时记录在 LatencyHistogram 中，不产生任何 IO。
+    后台任务每隔 flush_interval 秒把各阶段的 p50/p90/p99 写入 benchmark:snapshots，
+    然后重置直方图，每个快照只统计一个时间窗口。
+
+    按 sample_rate 采样部分交易记录完整的时间线，随快照一起批量写入 Redis，
+    并设置 timeline_ttl 过期时间。未被采样的交易只保留发现时间和区块时间，用于计算 detect 和 total。
+    """
+
     _instance: "BenchmarkService" = None  # type: ignore
 
-    def __new__(cls):
+    def __new__(cls, *args, **kwargs):
         if cls._instance is None:
             cls._instance = super().__new__(cls)
         return cls._instance
 
-    def __init__(self):
-        self.q = Queue()
-        self.redis = None
+    def __init__(
+        self,
+        flush_interval: float | None = None,
+        sample_rate: float | None = None,
+        timeline_ttl: int | None = None,
+        max_snapshots: int | None = None,
+        max_inflight: int = 10_000,
+    ):
+        # 单例，只初始化一次
+        if getattr(self, "_initialized", False):
+            return
+        self._initialized = True
+        monitor = settings.monitor
+        self.flush_interval = (
+            flush_interval if flush_interval is not None else monitor.benchmark_flush_interval
+        )
+        self.sample_rate = sample_rate if sample_rate is not None else monitor.benchmark_sample_rate
+        self.timeline_ttl = (
+            timeline_ttl if timeline_ttl is not None else monitor.benchmark_timeline_ttl
+        )
+        self.max_snapshots = (
+            max_snapshots if max_snapshots is not None else monitor.benchmark_max_snapshots
+        )
+        self.max_inflight = max_inflight
+        self.histograms = {stage: LatencyHistogram() for stage in STAGES}
+        self.window_start = time.time()
+        # 正在处理的交易: tx_hash -> (发现时间, 区块时间)
+        self.detected: OrderedDict[str, tuple[float, float | None]] = OrderedDict()
+        # 正在处理的采样交易: tx_hash -> {step: timestamp}
+        self.sampled: dict[str, dict[str, float]] = {}
+        # 已完成、等待写入 Redis 的采样交易时间线
+        self.completed: dict[str, dict[str, float]] = {}
+        self.redis: aioredis.Redis | None = None
+        self._stopped = asyncio.Event()
+
+    def connect_redis(self):
+        self.redis = RedisClient.get_instance()
+
+    def observe(self, stage: str, seconds: float) -> None:
+        self.histograms[stage].record(seconds)
 
-    async def connect_redis(self):
-        self.redis = await RedisClient.get_instance()
+    def mark(self, tx_hash: str, step: str, timestamp: float) -> None:
+        """记录采样交易某个步骤的时间点，未被采样的交易直接忽略"""
+        timeline = self.sampled.get(tx_hash)
+        if timeline is not None:
+            timeline[step] = timestamp
 
-    async def add(self, item):
-        await self.q.put(item)
+    def detect(self, tx_hash: str, timestamp: float) -> None:
+        if tx_hash in self.detected:
+            return
+        self.detected[tx_hash] = (timestamp, None)
+        # 交易可能在发现后被丢弃（如非 swap 交易），超出上限时淘汰最早的记录
+        if len(self.detected) > self.max_inflight:
+            evicted, _ = self.detected.popitem(last=False)
+            self.sampled.pop(evicted, None)
+        if random.random() < self.sample_rate:
+            self.sampled[tx_hash] = {"tx_detected": timestamp}
+
+    def block_time(self, tx_hash: str, block_time: float) -> None:
+        detected = self.detected.get(tx_hash)
+        if detected is not None:
+            detected_at, _ = detected
+            self.observe("detect", detected_at - block_time)
+            self.detected[tx_hash] = (detected_at, block_time)
+        self.mark(tx_hash, "block_time", block_time)
+
+    def finish(self, tx_hash: str, timestamp: float) -> None:
+        """交易处理完成，记录总耗时，采样交易的时间线进入待写入队列"""
+        _, block_time = self.detected.pop(tx_hash, (None, None))
+        if block_time is not None:
+            self.observe("total", timestamp - block_time)
+        timeline = self.sampled.pop(tx_hash, None)
+        if timeline is None:
+            return
+        timeline["tx_finished"] = timestamp
+        self.completed[tx_hash] = timeline
+
+    def snapshot(self, reset: bool = True) -> dict:
+        """各阶段在当前时间窗口内的聚合统计"""
+        now = time.time()
+        result = {
+            "start": self.window_start,
+            "end": now,
+            "stages": {stage: hist.snapshot() for stage, hist in self.histograms.items()},
+        }
+        if reset:
+            self.histograms = {stage: LatencyHistogram() for stage in STAGES}
+            self.window_start = now
+        return result
+
+    async def flush(self) -> dict:
+        """写入当前窗口的快照和已完成的采样时间线"""
+        snapshot = self.snapshot()
+        completed, self.completed = self.completed, {}
+        summary = ", ".join(
+            f"{stage}: n={stats['count']} p50={stats['p50_ms']}ms p99={stats['p99_ms']}ms"
+            for stage, stats in snapshot["stages"].items()
+            if stats["count"]
+        )
+        if summary:
+            logger.info(f"Latency {summary}")
+
+        if self.redis is None:
+            self.connect_redis()
+        assert self.redis is not None, "Redis is not connected"
+        async with self.redis.pipeline(transaction=False) as pipe:
+            pipe.lpush(SNAPSHOTS_KEY, json.dumps(snapshot).decode("utf-8"))
+            pipe.ltrim(SNAPSHOTS_KEY, 0, self.max_snapshots - 1)
+            for tx_hash, timeline in completed.items():
+                key = timeline_key(tx_hash)
+                pipe.hset(key, mapping={step: str(value) for step, value in timeline.items()})
+                pipe.expire(key, self.timeline_ttl)
+                pipe.zadd(TIMELINES_KEY, {tx_hash: timeline["tx_finished"]})
+            pipe.zremrangebyscore(TIMELINES_KEY, "-inf", snapshot["end"] - self.timeline_ttl)
+            await pipe.execute()
+        return snapshot
 
     async def process(self):
-        while True:
+        while not self._stopped.is_set():
             try:
-                assert self.redis is not None, "Redis is not connected"
-                await self.redis.ping()
-            except AssertionError:
-                await self.connect_redis()
-
+                await asyncio.wait_for(self._stopped.wait(), timeout=self.flush_interval)
+            except asyncio.TimeoutError:
+                pass
             try:
-                item = await self.q.get()
-                if isinstance(item, dict) and self.redis is not None:
-                    tx_hash = item.get("tx_hash")
-                    step = item.get("step")
-                    timestamp = item.get("timestamp")
-                    if tx_hash and step and timestamp:
-                        await self.redis.hset(f"benchmark:{tx_hash}", step, str(timestamp))
-                self.q.task_done()
+                await self.flush()
             except Exception as e:
-                logger.error(f"Error processing item: {e}")
+                logger.error(f"Failed to flush benchmark snapshot: {e}")
 
     async def start(self):
-        await self.connect_redis()
+        self._stopped.clear()
+        self.connect_redis()
         await self.process()
 
     async def stop(self):
-        await self.q.join()
+        self._stopped.set()
+
+    def local_timeline(self, tx_hash: str) -> dict | None:
+        """返回还在内存中（处理中或等待写入）的采样交易时间线"""
+        timeline = self.sampled.get(tx_hash) or self.completed.get(tx_hash)
+        return None if timeline is None else dict(timeline)
 
     async def get_timeline(self, tx_hash: str) -> dict:
         """Get the timeline of a transaction's processing steps"""
+        timeline = self.local_timeline(tx_hash)
+        if timeline is not None:
+            return timeline
         if self.redis is None:
-            await self.connect_redis()
+            self.connect_redis()
         assert self.redis is not None, "Redis is not connected"
-        result = await self.redis.hgetall(f"benchmark:{tx_hash}")
+        result = await self.redis.hgetall(timeline_key(tx_hash))
         return dict(result) if result else {}
 
     async def clear_timeline(self, tx_hash: str):
         """Clear the timeline data for a specific transaction"""
         if self.redis is None:
-            await self.connect_redis()
+            self.connect_redis()
         assert self.redis is not None, "Redis is not connected"
-        await self.redis.delete(f"benchmark:{tx_hash}")
+        await self.redis.delete(timeline_key(tx_hash))
+        await self.redis.zrem(TIMELINES_KEY, tx_hash)
 
 
 benchmark_service = BenchmarkService()
@@ -0,0 +1,261 @@
+"""
+多节点部署时按分区划分被跟踪的钱包
+
+钱包按地址哈希到固定数量的分区，每个节点通过 Redis 租约（SET NX PX）认领分区，
+只订阅自己持有的分区内的钱包。节点定期在 wallet_tracker:nodes 中心跳并续约，
+每个节点最多持有 ceil(分区数 / 存活节点数) 个分区：
+
+- 新节点加入后，其他节点释放多出的分区，由新节点认领
+- 节点宕机后，租约和心跳在 lease_ttl 后过期，存活的节点认领其分区
+- 主动释放的分区在被其他节点认领之前继续订阅（handoff），避免交接期间漏掉交易，
+  交接期间两个节点重复收到的交易由共享的签名去重过滤
+"""
+
+import asyncio
+import hashlib
+import math
+import os
+import socket
+import time
+from collections.abc import Awaitable, Callable, Iterable
+
+import aioredis
+from solbot_common.log import logger
+
+NODES_KEY = "wallet_tracker:nodes"
+LEASE_KEY_PREFIX = "wallet_tracker:partition:"
+
+# 续约仍由当前节点持有的租约，返回续约成功的租约下标
+RENEW_SCRIPT = """
+local renewed = {}
+for i, key in ipairs(KEYS) do
+    if redis.call('GET', key) == ARGV[1] then
+        redis.call('PEXPIRE', key, ARGV[2])
+        table.insert(renewed, i - 1)
+    end
+end
+return renewed
+"""
+
+# 释放仍由当前节点持有的租约，返回释放的数量
+RELEASE_SCRIPT = """
+local released = 0
+for _, key in ipairs(KEYS) do
+    if redis.call('GET', key) == ARGV[1] then
+        redis.call('DEL', key)
+        released = released + 1
+    end
+end
+return released
+"""
+
+PartitionCallback = Callable[[set[int]], Awaitable[None]]
+
+
+def default_node_id() -> str:
+    return f"{socket.gethostname()}-{os.getpid()}"
+
+
+def partition_of(wallet: str, partitions: int) -> int:
+    """钱包所在的分区，所有节点使用相同的分区数量时结果一致"""
+    return int.from_bytes(hashlib.md5(wallet.encode("utf-8")).digest()[:8], "big") % partitions
+
+
+def lease_key(partition: int) -> str:
+    return f"{LEASE_KEY_PREFIX}{partition}"
+
+
+class PartitionCoordinator:
+    """通过 Redis 租约在多个节点之间分配钱包分区
+
+    on_assign / on_revoke 在节点开始持有、不再持有分区时调用，参数为分区编号集合。
+    """
+
+    def __init__(
+        self,
+        redis: aioredis.Redis,
+        node_id: str | None = None,
+        partitions: int = 64,
+        lease_ttl: float = 5,
+        renew_interval: float = 1,
+        on_assign: PartitionCallback | None = None,
+        on_revoke: PartitionCallback | None = None,
+        handoff_timeout: float | None = None,
+    ):
+        if partitions < 1:
+            raise ValueError("partitions must be greater than 0")
+        self.redis = redis
+        self.node_id = node_id or default_node_id()
+        self.partitions = partitions
+        self.lease_ttl = lease_ttl
+        self.renew_interval = renew_interval
+        self.on_assign = on_assign
+        self.on_revoke = on_revoke
+        # 释放的分区最多继续订阅的时间，默认与租约有效期相同
+        self.handoff_timeout = lease_ttl if handoff_timeout is None else handoff_timeout
+        # 持有租约的分区
+        self.owned: set[int] = set()
+        # 已释放、等待其他节点认领的分区 -> 停止订阅的截止时间
+        self.draining: dict[int, float] = {}
+        self.nodes: list[str] = []
+        self._renew = redis.register_script(RENEW_SCRIPT)
+        self._release = redis.register_script(RELEASE_SCRIPT)
+        self._task: asyncio.Task | None = None
+
+    def owns(self, wallet: str) -> bool:
+        """钱包是否应由当前节点订阅，包括正在交接的分区"""
+        partition = partition_of(wallet, self.partitions)
+        return partition in self.owned or partition in self.draining
+
+    def filter_wallets(self, wallets: Iterable[str], partitions: set[int]) -> list[str]:
+        return [wallet for wallet in wallets if partition_of(wallet, self.partitions) in partitions]
+
+    @property
+    def target(self) -> int:
+        """每个节点最多持有的分区数量"""
+        return math.ceil(self.partitions / max(1, len(self.nodes)))
+
+    async def _heartbeat(self) -> None:
+        now = time.time()
+        async with self.redis.pipeline(transaction=False) as pipe:
+            pipe.zadd(NODES_KEY, {self.node_id: now})
+            pipe.zremrangebyscore(NODES_KEY, "-inf", now - self.lease_ttl)
+            pipe.zrange(NODES_KEY, 0, -1)
+            results = await pipe.execute()
+        self.nodes = sorted(results[-1])
+        if self.node_id not in self.nodes:
+            self.nodes = sorted([*self.nodes, self.node_id])
+
+    async def _renew_leases(self) -> set[int]:
+        """续约持有的分区，返回租约已经丢失的分区"""
+        if not self.owned:
+            return set()
+        owned = sorted(self.owned)
+        renewed = await self._renew(
+            keys=[lease_key(partition) for partition in owned],
+            args=[self.node_id, int(self.lease_ttl * 1000)],
+        )
+        lost = self.owned - {owned[int(index)] for index in renewed}
+        if lost:
+            logger.warning(f"Node {self.node_id} lost leases of partitions {sorted(lost)}")
+            self.owned -= lost
+        return lost
+
+    async def _release_extra(self) -> None:
+        """持有的分区超过 target 时释放多出的部分，进入交接状态"""
+        extra = len(self.owned) - self.target
+        if extra <= 0:
+            return
+        # 优先释放离自己的起始分区最远的分区，与 _acquire 的认领顺序相反
+        released = self._preferred_order(self.owned)[-extra:]
+        await self._release(
+            keys=[lease_key(partition) for partition in released],
+            args=[self.node_id],
+        )
+        deadline = time.monotonic() + self.handoff_timeout
+        for partition in released:
+            self.owned.discard(partition)
+            self.draining[partition] = deadline
+        logger.info(f"Node {self.node_id} released partitions {sorted(released)}")
+
+    def _preferred_order(self, partitions: Iterable[int]) -> list[int]:
+        """从节点的起始分区开始排序，不同节点优先认领不同的分区，减少竞争"""
+        rank = self.nodes.index(self.node_id) if self.node_id in self.nodes else 0
+        start = rank * self.partitions // max(1, len(self.nodes))
+        return sorted(partitions, key=lambda partition: (partition - start) % self.partitions)
+
+    async def _acquire(self) -> set[int]:
+        """认领空闲的分区，直到持有 target 个分区"""
+        missing = self.target - len(self.owned)
+        if missing <= 0:
+            return set()
+        candidates = [p for p in range(self.partitions) if p not in self.owned]
+        holders = await self.redis.mget([lease_key(partition) for partition in candidates])
+        free = [p for p, holder in zip(candidates, holders, strict=True) if holder is None]
+        acquired = set()
+        ttl_ms = int(self.lease_ttl * 1000)
+        for partition in self._preferred_order(free):
+            if len(acquired) >= missing:
+                break
+            if await self.redis.set(lease_key(partition), self.node_id, px=ttl_ms, nx=True):
+                acquired.add(partition)
+        self.owned |= acquired
+        return acquired
+
+    async def _finish_handoff(self) -> set[int]:
+        """被其他节点认领或超时的交接分区停止订阅"""
+        if not self.draining:
+            return set()
+        draining = sorted(self.draining)
+        holders = await self.redis.mget([lease_key(partition) for partition in draining])
+        now = time.monotonic()
+        done = {
+            partition
+            for partition, holder in zip(draining, holders, strict=True)
+            if holder is not None or self.draining[partition] <= now
+        }
+        for partition in done:
+            del self.draining[partition]
+        return done
+
+    async def tick(self) -> None:
+        """心跳、续约并重新平衡分区"""
+        await self._heartbeat()
+        revoked = await self._renew_leases()
+        await self._release_extra()
+        acquired = await self._acquire()
+        # 重新认领了正在交接的分区，订阅没有中断
+        resumed = acquired & self.draining.keys()
+        for partition in resumed:
+            del self.draining[partition]
+        revoked |= await self._finish_handoff()
+        acquired -= resumed
+
+        if acquired:
+            logger.info(f"Node {self.node_id} acquired partitions {sorted(acquired)}")
+            if self.on_assign is not None:
+                await self.on_assign(acquired)
+        if revoked and self.on_revoke is not None:
+            await self.on_revoke(revoked)
+
+    async def run(self) -> None:
+        while True:
+            try:
+                await self.tick()
+            except asyncio.CancelledError:
+                raise
+            except Exception as e:
+                logger.error(f"Partition coordinator error: {e}")
+            await asyncio.sleep(self.renew_interval)
+
+    async def start(self) -> None:
+        """完成第一次分区认领后在后台定期续约"""
+        await self.tick()
+        self._task = asyncio.create_task(self.run())
+
+    async def stop(self) -> None:
+        """释放所有分区并注销节点，其他节点可以立即认领"""
+        if self._task is not None:
+            self._task.cancel()
+            await asyncio.gather(self._task, return_exceptions=True)
+            self._task = None
+        revoked = self.owned | self.draining.keys()
+        if self.owned:
+            await self._release(
+                keys=[lease_key(partition) for partition in self.owned],
+                args=[self.node_id],
+            )
+        await self.redis.zrem(NODES_KEY, self.node_id)
+        self.owned.clear()
+        self.draining.clear()
+        if revoked and self.on_revoke is not None:
+            await self.on_revoke(revoked)
+
+    def get_stats(self) -> dict:
+        return {
+            "node_id": self.node_id,
+            "nodes": len(self.nodes),
+            "owned": len(self.owned),
+            "draining": len(self.draining),
+            "target": self.target,
+        }
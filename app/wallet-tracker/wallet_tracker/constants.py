@@ -9,3 +9,5 @@ FAILED_TX_DETAIL_CHANNEL = "tx_detail:failed"
 
 NEW_TX_EVENT_CHANNEL = "tx_event:new"
 FAILED_TX_EVENT_CHANNEL = "tx_event:failed"
+
+TX_DEDUP_KEY_PREFIX = "tx_dedup:"
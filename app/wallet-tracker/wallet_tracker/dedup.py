@@ -0,0 +1,132 @@
+import time
+from collections import OrderedDict
+
+import aioredis
+from aioredis.exceptions import RedisError
+from solbot_common.log import logger
+
+from wallet_tracker.constants import TX_DEDUP_KEY_PREFIX
+
+
+class SignatureDeduplicator:
+    """交易签名去重
+
+    同一笔交易可能多次到达：重叠的 Geyser 订阅、wss 日志订阅中同时提及多个被跟踪的钱包、
+    断线重连后的重放等。在拉取交易详情、解析之前先按签名去重，
+    保证同一笔交易不会重复消耗 RPC、解析以及跟单交易的成本。
+
+    - 本地使用按时间窗口淘汰、固定容量的有序字典记录最近出现过的签名
+    - 配置 redis 后，本地未命中时通过 SET NX EX 在多个节点之间去重
+    """
+
+    def __init__(
+        self,
+        maxsize: int = 100_000,
+        ttl: int = 300,
+        redis: aioredis.Redis | None = None,
+        report_every: int = 1000,
+    ):
+        """
+        Args:
+            maxsize: 本地最多记录的签名数量
+            ttl: 去重时间窗口（秒）
+            redis: 多节点部署时用于共享去重状态的 Redis 客户端
+            report_every: 每检查多少个签名输出一次命中率
+        """
+        self.maxsize = maxsize
+        self.ttl = ttl
+        self.redis = redis
+        self.report_every = report_every
+        self._seen: OrderedDict[str, float] = OrderedDict()
+
+        # 统计信息
+        self.local_hits = 0
+        self.remote_hits = 0
+        self.misses = 0
+
+    def _evict(self, now: float) -> None:
+        # 所有签名的过期时间相同，插入顺序即过期顺序
+        while self._seen:
+            signature, expire_at = next(iter(self._seen.items()))
+            if expire_at > now and len(self._seen) <= self.maxsize:
+                break
+            del self._seen[signature]
+
+    def seen_local(self, signature: str) -> bool:
+        """检查签名是否在本地时间窗口内出现过，未出现过的签名会被记录下来
+
+        Returns:
+            bool: 出现过返回 True
+        """
+        now = time.monotonic()
+        self._evict(now)
+        if signature in self._seen:
+            return True
+        self._seen[signature] = now + self.ttl
+        self._evict(now)
+        return False
+
+    async def is_duplicate(self, signature: str) -> bool:
+        """检查签名是否已经处理过
+
+        Returns:
+            bool: 已处理过返回 True
+        """
+        if self.seen_local(signature):
+            self.local_hits += 1
+            duplicated = True
+        else:
+            duplicated = await self._seen_remote(signature)
+            if duplicated:
+                self.remote_hits += 1
+            else:
+                self.misses += 1
+
+        if self.report_every > 0 and self.total % self.report_every == 0:
+            logger.info(f"Signature dedup stats: {self.stats()}")
+        return duplicated
+
+    async def _seen_remote(self, signature: str) -> bool:
+        if self.redis is None:
+            return False
+        try:
+            created = await self.redis.set(
+                f"{TX_DEDUP_KEY_PREFIX}{signature}", 1, ex=self.ttl, nx=True
+            )
+        except RedisError as e:
+            # Redis 不可用时只使用本地去重，避免丢失交易
+            logger.warning(f"Failed to check signature in Redis: {e}")
+            return False
+        return not created
+
+    async def forget(self, signature: str) -> None:
+        """撤销签名的记录，处理失败的交易之后可以再次处理"""
+        self._seen.pop(signature, None)
+        if self.redis is None:
+            return
+        try:
+            await self.redis.delete(f"{TX_DEDUP_KEY_PREFIX}{signature}")
+        except RedisError as e:
+            logger.warning(f"Failed to forget signature in Redis: {e}")
+
+    @property
+    def total(self) -> int:
+        return self.local_hits + self.remote_hits + self.misses
+
+    @property
+    def hit_rate(self) -> float:
+        if self.total == 0:
+            return 0.0
+        return (self.local_hits + self.remote_hits) / self.total
+
+    def stats(self) -> dict:
+        return {
+            "local_hits": self.local_hits,
+            "remote_hits": self.remote_hits,
+            "misses": self.misses,
+            "hit_rate": round(self.hit_rate, 4),
+            "size": len(self._seen),
+        }
+
+    def __len__(self) -> int:
+        return len(self._seen)
@@ -0,0 +1,192 @@
+"""
+TxEvent 代币信息
+
+下游服务（交易通知、跟单交易）收到 TxEvent 后各自查询代币的 symbol、是否已从 Pump.fun 毕业、
+Raydium 池子等信息，每个事件都会产生额外的 Redis / RPC 往返。
+wallet-tracker 在解析交易后从进程内的缓存读取这些信息并附带在 TxEvent 中：
+
+- 缓存命中时直接附带，不会阻塞解析流水线
+- 缓存未命中的代币交给后台协程查询，之后的事件即可附带
+- 通过 Pump.fun 程序完成的交易，代币一定还在 bonding curve 上，无需查询即可给出路由提示
+"""
+
+import asyncio
+import time
+from collections import OrderedDict
+from collections.abc import Awaitable, Callable
+from dataclasses import replace
+
+from solbot_cache.launch import LaunchCache
+from solbot_cache.rayidum import get_preferred_pool
+from solbot_cache.token_info import TokenInfoCache
+from solbot_common.config import settings
+from solbot_common.constants import PUMP_FUN_PROGRAM
+from solbot_common.log import logger
+from solbot_common.types.tx import TokenEnrichment, TxEvent
+
+PUMP_FUN_PROGRAM_ID = str(PUMP_FUN_PROGRAM)
+
+Resolver = Callable[[str], Awaitable[TokenEnrichment]]
+
+
+async def resolve_token(mint: str) -> TokenEnrichment:
+    """查询代币信息，与下游服务使用相同的缓存，查询失败的字段为 None"""
+    enrichment = TokenEnrichment()
+    try:
+        token_info = await TokenInfoCache().get(mint)
+        if token_info is not None:
+            enrichment.symbol = token_info.symbol
+            enrichment.token_name = token_info.token_name
+    except Exception as e:
+        logger.warning(f"Failed to get token info: {mint}, cause: {e}")
+
+    if mint.endswith("pump"):
+        try:
+            if not await LaunchCache().is_pump_token_graduated(mint):
+                enrichment.route = "pump"
+                return enrichment
+        except Exception as e:
+            logger.warning(f"Failed to check graduation status: {mint}, cause: {e}")
+
+    try:
+        pool_data = await get_preferred_pool(mint)
+    except Exception as e:
+        logger.warning(f"Failed to get preferred pool: {mint}, cause: {e}")
+        return enrichment
+    if pool_data is not None:
+        enrichment.route = "raydium_v4"
+        enrichment.pool_id = str(pool_data["pool_id"])
+    else:
+        enrichment.route = "dex"
+    return enrichment
+
+
+class TokenEnricher:
+    """进程内的代币信息缓存，解析交易后为 TxEvent 附带代币信息"""
+
+    def __init__(
+        self,
+        maxsize: int = 10_000,
+        ttl: float = 300,
+        resolve: Resolver = resolve_token,
+        workers: int = 4,
+        queue_size: int = 1000,
+        enabled: bool = True,
+    ):
+        """
+        Args:
+            maxsize: 最多缓存的代币数量
+            ttl: 路由信息的缓存时间（秒），过期后只保留 symbol 等不会变化的信息并重新查询
+            resolve: 查询代币信息的函数
+            workers: 后台查询的协程数
+            queue_size: 等待查询的代币数量上限，超过后丢弃
+            enabled: 是否附带代币信息
+        """
+        self.maxsize = maxsize
+        self.ttl = ttl
+        self.resolve = resolve
+        self.workers = workers
+        self.queue_size = queue_size
+        self.enabled = enabled
+        # mint -> (代币信息, 过期时间)
+        self._cache: OrderedDict[str, tuple[TokenEnrichment, float]] = OrderedDict()
+        self._queue: asyncio.Queue[str] | None = None
+        self._queued: set[str] = set()
+        self._tasks: list[asyncio.Task] = []
+
+        # 统计信息
+        self.hits = 0
+        self.misses = 0
+        self.resolved = 0
+
+    def enrich(self, tx_event: TxEvent) -> TxEvent:
+        """从缓存读取代币信息附带在 TxEvent 中，缓存未命中或已过期时在后台查询"""
+        if not self.enabled:
+            return tx_event
+        mint = tx_event.mint
+        enrichment = None
+        cached = self._cache.get(mint)
+        if cached is None:
+            self.misses += 1
+            self._schedule(mint)
+        else:
+            self._cache.move_to_end(mint)
+            enrichment, expire_at = cached
+            if expire_at <= time.monotonic():
+                self.misses += 1
+                enrichment = replace(enrichment, route=None, pool_id=None, resolved_at=None)
+                self._schedule(mint)
+            else:
+                self.hits += 1
+
+        if tx_event.program_id == PUMP_FUN_PROGRAM_ID:
+            enrichment = replace(
+                enrichment or TokenEnrichment(),
+                route="pump",
+                pool_id=None,
+                resolved_at=time.time(),
+            )
+        tx_event.enrichment = enrichment
+        return tx_event
+
+    def put(self, mint: str, enrichment: TokenEnrichment) -> None:
+        if enrichment.route is not None and enrichment.resolved_at is None:
+            enrichment = replace(enrichment, resolved_at=time.time())
+        self._cache[mint] = (enrichment, time.monotonic() + self.ttl)
+        self._cache.move_to_end(mint)
+        while len(self._cache) > self.maxsize:
+            self._cache.popitem(last=False)
+
+    def _schedule(self, mint: str) -> None:
+        # 未启动后台查询时（如离线回放）只使用交易本身的路由提示
+        if self._queue is None or mint in self._queued:
+            return
+        try:
+            self._queue.put_nowait(mint)
+        except asyncio.QueueFull:
+            return
+        self._queued.add(mint)
+
+    async def _worker(self) -> None:
+        assert self._queue is not None
+        while True:
+            mint = await self._queue.get()
+            try:
+                self.put(mint, await self.resolve(mint))
+                self.resolved += 1
+            except Exception as e:
+                logger.error(f"Failed to resolve token {mint}: {e}")
+            finally:
+                self._queued.discard(mint)
+                self._queue.task_done()
+
+    async def start(self) -> None:
+        if not self.enabled or self._tasks:
+            return
+        self._queue = asyncio.Queue(self.queue_size)
+        self._tasks = [asyncio.create_task(self._worker()) for _ in range(self.workers)]
+
+    async def stop(self) -> None:
+        for task in self._tasks:
+            task.cancel()
+        await asyncio.gather(*self._tasks, return_exceptions=True)
+        self._tasks = []
+        self._queue = None
+        self._queued.clear()
+
+    def get_stats(self) -> dict:
+        return {
+            "cached": len(self._cache),
+            "hits": self.hits,
+            "misses": self.misses,
+            "resolved": self.resolved,
+            "queued": len(self._queued),
+        }
+
+
+# 所有订阅端的 TxEventPipeline 共享同一个缓存
+token_enricher = TokenEnricher(
+    maxsize=settings.monitor.enrich_cache_size,
+    ttl=settings.monitor.enrich_ttl,
+    enabled=settings.monitor.enrich_tokens,
+)
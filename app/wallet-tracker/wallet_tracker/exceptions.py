@@ -16,6 +16,8 @@ class UnknownTransactionType(Exception):
 
 class ZeroChangeAmountError(Exception):
     def __init__(self, pre_amount: int, post_amount: int):
+        # 传递参数给基类，保证异常可以被 pickle（在进程池中解析时需要）
+        super().__init__(pre_amount, post_amount)
         self.pre_amount = pre_amount
         self.post_amount = post_amount
 
@@ -0,0 +1,138 @@
+import asyncio
+from collections.abc import Awaitable, Callable, Mapping
+
+from solana.rpc.async_api import AsyncClient
+from solana.rpc.commitment import Commitment, Confirmed
+from solbot_common.log import logger
+from solders.pubkey import Pubkey  # type: ignore
+from solders.rpc.responses import RpcConfirmedTransactionStatusWithSignature  # type: ignore
+from solders.signature import Signature  # type: ignore
+
+from wallet_tracker.dedup import SignatureDeduplicator
+
+
+class SlotGapBackfiller:
+    """补齐订阅流断开期间遗漏的交易
+
+    服务商不支持 from_slot 时，重连后通过 getSignaturesForAddress 按钱包分页拉取
+    断开期间（slot 严格大于订阅流已经处理到的 slot）的交易签名，再拉取交易详情交给 handler 处理。
+    每个钱包的起点不早于它被订阅时的 slot，不会把订阅之前的历史交易当作新交易发送。
+    所有签名都会经过去重，已经处理过的交易不会重复拉取；拉取或处理失败的签名会撤销去重记录，
+    下一次补齐时仍会重试。
+
+    断开期间最新的交易通常还没有 finalized，签名列表和交易详情都应以 confirmed 查询，
+    否则这部分交易会被漏掉。
+    """
+
+    def __init__(
+        self,
+        client: AsyncClient,
+        fetch_tx_detail: Callable[[Signature], Awaitable[dict | None]],
+        handler: Callable[[dict], Awaitable[None]],
+        dedup: SignatureDeduplicator,
+        concurrency: int = 8,
+        page_limit: int = 100,
+        max_pages: int = 10,
+        commitment: Commitment = Confirmed,
+    ):
+        """
+        Args:
+            client: Solana RPC 客户端
+            fetch_tx_detail: 拉取交易详情的函数
+            handler: 处理交易详情的函数
+            dedup: 交易签名去重
+            concurrency: 同时进行的 RPC 请求数
+            page_limit: 每次 getSignaturesForAddress 拉取的签名数量
+            max_pages: 每个钱包最多拉取的页数，避免断开过久时无限回溯
+            commitment: getSignaturesForAddress 使用的 commitment，应与 fetch_tx_detail 一致
+        """
+        self.client = client
+        self.fetch_tx_detail = fetch_tx_detail
+        self.handler = handler
+        self.dedup = dedup
+        self.semaphore = asyncio.Semaphore(concurrency)
+        self.page_limit = page_limit
+        self.max_pages = max_pages
+        self.commitment = commitment
+
+    async def list_signatures(
+        self, wallet: str, after_slot: int
+    ) -> list[RpcConfirmedTransactionStatusWithSignature]:
+        """分页拉取钱包在 after_slot 之后（不包括 after_slot）的成功交易签名"""
+        statuses = []
+        before = None
+        for _ in range(self.max_pages):
+            async with self.semaphore:
+                resp = await self.client.get_signatures_for_address(
+                    Pubkey.from_string(wallet),
+                    before=before,
+                    limit=self.page_limit,
+                    commitment=self.commitment,
+                )
+            page = resp.value
+            for status in page:
+                if status.slot <= after_slot:
+                    return statuses
+                if status.err is None:
+                    statuses.append(status)
+            if len(page) < self.page_limit:
+                return statuses
+            before = page[-1].signature
+
+        logger.warning(f"Backfill of {wallet} reached max pages, some transactions may be lost")
+        return statuses
+
+    async def _process_signature(self, signature: Signature) -> bool:
+        try:
+            async with self.semaphore:
+                tx_detail = await self.fetch_tx_detail(signature)
+            if tx_detail is None:
+                logger.error(f"Failed to fetch backfilled transaction: {signature}")
+            else:
+                await self.handler(tx_detail)
+                return True
+        except Exception as e:
+            logger.error(f"Failed to backfill transaction {signature}: {e}")
+        # 撤销去重记录，下一次补齐或订阅流再次收到时仍会处理
+        await self.dedup.forget(str(signature))
+        return False
+
+    async def backfill(self, after_slots: Mapping[str, int]) -> int:
+        """补齐钱包在各自的 slot 之后的交易
+
+        Args:
+            after_slots: 钱包 -> 只补齐该 slot 之后的交易
+
+        Returns:
+            int: 补齐的交易数量
+        """
+        wallets = list(after_slots)
+        from_slot = min(after_slots.values(), default=0)
+        logger.info(f"Backfilling {len(wallets)} wallets after slot {from_slot}")
+        results = await asyncio.gather(
+            *(self.list_signatures(wallet, after_slots[wallet]) for wallet in wallets),
+            return_exceptions=True,
+        )
+
+        statuses: dict[str, RpcConfirmedTransactionStatusWithSignature] = {}
+        for wallet, result in zip(wallets, results, strict=True):
+            if isinstance(result, BaseException):
+                logger.error(f"Failed to list signatures of {wallet}: {result}")
+                continue
+            for status in result:
+                statuses[str(status.signature)] = status
+
+        # 跳过已经处理过的交易（包括断开前已经从订阅流收到的交易）
+        pending = []
+        for signature, status in sorted(statuses.items(), key=lambda item: item[1].slot):
+            if await self.dedup.is_duplicate(signature):
+                continue
+            pending.append(status.signature)
+
+        results = await asyncio.gather(
+            *(self._process_signature(signature) for signature in pending),
+            return_exceptions=True,
+        )
+        count = sum(1 for result in results if result is True)
+        logger.info(f"Backfilled {count} transactions after slot {from_slot}")
+        return count
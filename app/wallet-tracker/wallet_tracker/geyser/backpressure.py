@@ -0,0 +1,48 @@
+from enum import Enum
+
+
+class OverloadPolicy(str, Enum):
+    """响应队列满时对交易推送的处理策略
+
+    非交易推送（ping 等）在队列满时总是直接丢弃。
+    """
+
+    BLOCK = "block"  # 阻塞读取订阅流，直到队列有空位（可能导致服务商断开连接）
+    SHED = "shed"  # 丢弃交易
+    # 将交易交给后台协程写入 tx_detail:new，交由 TransactionWorker 处理，溢出队列也满时丢弃
+    SPILL = "spill"
+
+
+class ResponseQueueStats:
+    """响应队列统计
+
+    - depth: 队列长度
+    - wait: 推送在队列中等待的时间（秒），使用指数加权移动平均
+    - max_wait: 统计周期内的最大等待时间（秒）
+    """
+
+    def __init__(self, alpha: float = 0.2):
+        self.alpha = alpha
+        self.depth = 0
+        self.wait = 0.0
+        self.max_wait = 0.0
+        self.shed_updates = 0
+        self.shed_transactions = 0
+        self.spilled_transactions = 0
+
+    def observe_wait(self, wait: float) -> None:
+        self.wait = self.alpha * wait + (1 - self.alpha) * self.wait
+        self.max_wait = max(self.max_wait, wait)
+
+    def reset_max_wait(self) -> None:
+        self.max_wait = 0.0
+
+    def as_dict(self) -> dict:
+        return {
+            "depth": self.depth,
+            "wait_ms": round(self.wait * 1000, 2),
+            "max_wait_ms": round(self.max_wait * 1000, 2),
+            "shed_updates": self.shed_updates,
+            "shed_transactions": self.shed_transactions,
+            "spilled_transactions": self.spilled_transactions,
+        }
@@ -0,0 +1,94 @@
+from collections.abc import Iterable, Sequence
+from enum import Enum
+
+from yellowstone_grpc.grpc import geyser_pb2
+
+# 不限制程序时使用的过滤器名称
+DEFAULT_FILTER_KEY = "key"
+# 按程序订阅时使用的过滤器名称
+PROGRAMS_FILTER_KEY = "programs"
+
+
+class SubscribeStrategy(str, Enum):
+    """Geyser 订阅策略"""
+
+    # 通过 account_include 订阅被跟踪钱包的交易，钱包变化时需要重新发送订阅请求
+    WALLETS = "wallets"
+    # 订阅 swap 程序的所有交易，在本地匹配签名者，适合跟踪几万个钱包的场景
+    PROGRAMS = "programs"
+
+
+def build_transaction_filters(
+    subscribe_request: geyser_pb2.SubscribeRequest,
+    wallets: Iterable[str],
+    swap_programs: Sequence[str] = (),
+    account_required: Sequence[str] = (),
+) -> None:
+    """在订阅请求中添加交易过滤器，尽量在服务端过滤掉不需要的交易
+
+    - 不接收投票交易和失败的交易
+    - account_required: 交易必须同时包含的账户
+    - swap_programs: 只接收调用了其中任一程序的交易。account_required 要求包含所有账户，
+      因此每个程序单独使用一个过滤器，服务端对多个过滤器取并集
+    """
+    wallets = list(wallets)
+    programs = list(swap_programs) or [None]
+    for program_id in programs:
+        key = DEFAULT_FILTER_KEY if program_id is None else f"swap:{program_id}"
+        tx_filter = subscribe_request.transactions[key]
+        tx_filter.account_include.extend(wallets)
+        tx_filter.vote = False
+        tx_filter.failed = False
+        tx_filter.account_required.extend(account_required)
+        if program_id is not None:
+            tx_filter.account_required.append(program_id)
+
+
+def build_program_filters(
+    subscribe_request: geyser_pb2.SubscribeRequest, programs: Sequence[str]
+) -> None:
+    """订阅调用了任一程序的所有交易，订阅请求与被跟踪的钱包无关"""
+    tx_filter = subscribe_request.transactions[PROGRAMS_FILTER_KEY]
+    tx_filter.account_include.extend(programs)
+    tx_filter.vote = False
+    tx_filter.failed = False
+
+
+def get_signer(update: geyser_pb2.SubscribeUpdateTransaction) -> bytes | None:
+    """不做 base58 编码，直接读取交易签名者（第一个账户）的公钥字节"""
+    account_keys = update.transaction.transaction.message.account_keys
+    if not account_keys:
+        return None
+    return account_keys[0]
+
+
+class StreamStats:
+    """订阅流统计，received 为订阅流收到的推送，accepted 为通过签名者检查后进入队列的推送
+
+    对比开启服务端过滤前后的 received_bytes，即可得到节省的带宽。
+    """
+
+    def __init__(self):
+        self.received_messages = 0
+        self.received_bytes = 0
+        self.accepted_messages = 0
+        self.accepted_bytes = 0
+        self.dropped_not_signer = 0
+
+    def observe(self, size: int, accepted: bool) -> None:
+        self.received_messages += 1
+        self.received_bytes += size
+        if accepted:
+            self.accepted_messages += 1
+            self.accepted_bytes += size
+        else:
+            self.dropped_not_signer += 1
+
+    def as_dict(self) -> dict:
+        return {
+            "received_messages": self.received_messages,
+            "received_bytes": self.received_bytes,
+            "accepted_messages": self.accepted_messages,
+            "accepted_bytes": self.accepted_bytes,
+            "dropped_not_signer": self.dropped_not_signer,
+        }
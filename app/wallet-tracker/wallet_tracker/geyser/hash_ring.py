@@ -0,0 +1,34 @@
+import bisect
+import hashlib
+
+
+def _hash(key: str) -> int:
+    return int.from_bytes(hashlib.md5(key.encode("utf-8")).digest()[:8], "big")
+
+
+class HashRing:
+    """一致性哈希环
+
+    将钱包地址映射到固定数量的分片上，分片数量变化时只有少量钱包需要迁移。
+    每个分片在环上有 replicas 个虚拟节点，使钱包分布更加均匀。
+    """
+
+    def __init__(self, shard_nums: int, replicas: int = 64):
+        if shard_nums < 1:
+            raise ValueError("shard_nums must be greater than 0")
+        self.shard_nums = shard_nums
+        self.replicas = replicas
+        ring = sorted(
+            (_hash(f"shard-{shard}#{replica}"), shard)
+            for shard in range(shard_nums)
+            for replica in range(replicas)
+        )
+        self._keys = [key for key, _ in ring]
+        self._shards = [shard for _, shard in ring]
+
+    def get_shard(self, key: str) -> int:
+        """获取 key 所在的分片编号"""
+        if self.shard_nums == 1:
+            return 0
+        index = bisect.bisect(self._keys, _hash(key)) % len(self._keys)
+        return self._shards[index]
@@ -0,0 +1,35 @@
+from collections.abc import Iterable
+
+from solders.pubkey import Pubkey  # type: ignore
+from yellowstone_grpc.grpc import geyser_pb2
+
+from .filters import get_signer
+
+
+class WalletMatcher:
+    """在本地匹配交易签名者是否为被跟踪的钱包
+
+    使用公钥的原始 32 字节作为 key 的哈希集合，匹配时不需要对推送中的账户做 base58 编码，
+    查询是 O(1) 且没有误判。五万个钱包大约占用 5MB 内存，不需要布隆过滤器。
+    """
+
+    def __init__(self, wallets: Iterable[str] = ()):
+        self.keys: set[bytes] = set()
+        for wallet in wallets:
+            self.add(wallet)
+
+    def add(self, wallet: str) -> None:
+        self.keys.add(bytes(Pubkey.from_string(wallet)))
+
+    def remove(self, wallet: str) -> None:
+        self.keys.discard(bytes(Pubkey.from_string(wallet)))
+
+    def __contains__(self, wallet: str) -> bool:
+        return bytes(Pubkey.from_string(wallet)) in self.keys
+
+    def __len__(self) -> int:
+        return len(self.keys)
+
+    def match(self, update: geyser_pb2.SubscribeUpdateTransaction) -> bool:
+        """交易的签名者是否为被跟踪的钱包"""
+        return get_signer(update) in self.keys
@@ -0,0 +1,61 @@
+from collections import OrderedDict, deque
+
+# 每个 slot 的平均时长（秒）
+SLOT_DURATION = 0.4
+
+
+class SlotClock:
+    """slot -> 区块时间的映射，由 Geyser blocks_meta 推送更新
+
+    交易推送中没有区块时间，通过交易所在的 slot 查询。交易往往先于该 slot 的 blocks_meta 到达，
+    此时根据最近已知的 slot 按平均出块时间推算。区块时间来自链上，精度为秒。
+    """
+
+    def __init__(self, max_slots: int = 10_000, latency_window: int = 1000):
+        self.max_slots = max_slots
+        self.block_times: OrderedDict[int, int] = OrderedDict()
+        # 最近一个已知区块时间的 slot
+        self.latest_slot = 0
+        # 从区块时间到发现交易的延迟（秒）
+        self.latencies: deque[float] = deque(maxlen=latency_window)
+        self.exact_hits = 0
+        self.estimated_hits = 0
+
+    def record(self, slot: int, block_time: int) -> None:
+        self.block_times[slot] = block_time
+        self.latest_slot = max(self.latest_slot, slot)
+        while len(self.block_times) > self.max_slots:
+            self.block_times.popitem(last=False)
+
+    def block_time(self, slot: int) -> int | None:
+        """返回 slot 的区块时间，未知时根据最近的 slot 推算，没有任何数据时返回 None"""
+        block_time = self.block_times.get(slot)
+        if block_time is not None:
+            self.exact_hits += 1
+            return block_time
+        if not self.latest_slot:
+            return None
+        latest_time = self.block_times.get(self.latest_slot)
+        if latest_time is None:
+            return None
+        self.estimated_hits += 1
+        return round(latest_time + (slot - self.latest_slot) * SLOT_DURATION)
+
+    def observe_latency(self, latency: float) -> None:
+        self.latencies.append(latency)
+
+    def percentile(self, q: float) -> float | None:
+        if not self.latencies:
+            return None
+        latencies = sorted(self.latencies)
+        return latencies[min(len(latencies) - 1, int(len(latencies) * q))]
+
+    def as_dict(self) -> dict:
+        p50, p99 = self.percentile(0.5), self.percentile(0.99)
+        return {
+            "latest_slot": self.latest_slot,
+            "block_time_exact": self.exact_hits,
+            "block_time_estimated": self.estimated_hits,
+            "detect_latency_p50_ms": None if p50 is None else round(p50 * 1000),
+            "detect_latency_p99_ms": None if p99 is None else round(p99 * 1000),
+        }
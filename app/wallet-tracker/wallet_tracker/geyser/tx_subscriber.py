@@ -1,30 +1,52 @@
 import asyncio
 import signal
 import time
-from collections.abc import AsyncGenerator, Sequence
+from collections import OrderedDict
+from collections.abc import AsyncGenerator, Iterable, Sequence
+from concurrent.futures import Executor
 
 import aioredis
 import base58
 import orjson as json
-from google.protobuf.json_format import (
-    Parse,
-    _Printer,  # type: ignore
-)
+from google.protobuf.json_format import _Printer  # type: ignore
 from google.protobuf.message import Message
 from grpc.aio import AioRpcError
+from solana.rpc.async_api import AsyncClient
+from solana.rpc.commitment import Confirmed
 from solbot_common.config import settings
+from solbot_common.constants import SWAP_PROGRAMS
 from solbot_common.log import logger
 from solbot_db.redis import RedisClient
 from solders.pubkey import Pubkey  # type: ignore
+from solders.signature import Signature  # type: ignore
 from yellowstone_grpc.client import GeyserClient
 from yellowstone_grpc.grpc import geyser_pb2
-from yellowstone_grpc.types import (
-    SubscribeRequest,
-    SubscribeRequestFilterTransactions,
-    SubscribeRequestPing,
-)
 
+from wallet_tracker import benchmark
 from wallet_tracker.constants import NEW_TX_DETAIL_CHANNEL
+from wallet_tracker.dedup import SignatureDeduplicator
+from wallet_tracker.parser import GeyserTXParser, RawTXParser
+from wallet_tracker.replay.recorder import RecordKind, recorder
+from wallet_tracker.tx_pipeline import TxEventPipeline
+from wallet_tracker.wss.tx_detail_fetcher import TxDetailRawFetcher
+
+from .backfill import SlotGapBackfiller
+from .backpressure import OverloadPolicy, ResponseQueueStats
+from .filters import (
+    StreamStats,
+    SubscribeStrategy,
+    build_program_filters,
+    build_transaction_filters,
+    get_signer,
+)
+from .hash_ring import HashRing
+from .matcher import WalletMatcher
+from .slot_clock import SlotClock
+
+# 并非所有版本的 Yellowstone gRPC 协议都支持 from_slot
+SUPPORTS_FROM_SLOT = "from_slot" in geyser_pb2.SubscribeRequest.DESCRIPTOR.fields_by_name
+# 空闲的 worker 每隔该时间（秒）检查一次是否需要缩容退出
+WORKER_IDLE_TIMEOUT = 1.0
 
 
 def should_convert_to_base58(value) -> bool:
@@ -67,106 +89,325 @@ def proto_to_dict(message: Message) -> dict:
     return printer._MessageToJsonObject(message)
 
 
+class GeyserShard:
+    """单个 Geyser 订阅流，只负责被分配到该分片的钱包"""
+
+    def __init__(self, index: int):
+        self.index = index
+        self.wallets: set[str] = set()
+        self.geyser_client: GeyserClient | None = None
+        self.request_queue: asyncio.Queue[geyser_pb2.SubscribeRequest] | None = None
+        self.responses: AsyncGenerator[geyser_pb2.SubscribeUpdate, None] | None = None
+        self.task: asyncio.Task | None = None
+        # 订阅流已经处理到的 slot，由交易、slot 状态和区块元数据推送更新，
+        # 重连时只补齐该 slot 之后的交易
+        self.last_slot = 0
+        # 钱包 -> 订阅时的 slot，补齐时不会早于该 slot
+        self.subscribed_slots: dict[str, int] = {}
+
+
 class TransactionDetailSubscriber:
+    """Geyser 交易订阅者
+
+    被跟踪的钱包通过一致性哈希分配到 shard_nums 个 gRPC 订阅流中，
+    降低单个订阅流的负载及 account_include 的大小，单个订阅流断开也只影响部分钱包。
+    同一笔交易可能涉及多个被跟踪的钱包，从多个订阅流到达，处理前会按签名去重。
+    """
+
     def __init__(
         self,
         endpoint: str,
         api_key: str,
         redis_client: aioredis.Redis,
         wallets: Sequence[Pubkey],
+        inline_parse: bool = True,
+        debounce_interval: float = 0.2,
+        shard_nums: int = 1,
+        dedup: SignatureDeduplicator | None = None,
+        worker_nums: int = 2,
+        max_worker_nums: int = 8,
+        queue_size: int = 1000,
+        spill_queue_size: int = 1000,
+        overload_policy: OverloadPolicy | str = OverloadPolicy.SPILL,
+        scale_up_latency: float = 0.2,
+        stats_interval: int = 10,
+        swap_programs: Sequence[str] = (),
+        account_required: Sequence[str] = (),
+        signer_only: bool = True,
+        strategy: SubscribeStrategy | str = SubscribeStrategy.WALLETS,
+        programs: Sequence[str] = SWAP_PROGRAMS,
+        executor: Executor | None = None,
+        max_backfill_wallets: int = 200,
     ):
         self.endpoint = endpoint
         self.api_key = api_key
-        self.geyser_client = None
         self.wallets = wallets
-        self.subscribed_wallets = {str(wallet) for wallet in wallets}
+        self.subscribed_wallets: set[str] = set()
         self.redis = redis_client
+        self.inline_parse = inline_parse
+        self.pipeline = TxEventPipeline(redis_client, executor=executor)
         self.is_running = False
-        self.retry_count = 0
         self.max_retries = 3
         self.retry_delay = 5  # seconds
 
-        self.request_queue: asyncio.Queue[geyser_pb2.SubscribeRequest] | None = None
-        self.responses: AsyncGenerator[geyser_pb2.SubscribeUpdate, None] | None = None
-        # 响应处理相关
-        self.response_queue = asyncio.Queue(maxsize=1000)
-        self.worker_nums = 2
+        # 过滤相关，服务端只推送调用了 swap_programs 的交易，
+        # 本地只处理签名者是被跟踪钱包的交易
+        self.swap_programs = list(swap_programs)
+        self.account_required = list(account_required)
+        self.matcher = WalletMatcher()
+        self.stream_stats = StreamStats()
+        # 区块时间，由第一个分片的 blocks_meta 推送更新
+        self.slot_clock = SlotClock()
+        # programs 策略下订阅 programs 的所有交易，只能通过签名者匹配被跟踪的钱包
+        self.strategy = SubscribeStrategy(strategy)
+        self.programs = list(programs)
+        self.signer_only = signer_only or self.strategy == SubscribeStrategy.PROGRAMS
+        if self.strategy == SubscribeStrategy.PROGRAMS and shard_nums > 1:
+            # 每个分片都会收到相同的交易，只使用一个订阅流
+            logger.warning("Geyser programs strategy uses a single shard")
+            shard_nums = 1
+
+        # 分片相关
+        self.hash_ring = HashRing(shard_nums)
+        self.shards = [GeyserShard(index) for index in range(shard_nums)]
+        self.dedup = dedup if dedup is not None else SignatureDeduplicator()
+        # 响应处理相关，队列中保存 (入队时间, 推送)
+        self.response_queue: asyncio.Queue[tuple[float, geyser_pb2.SubscribeUpdate]] = (
+            asyncio.Queue(maxsize=queue_size)
+        )
+        self.overload_policy = OverloadPolicy(overload_policy)
+        # SPILL 策略下溢出的交易由后台协程去重、转换成 JSON 后写入 Redis，不阻塞订阅流的读取
+        self.spill_queue: asyncio.Queue[geyser_pb2.SubscribeUpdateTransaction] = asyncio.Queue(
+            maxsize=spill_queue_size
+        )
+        self._spill_task: asyncio.Task | None = None
+        self.queue_stats = ResponseQueueStats()
+        self.stats_interval = stats_interval
+        # worker 数量根据队列等待时间在 [worker_nums, max_worker_nums] 之间自动伸缩
+        self.worker_nums = worker_nums
+        self.max_worker_nums = max(worker_nums, max_worker_nums)
+        self.scale_up_latency = scale_up_latency
         self.workers: list[asyncio.Task] = []
+        self._retiring_workers = 0
+        self._monitor_task: asyncio.Task | None = None
+        # 订阅更新相关，在 debounce 时间窗口内的多次订阅变更只会发送一次请求
+        self.debounce_interval = debounce_interval
+        self._flush_task: asyncio.Task | None = None
+        self._dirty_shards: set[int] = set()
+        for wallet in wallets:
+            self._add_wallet(str(wallet))
+        # 断线补齐相关
+        self.backfiller = SlotGapBackfiller(
+            AsyncClient(settings.rpc.rpc_url),
+            TxDetailRawFetcher(commitment=Confirmed).fetch,
+            self._process_tx_detail,
+            self.dedup,
+        )
+        self._backfill_tasks: set[asyncio.Task] = set()
+        # programs 策略下所有钱包都在同一个订阅流中，重连时最多补齐的钱包数量，
+        # 优先补齐最近有交易的钱包（签名者公钥字节，按最近交易的顺序排列）
+        self.max_backfill_wallets = max_backfill_wallets
+        self.active_wallets: OrderedDict[bytes, None] = OrderedDict()
 
-    async def _connect(self) -> None:
+    async def _connect(self) -> GeyserClient:
         """Connect to Geyser service with retry mechanism."""
-        while self.retry_count < self.max_retries:
+        retry_count = 0
+        while True:
             try:
-                self.geyser_client = await GeyserClient.connect(self.endpoint, x_token=self.api_key)
-                self.retry_count = 0  # Reset retry count on successful connection
+                geyser_client = await GeyserClient.connect(self.endpoint, x_token=self.api_key)
                 logger.info("Successfully connected to Geyser service")
-                return
+                return geyser_client
             except Exception as e:
-                self.retry_count += 1
-                if self.retry_count >= self.max_retries:
+                retry_count += 1
+                if retry_count >= self.max_retries:
                     logger.error(
                         f"Failed to connect to Geyser service after {self.max_retries} attempts: {e}"
                     )
                     raise
                 logger.warning(
-                    f"Connection attempt {self.retry_count} failed, retrying in {self.retry_delay} seconds..."
+                    f"Connection attempt {retry_count} failed, retrying in {self.retry_delay} seconds..."
                 )
                 await asyncio.sleep(self.retry_delay)
 
-    async def _reconnect_and_subscribe(self) -> None:
-        logger.info("Attempting to reconnect...")
-        await asyncio.sleep(self.retry_delay)
-        await self._connect()
-
-        if self.geyser_client is None:
-            raise RuntimeError("Geyser client is not connected")
+    async def _subscribe_shard(self, shard: GeyserShard) -> None:
+        """为分片建立连接并发送订阅请求"""
+        if shard.geyser_client is not None:
+            try:
+                await shard.geyser_client.close()
+            except Exception as e:
+                logger.warning(f"Error closing geyser client of shard {shard.index}: {e}")
+        shard.geyser_client = await self._connect()
 
-        # Create subscription request
-        subscribe_request = self.__build_subscribe_request()
-        json_str = subscribe_request.model_dump_json()
-        pb_request = Parse(json_str, geyser_pb2.SubscribeRequest())
+        subscribe_request = self._build_subscribe_request(shard.wallets, shard.index == 0)
+        # 重连时从断开前已经处理到的 slot 之后开始重放
+        replay_from = shard.last_slot + 1 if shard.last_slot and shard.wallets else None
+        if replay_from is not None and SUPPORTS_FROM_SLOT:
+            subscribe_request.from_slot = replay_from  # type: ignore
 
         # Subscribe to updates
-        logger.info("Subscribing to account updates...")
+        logger.info(f"Subscribing to account updates on shard {shard.index}...")
         (
-            self.request_queue,
-            self.responses,
-        ) = await self.geyser_client.subscribe_with_request(pb_request)
+            shard.request_queue,
+            shard.responses,
+        ) = await shard.geyser_client.subscribe_with_request(subscribe_request)
+        self._dirty_shards.discard(shard.index)
+
+        if replay_from is not None and not SUPPORTS_FROM_SLOT:
+            # 服务商不支持 from_slot，通过 RPC 补齐断开期间的交易
+            task = asyncio.create_task(self.backfiller.backfill(self._backfill_slots(shard)))
+            self._backfill_tasks.add(task)
+            task.add_done_callback(self._backfill_tasks.discard)
+
+    def _backfill_slots(self, shard: GeyserShard) -> dict[str, int]:
+        """分片中每个钱包需要补齐的起点：分片已经处理到的 slot 与钱包被订阅时的 slot 中较晚的一个"""
+        wallets = list(shard.wallets)
+        if self.strategy == SubscribeStrategy.PROGRAMS and len(wallets) > self.max_backfill_wallets:
+            # 避免每次重连都对所有被跟踪的钱包调用 getSignaturesForAddress
+            active = [str(Pubkey.from_bytes(key)) for key in reversed(self.active_wallets)]
+            active = [wallet for wallet in active if wallet in shard.wallets]
+            selected = set(active)
+            rest = [wallet for wallet in wallets if wallet not in selected]
+            wallets = (active + rest)[: self.max_backfill_wallets]
+            logger.warning(
+                f"Backfill of shard {shard.index} limited to {len(wallets)} "
+                f"of {len(shard.wallets)} wallets"
+            )
+        return {
+            wallet: max(shard.last_slot, shard.subscribed_slots.get(wallet, 0))
+            for wallet in wallets
+        }
+
+    async def _receive_shard(self, shard: GeyserShard) -> None:
+        """读取分片的订阅流，放入响应队列"""
+        while self.is_running:
+            try:
+                if shard.responses is None:
+                    await self._subscribe_shard(shard)
+                assert shard.responses is not None
+                async for response in shard.responses:
+                    if not self.is_running:
+                        break
+                    if response.HasField("slot"):
+                        # slot 状态只用于记录订阅流的进度
+                        shard.last_slot = max(shard.last_slot, response.slot.slot)
+                        continue
+                    if response.HasField("transaction"):
+                        shard.last_slot = max(shard.last_slot, response.transaction.slot)
+                    elif response.HasField("block_meta"):
+                        shard.last_slot = max(shard.last_slot, response.block_meta.slot)
+                    await self._ingest(response)
+            except asyncio.CancelledError:
+                break
+            except AioRpcError as e:
+                logger.error(f"Rpc Error on shard {shard.index}: {e._details}")
+            except Exception as e:
+                logger.exception(e)
 
-    def __build_subscribe_request(self) -> SubscribeRequest:
-        logger.info(f"Subscribing to accounts: {self.subscribed_wallets}")
+            if not self.is_running:
+                break
+            logger.info(f"Attempting to reconnect shard {shard.index}...")
+            shard.responses = None
+            await asyncio.sleep(self.retry_delay)
 
-        params = {}
+    def _build_subscribe_request(
+        self, wallets: Iterable[str], blocks_meta: bool = False
+    ) -> geyser_pb2.SubscribeRequest:
+        """直接构建 protobuf 订阅请求，避免经过 pydantic 模型和 JSON 的转换
 
-        if len(self.subscribed_wallets) != 0:
-            params["transactions"] = {
-                "key": SubscribeRequestFilterTransactions(
-                    account_include=list(self.subscribed_wallets),
-                    failed=False,
-                )
-            }
+        blocks_meta 为 True 时同时订阅区块元数据，用于获取交易的区块时间
+        """
+        subscribe_request = geyser_pb2.SubscribeRequest()
+        if blocks_meta:
+            subscribe_request.blocks_meta["blocks_meta"].SetInParent()
+        wallets = list(wallets)
+        if wallets:
+            # 订阅 slot 状态记录订阅流的进度，没有交易的时间段也能确定重连后补齐的起点
+            subscribe_request.slots["slots"].filter_by_commitment = True
+        logger.info(f"Subscribing to {len(wallets)} accounts")
+        if len(wallets) != 0 and self.strategy == SubscribeStrategy.PROGRAMS:
+            build_program_filters(subscribe_request, self.programs)
+        elif len(wallets) != 0:
+            build_transaction_filters(
+                subscribe_request, wallets, self.swap_programs, self.account_required
+            )
         else:
-            params["ping"] = SubscribeRequestPing(id=1)
-
-        subscribe_request = SubscribeRequest(**params)
+            subscribe_request.ping.id = 1
         return subscribe_request
 
-    async def _process_transaction(self, transaction: dict) -> None:
-        """Process and store transaction in Redis."""
+    async def _process_transaction(self, update: geyser_pb2.SubscribeUpdateTransaction) -> None:
+        """处理单个交易
+
+        inline 模式下直接从 protobuf 消息解析交易并发送 TxEvent，
+        只有解析失败时才会转换成 JSON 写入 tx_detail:new，交由 TransactionWorker 重试。
+        """
+        if not self.inline_parse:
+            await self._push_transaction_to_redis(update)
+            return
+
+        block_time = self.slot_clock.block_time(update.slot)
+        tx_parser = GeyserTXParser(update, block_time=block_time)
+        try:
+            signature = tx_parser.get_tx_hash()
+        except Exception as e:
+            logger.error(f"Invalid transaction update: {e}")
+            return
+
+        await benchmark.init(signature)
+        if block_time is not None:
+            # 从区块时间到发现交易的延迟，区块时间精度为秒
+            self.slot_clock.observe_latency(time.time() - block_time)
+        await self.pipeline.process(
+            tx_parser,
+            lambda: json.dumps(self._build_tx_detail(update)).decode("utf-8"),
+            spill_channel=NEW_TX_DETAIL_CHANNEL,
+        )
+
+    async def _process_tx_detail(self, tx_detail: dict) -> None:
+        """处理通过 RPC 补齐的交易详情"""
+        tx_parser = RawTXParser(tx_detail)
+        # 与订阅流的推送一样，只处理签名者是被跟踪钱包的交易
+        if self.signer_only:
+            try:
+                who = tx_parser.get_who()
+            except Exception as e:
+                logger.error(f"Invalid backfilled transaction: {e}")
+                return
+            if who not in self.subscribed_wallets:
+                logger.debug(f"Skip backfilled transaction not signed by tracked wallet: {who}")
+                return
+        tx_detail_text = json.dumps(tx_detail).decode("utf-8")
+        if not self.inline_parse:
+            await self.redis.lpush(NEW_TX_DETAIL_CHANNEL, tx_detail_text)
+            return
+        await self.pipeline.process(
+            tx_parser,
+            lambda: tx_detail_text,
+            spill_channel=NEW_TX_DETAIL_CHANNEL,
+        )
+
+    def _build_tx_detail(self, update: geyser_pb2.SubscribeUpdateTransaction) -> dict:
+        """将交易构建成 rpc 返回的结构，方便统一解析交易数据"""
+        transaction = proto_to_dict(update)
+        data = {
+            **transaction["transaction"],
+        }
+        data["slot"] = int(transaction["slot"])
+        data["version"] = 0
+        # 推送中没有 blockTime，通过 slot 查询区块时间，未知时使用当前时间
+        block_time = self.slot_clock.block_time(data["slot"])
+        data["blockTime"] = block_time if block_time is not None else int(time.time())
+        return data
+
+    async def _push_transaction_to_redis(
+        self, update: geyser_pb2.SubscribeUpdateTransaction
+    ) -> None:
+        """Convert transaction to RPC-like JSON and store it in Redis."""
         if self.redis is None:
             raise Exception("Redis is not connected")
 
         try:
-            signature = transaction["transaction"]["signature"]
-            # 构建成 rpc 返回的结构，方便统一解析交易数据
-            data = {
-                **transaction["transaction"],
-            }
-            data["slot"] = int(transaction["slot"])
-            data["version"] = 0
-            # 只有被确认之后才会有 blockTime, 所以这里设置为当前时间
-            data["blockTime"] = int(time.time())
-
+            data = self._build_tx_detail(update)
+            signature = data["signature"]
             tx_info_json = json.dumps(data)
             # Store in Redis using LIST structure
             # 将交易信息添加到列表左端（最新的交易在最前面）
@@ -177,19 +418,119 @@ class TransactionDetailSubscriber:
         except Exception as e:
             logger.exception(f"Error processing transaction: {e}")
 
+    async def _ingest(self, response: geyser_pb2.SubscribeUpdate) -> None:
+        """处理订阅流的单个推送：block_meta 更新区块时间，其余推送检查签名者后放入响应队列
+
+        开启录制时，记录 block_meta 和通过检查的推送，回放时从这里重新输入
+        """
+        if response.HasField("block_meta"):
+            if recorder.enabled:
+                recorder.record(RecordKind.GEYSER, response.SerializeToString())
+            block_meta = response.block_meta
+            self.slot_clock.record(block_meta.slot, block_meta.block_time.timestamp)
+            return
+        if self._accept(response):
+            if recorder.enabled:
+                recorder.record(RecordKind.GEYSER, response.SerializeToString())
+            await self._enqueue(response)
+
+    def _accept(self, response: geyser_pb2.SubscribeUpdate) -> bool:
+        """在解析之前检查交易签名者是否为被跟踪的钱包，并统计订阅流的推送"""
+        accepted = True
+        if self.signer_only and response.HasField("transaction"):
+            accepted = self.matcher.match(response.transaction)
+        self.stream_stats.observe(response.ByteSize(), accepted)
+        return accepted
+
+    async def _enqueue(self, response: geyser_pb2.SubscribeUpdate) -> None:
+        """将推送放入响应队列，队列满时按照 overload_policy 处理，避免阻塞订阅流"""
+        item = (time.monotonic(), response)
+        try:
+            self.response_queue.put_nowait(item)
+            return
+        except asyncio.QueueFull:
+            pass
+
+        # 优先丢弃 ping 等非交易推送
+        if not response.HasField("transaction") or not response.filters:
+            self.queue_stats.shed_updates += 1
+            return
+
+        if self.overload_policy == OverloadPolicy.BLOCK:
+            await self.response_queue.put(item)
+        elif self.overload_policy == OverloadPolicy.SHED:
+            self.queue_stats.shed_transactions += 1
+            logger.warning("Response queue is full, shed transaction")
+        else:
+            try:
+                self.spill_queue.put_nowait(response.transaction)
+            except asyncio.QueueFull:
+                self.queue_stats.shed_transactions += 1
+                logger.warning("Response queue and spill queue are full, shed transaction")
+
+    async def _spill_worker(self) -> None:
+        """将溢出的交易写入 tx_detail:new，交由 TransactionWorker 处理"""
+        while True:
+            update = await self.spill_queue.get()
+            try:
+                signature = str(Signature.from_bytes(update.transaction.signature))
+                if await self.dedup.is_duplicate(signature):
+                    continue
+                self.queue_stats.spilled_transactions += 1
+                logger.warning(f"Response queue is full, spill transaction: {signature}")
+                await self._push_transaction_to_redis(update)
+            except Exception as e:
+                logger.exception(f"Error spilling transaction: {e}")
+            finally:
+                self.spill_queue.task_done()
+
+    async def _process_response(self, response: geyser_pb2.SubscribeUpdate) -> None:
+        update_type = response.WhichOneof("update_oneof")
+        if update_type == "ping":
+            logger.debug("Got ping response")
+        elif update_type == "transaction" and response.filters:
+            # 同一笔交易可能从多个分片到达，只处理一次
+            signature = str(Signature.from_bytes(response.transaction.transaction.signature))
+            if await self.dedup.is_duplicate(signature):
+                logger.debug(f"Skip duplicate transaction: {signature}")
+                return
+            self._mark_active(response.transaction)
+            await self._process_transaction(response.transaction)
+
+    def _mark_active(self, update: geyser_pb2.SubscribeUpdateTransaction) -> None:
+        """记录最近有交易的钱包，programs 策略下重连时优先补齐"""
+        if self.strategy != SubscribeStrategy.PROGRAMS:
+            return
+        signer = get_signer(update)
+        if signer is None:
+            return
+        self.active_wallets[signer] = None
+        self.active_wallets.move_to_end(signer)
+        while len(self.active_wallets) > self.max_backfill_wallets:
+            self.active_wallets.popitem(last=False)
+
     async def _process_response_worker(self):
         """Process responses from the queue."""
         logger.info(f"Starting response worker {id(asyncio.current_task())}")
         while self.is_running:
             try:
-                response = await self.response_queue.get()
+                # 缩容时，空闲或处理完当前推送的 worker 退出
+                if self._retiring_workers > 0:
+                    self._retiring_workers -= 1
+                    current_task = asyncio.current_task()
+                    if current_task in self.workers:
+                        self.workers.remove(current_task)
+                    logger.info(f"Worker {id(current_task)} retired")
+                    break
+                try:
+                    enqueued_at, response = await asyncio.wait_for(
+                        self.response_queue.get(), timeout=WORKER_IDLE_TIMEOUT
+                    )
+                except asyncio.TimeoutError:
+                    continue
+                self.queue_stats.observe_wait(time.monotonic() - enqueued_at)
                 try:
-                    response_dict = proto_to_dict(response)
-                    if "ping" in response_dict:
-                        logger.debug(f"Got ping response: {response_dict}")
-                    if "filters" in response_dict and "transaction" in response_dict:
-                        logger.debug(f"Got transaction response: \n {response_dict}")
-                        await self._process_transaction(response_dict["transaction"])
+                    await self._process_response(response)
                 except Exception as e:
                     logger.error(f"Error processing response: {e}")
                     logger.exception(e)
@@ -201,16 +542,61 @@ class TransactionDetailSubscriber:
             except Exception as e:
                 logger.exception(f"Worker error: {e}")
 
+    def _scale_workers(self) -> None:
+        """根据队列等待时间伸缩 worker 数量"""
+        active_workers = len(self.workers) - self._retiring_workers
+        if self.queue_stats.wait > self.scale_up_latency and active_workers < self.max_worker_nums:
+            self.workers.append(asyncio.create_task(self._process_response_worker()))
+            logger.info(
+                f"Queue wait {self.queue_stats.wait * 1000:.0f}ms, "
+                f"scale up to {active_workers + 1} workers"
+            )
+        elif (
+            self.queue_stats.wait < self.scale_up_latency / 4 and active_workers > self.worker_nums
+        ):
+            self._retiring_workers += 1
+            logger.info(f"Scale down to {active_workers - 1} workers")
+
+    async def _monitor_response_queue(self) -> None:
+        """定期采集队列指标并伸缩 worker"""
+        elapsed = 0
+        while self.is_running:
+            await asyncio.sleep(1)
+            self.queue_stats.depth = self.response_queue.qsize()
+            if self.response_queue.empty():
+                # 队列为空时没有新的等待时间样本，逐步衰减
+                self.queue_stats.observe_wait(0)
+            self._scale_workers()
+
+            elapsed += 1
+            if self.stats_interval > 0 and elapsed % self.stats_interval == 0:
+                logger.info(f"Response queue stats: {self.get_stats()}")
+                self.queue_stats.reset_max_wait()
+
+    def get_stats(self) -> dict:
+        return {
+            **self.stream_stats.as_dict(),
+            **self.queue_stats.as_dict(),
+            **self.slot_clock.as_dict(),
+            "workers": len(self.workers) - self._retiring_workers,
+        }
+
     async def _start_workers(self):
         """Start response processing workers."""
         logger.info(f"Starting {self.worker_nums} response workers")
         self.workers = [
             asyncio.create_task(self._process_response_worker()) for _ in range(self.worker_nums)
         ]
+        self._monitor_task = asyncio.create_task(self._monitor_response_queue())
+        self._spill_task = asyncio.create_task(self._spill_worker())
 
     async def _stop_workers(self):
         """Stop response processing workers."""
         logger.info("Stopping response workers")
+        if self._monitor_task is not None:
+            self._monitor_task.cancel()
+            self._monitor_task = None
+
         # 等待队列处理完成
         if not self.response_queue.empty():
             await self.response_queue.join()
@@ -221,6 +607,13 @@ class TransactionDetailSubscriber:
         if self.workers:
             await asyncio.gather(*self.workers, return_exceptions=True)
         self.workers.clear()
+        self._retiring_workers = 0
+
+        if self._spill_task is not None:
+            await self.spill_queue.join()
+            self._spill_task.cancel()
+            await asyncio.gather(self._spill_task, return_exceptions=True)
+            self._spill_task = None
 
     async def start(self) -> None:
         """Start monitoring wallet transactions."""
@@ -232,43 +625,14 @@ class TransactionDetailSubscriber:
             # 启动工作协程
             await self._start_workers()
 
-            # 初始化连接
-            await self._connect()
-
-            if self.geyser_client is None:
-                raise Exception("Geyser client is not connected")
-
-            # Create subscription request
-            subscribe_request = SubscribeRequest(ping=SubscribeRequestPing(id=1))
-            pb_request = Parse(subscribe_request.model_dump_json(), geyser_pb2.SubscribeRequest())
-
-            # Subscribe to updates
-            logger.info("Subscribing to account updates...")
-            (
-                self.request_queue,
-                self.responses,
-            ) = await self.geyser_client.subscribe_with_request(pb_request)
-
-            async def _f():
-                """Process responses from the queue."""
-                logger.info(f"Starting response worker {id(asyncio.current_task())}")
-
-                while self.is_running:
-                    try:
-                        async for response in self.responses:
-                            if not self.is_running:
-                                break
-                            await self.response_queue.put(response)
-                    except AioRpcError as e:
-                        logger.error(f"Rpc Error: {e._details}")
-                        await self._reconnect_and_subscribe()
-                    except Exception as e:
-                        logger.exception(e)
-                        await self._reconnect_and_subscribe()
-
-            monitor_task = asyncio.create_task(_f())
-            # 添加任务完成回调以处理可能的异常
-            monitor_task.add_done_callback(lambda t: t.exception() if t.exception() else None)
+            # 初始化连接，每个分片使用独立的订阅流
+            for shard in self.shards:
+                await self._subscribe_shard(shard)
+                shard.task = asyncio.create_task(self._receive_shard(shard))
+                # 添加任务完成回调以处理可能的异常
+                shard.task.add_done_callback(
+                    lambda t: t.exception() if not t.cancelled() and t.exception() else None
+                )
         except asyncio.CancelledError:
             logger.info("Monitor cancelled, shutting down...")
         except Exception as e:
@@ -283,16 +647,26 @@ class TransactionDetailSubscriber:
         logger.info("Stopping wallet monitor...")
         self.is_running = False
 
+        if self._flush_task is not None:
+            self._flush_task.cancel()
+            self._flush_task = None
+        for task in list(self._backfill_tasks):
+            task.cancel()
+
         # 等待所有工作协程完成
         await self._stop_workers()
 
         # 关闭 geyser client
-        if self.geyser_client:
-            try:
-                await self.geyser_client.close()
-                self.geyser_client = None
-            except Exception as e:
-                logger.error(f"Error closing geyser client: {e}")
+        for shard in self.shards:
+            if shard.task is not None:
+                shard.task.cancel()
+                shard.task = None
+            if shard.geyser_client:
+                try:
+                    await shard.geyser_client.close()
+                    shard.geyser_client = None
+                except Exception as e:
+                    logger.error(f"Error closing geyser client of shard {shard.index}: {e}")
 
         # 关闭 Redis 连接
         if self.redis:
@@ -304,57 +678,107 @@ class TransactionDetailSubscriber:
 
         logger.info("Wallet monitor stopped")
 
-    async def subscribe_wallet_transactions(self, wallet: Pubkey) -> None:
-        """订阅钱包的交易信息。
+    async def _flush_subscription(self) -> None:
+        """等待 debounce 时间窗口结束后，为订阅发生变化的分片发送新的订阅请求"""
+        await asyncio.sleep(self.debounce_interval)
+        # 先清空任务句柄，之后的订阅变更会触发新的一次发送
+        self._flush_task = None
+        dirty_shards, self._dirty_shards = self._dirty_shards, set()
+        for index in sorted(dirty_shards):
+            shard = self.shards[index]
+            if shard.request_queue is None:
+                # 分片尚未建立连接，连接时会订阅分片内的所有钱包
+                logger.warning(f"Shard {index} is not connected, skip subscription update")
+                continue
+            await shard.request_queue.put(
+                self._build_subscribe_request(shard.wallets, shard.index == 0)
+            )
+
+    def _schedule_flush(self) -> None:
+        if self._flush_task is None:
+            self._flush_task = asyncio.create_task(self._flush_subscription())
+
+    def _add_wallet(self, wallet: str) -> bool:
+        if wallet in self.subscribed_wallets:
+            return False
+        self.subscribed_wallets.add(wallet)
+        self.matcher.add(wallet)
+        index = self.hash_ring.get_shard(wallet)
+        self.shards[index].wallets.add(wallet)
+        self.shards[index].subscribed_slots[wallet] = self._current_slot()
+        if self._needs_resubscribe(index, 1):
+            self._dirty_shards.add(index)
+        return True
+
+    def _remove_wallet(self, wallet: str) -> bool:
+        if wallet not in self.subscribed_wallets:
+            return False
+        self.subscribed_wallets.remove(wallet)
+        self.matcher.remove(wallet)
+        index = self.hash_ring.get_shard(wallet)
+        self.shards[index].wallets.discard(wallet)
+        self.shards[index].subscribed_slots.pop(wallet, None)
+        if self._needs_resubscribe(index, 0):
+            self._dirty_shards.add(index)
+        return True
+
+    def _current_slot(self) -> int:
+        """所有订阅流中已经处理到的最新 slot"""
+        return max([self.slot_clock.latest_slot, *(shard.last_slot for shard in self.shards)])
+
+    def _needs_resubscribe(self, index: int, switch_size: int) -> bool:
+        """programs 策略下订阅请求与钱包无关，只有分片的钱包数量变为 switch_size，
+        即在有无钱包之间切换时才需要重新订阅"""
+        if self.strategy == SubscribeStrategy.WALLETS:
+            return True
+        return len(self.shards[index].wallets) == switch_size
+
+    async def subscribe_many(self, wallets: Iterable[Pubkey]) -> None:
+        """批量订阅钱包的交易信息。
 
         每次发送新的订阅请求都会完全替换之前的订阅状态。
         这是 Geyser API 的设计：它使用 gRPC 的双向流，每个新请求都会更新整个订阅列表。
+        因此这里只更新订阅集合，并在 debounce 时间窗口结束后，
+        为发生变化的分片统一发送一次订阅请求。
 
         Args:
-            wallet (Pubkey): 要订阅的钱包地址
+            wallets (Iterable[Pubkey]): 要订阅的钱包地址
         """
-        if self.request_queue is None:
-            raise Exception("Request queue is not initialized")
+        for wallet in wallets:
+            if not self._add_wallet(str(wallet)):
+                logger.warning(f"Wallet {wallet} already subscribed")
 
-        if str(wallet) in self.subscribed_wallets:
-            logger.warning(f"Wallet {wallet} already subscribed")
-            return
+        if self._dirty_shards:
+            self._schedule_flush()
 
-        # 添加到订阅集合
-        self.subscribed_wallets.add(str(wallet))
+    async def unsubscribe_many(self, wallets: Iterable[Pubkey]) -> None:
+        """批量取消订阅钱包的交易信息。
 
-        # 发送订阅请求，包含所有已订阅的钱包
-        # 这个请求会完全替换服务器端之前的订阅状态
-        subscribe_request = self.__build_subscribe_request()
-        json_str = subscribe_request.model_dump_json()
-        pb_request = Parse(json_str, geyser_pb2.SubscribeRequest())
-        await self.request_queue.put(pb_request)
+        Args:
+            wallets (Iterable[Pubkey]): 要取消订阅的钱包地址
+        """
+        for wallet in wallets:
+            if not self._remove_wallet(str(wallet)):
+                logger.warning(f"Wallet {wallet} not subscribed")
 
-    async def unsubscribe_wallet_transactions(self, wallet: Pubkey) -> None:
-        """取消订阅钱包的交易信息。
+        if self._dirty_shards:
+            self._schedule_flush()
 
-        每次发送新的订阅请求都会完全替换之前的订阅状态。
-        这是 Geyser API 的设计：它使用 gRPC 的双向流，每个新请求都会更新整个订阅列表。
+    async def subscribe_wallet_transactions(self, wallet: Pubkey) -> None:
+        """订阅钱包的交易信息。
 
         Args:
-            wallet (Pubkey): 要取消订阅的钱包地址
+            wallet (Pubkey): 要订阅的钱包地址
         """
-        if self.request_queue is None:
-            raise Exception("Request queue is not initialized")
-
-        if str(wallet) not in self.subscribed_wallets:
-            logger.warning(f"Wallet {wallet} not subscribed")
-            return
+        await self.subscribe_many([wallet])
 
-        # 从订阅集合中移除钱包
-        self.subscribed_wallets.remove(str(wallet))
+    async def unsubscribe_wallet_transactions(self, wallet: Pubkey) -> None:
+        """取消订阅钱包的交易信息。
 
-        # 发送新的订阅请求，只包含剩余的钱包
-        # 这个请求会完全替换服务器端之前的订阅状态
-        subscribe_request = self.__build_subscribe_request()
-        json_str = subscribe_request.model_dump_json()
-        pb_request = Parse(json_str, geyser_pb2.SubscribeRequest())
-        await self.request_queue.put(pb_request)
+        Args:
+            wallet (Pubkey): 要取消订阅的钱包地址
+        """
+        await self.unsubscribe_many([wallet])
 
 
 if __name__ == "__main__":
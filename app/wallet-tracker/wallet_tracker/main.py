@@ -1,7 +1,9 @@
 import asyncio
 from collections.abc import Sequence
+from concurrent.futures import ProcessPoolExecutor
 
 from solbot_common.config import settings
+from solbot_common.cp.tx_event import TxEventProducer
 from solbot_common.log import logger
 from solbot_common.prestart import pre_start
 from solbot_common.types import copytrade
@@ -10,6 +12,9 @@ from solbot_db.redis import RedisClient
 from solders.pubkey import Pubkey  # type: ignore
 
 from wallet_tracker.benchmark import BenchmarkService
+from wallet_tracker.enrichment import token_enricher
+from wallet_tracker.rate_policy import wallet_rate_policy
+from wallet_tracker.replay import recorder
 from wallet_tracker.tx_monitor import TxMonitor
 from wallet_tracker.tx_worker import TransactionWorker
 
@@ -19,8 +24,19 @@ class WalletTracker:
         self.redis = RedisClient.get_instance()
         self.client = get_async_client()
         self.wallets = init_wallets
-        self.transaction_monitor = TxMonitor(self.wallets, mode=settings.monitor.mode)
-        self.transaction_worker = TransactionWorker(self.redis)
+        # 订阅端 inline 解析和 TransactionWorker 共享同一个解析进程池
+        self.executor: ProcessPoolExecutor | None = None
+        if settings.monitor.tx_parse_processes > 0:
+            self.executor = ProcessPoolExecutor(max_workers=settings.monitor.tx_parse_processes)
+        self.transaction_monitor = TxMonitor(
+            self.wallets, mode=settings.monitor.mode, executor=self.executor
+        )
+        self.transaction_worker = TransactionWorker(
+            self.redis,
+            batch_size=settings.monitor.tx_worker_batch_size,
+            stats_interval=settings.monitor.tx_worker_stats_interval,
+            executor=self.executor,
+        )
         self.benchmark_service = BenchmarkService()
 
     # @provide_session
@@ -54,18 +70,27 @@ class WalletTracker:
 
     async def start(self):
         # await self.sync_wallet()
-        # 使用 asyncio.gather 并发执行监控任务
+        if settings.monitor.record_path:
+            recorder.open(settings.monitor.record_path)
+        await token_enricher.start()
 
+        # 使用 asyncio.gather 并发执行监控任务
         await asyncio.gather(
             self.benchmark_service.start(),
             self.transaction_monitor.start(),
-            self.transaction_worker.start(),
+            self.transaction_worker.start(settings.monitor.tx_workers),
         )
 
     async def stop(self):
         await self.transaction_monitor.stop()
         await self.transaction_worker.stop()
+        # 发送还在合并窗口内的 TxEvent，一次 pipeline 往返写入
+        await wallet_rate_policy.flush(TxEventProducer(self.redis).produce_many)
         await self.benchmark_service.stop()
+        await token_enricher.stop()
+        if self.executor is not None:
+            self.executor.shutdown(wait=False, cancel_futures=True)
+        recorder.close()
 
 
 if __name__ == "__main__":
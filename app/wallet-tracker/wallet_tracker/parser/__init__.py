@@ -1,3 +1,4 @@
+from .geyser_tx import GeyserTXParser
 from .raw_tx import RawTXParser
 
-__all__ = ["RawTXParser"]
+__all__ = ["GeyserTXParser", "RawTXParser"]
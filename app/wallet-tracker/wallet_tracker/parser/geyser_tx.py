@@ -0,0 +1,114 @@
+import time
+
+from solbot_common.constants import SWAP_PROGRAMS
+from solbot_common.types import SolAmountChange, TokenAmountChange, TxEvent, TxType
+from solders.signature import Signature  # type: ignore
+from yellowstone_grpc.grpc import geyser_pb2
+
+from wallet_tracker.exceptions import NotSwapTransaction
+
+from .raw_tx import build_tx_event, detect_tx_type
+from .tx_view import TxView
+
+
+class GeyserTXParser:
+    """直接解析 Geyser 推送的 SubscribeUpdateTransaction
+
+    与 RawTXParser 的解析规则一致，但跳过 protobuf -> JSON -> dict 的转换过程，
+    只对签名和签名者这几个真正用到的字段做 base58 编码。token 余额与 RawTXParser 一样通过 TxView 建立索引。
+    """
+
+    def __init__(
+        self,
+        update: geyser_pb2.SubscribeUpdateTransaction,
+        block_time: int | None = None,
+    ) -> None:
+        self.update = update
+        self.info = update.transaction
+        self.meta = self.info.meta
+        # 只有被确认之后才会有 blockTime, 所以默认使用当前时间
+        self.block_time = block_time if block_time is not None else int(time.time())
+        self._view: TxView | None = None
+
+    def __reduce__(self):
+        # 生成的 protobuf 模块注册为顶层的 geyser_pb2，消息无法直接 pickle，
+        # 发送到解析进程池时以序列化后的字节传递
+        return (_from_bytes, (self.update.SerializeToString(), self.block_time))
+
+    def get_block_time(self) -> int:
+        return self.block_time
+
+    def get_slot(self) -> int:
+        return self.update.slot
+
+    def get_tx_hash(self) -> str:
+        signature = self.info.signature
+        if not signature:
+            signatures = self.info.transaction.signatures
+            if len(signatures) > 1:
+                raise ValueError("multiple txs in one transaction")
+            signature = signatures[0]
+        return str(Signature.from_bytes(signature))
+
+    @property
+    def view(self) -> TxView:
+        if self._view is None:
+            self._view = TxView.from_geyser(self.update)
+        return self._view
+
+    def get_who(self) -> str:
+        return self.view.who
+
+    def get_mint(self) -> str:
+        mint = self.view.mint
+        if mint is None:
+            raise ValueError("mint not found")
+        return mint
+
+    def get_token_amount_change(self) -> TokenAmountChange:
+        pre_token_amount, post_token_amount, decimals = self.view.token_balance(
+            self.get_who(), self.get_mint()
+        )
+        return {
+            "change_amount": post_token_amount - pre_token_amount,
+            "decimals": decimals,
+            "pre_balance": pre_token_amount,
+            "post_balance": post_token_amount,
+        }
+
+    def get_sol_amount_change(self) -> SolAmountChange:
+        pre_sol_balance = self.view.pre_sol
+        post_sol_balance = self.view.post_sol
+        if pre_sol_balance is None or post_sol_balance is None:
+            raise ValueError("owner index out of range")
+        return {
+            "change_amount": post_sol_balance - pre_sol_balance,
+            "decimals": 9,
+            "pre_balance": pre_sol_balance,
+            "post_balance": post_sol_balance,
+        }
+
+    def get_tx_type(self) -> TxType:
+        return detect_tx_type(self.get_token_amount_change())
+
+    def get_swap_program_id(self) -> str | None:
+        for message in self.meta.log_messages:
+            for program_id in SWAP_PROGRAMS:
+                if program_id in message:
+                    return program_id
+        return None
+
+    def parse(self) -> TxEvent:
+        if self.view.pre_token_count == 0 or self.view.post_token_count == 0:
+            raise NotSwapTransaction()
+
+        try:
+            self.get_mint()
+        except ValueError:
+            raise NotSwapTransaction()
+
+        return build_tx_event(self)
+
+
+def _from_bytes(data: bytes, block_time: int) -> GeyserTXParser:
+    return GeyserTXParser(geyser_pb2.SubscribeUpdateTransaction.FromString(data), block_time)
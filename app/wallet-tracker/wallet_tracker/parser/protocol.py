@@ -1,31 +1,28 @@
-from functools import cache
 from typing import Protocol
 
 from solbot_common.types import SolAmountChange, TokenAmountChange, TxEvent, TxType
 
 
 class TransactionParserInterface(Protocol):
-    tx_detail: dict
+    # 子类（如 RawTXParser）使用 __slots__ 时，实例才不会带有 __dict__
+    __slots__ = ()
 
-    @cache
     def get_block_time(self) -> int: ...
 
-    @cache
+    def get_slot(self) -> int | None: ...
+
     def get_tx_hash(self) -> str: ...
 
-    @cache
     def get_who(self) -> str: ...
 
-    @cache
     def get_mint(self) -> str: ...
 
-    @cache
     def get_token_amount_change(self) -> TokenAmountChange: ...
 
-    @cache
     def get_sol_amount_change(self) -> SolAmountChange: ...
 
-    @cache
     def get_tx_type(self) -> TxType: ...
 
+    def get_swap_program_id(self) -> str | None: ...
+
     def parse(self) -> TxEvent: ...
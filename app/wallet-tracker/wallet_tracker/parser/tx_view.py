@@ -0,0 +1,142 @@
+from collections.abc import Iterable
+
+from solbot_common.constants import TOKEN_PROGRAM_ID, WSOL
+from solders.pubkey import Pubkey  # type: ignore
+from yellowstone_grpc.grpc import geyser_pb2
+
+_TOKEN_PROGRAM_ID = str(TOKEN_PROGRAM_ID)
+_WSOL = str(WSOL)
+# 没有 token 余额记录时使用的默认精度
+DEFAULT_TOKEN_DECIMALS = 6
+
+# (owner, mint, amount, decimals, program_id)
+TokenBalanceRow = tuple[str | None, str, int, int, str | None]
+
+
+class TxView:
+    """交易详情的精简索引视图
+
+    遍历一次 preTokenBalances / postTokenBalances 建立
+    owner -> {mint -> [pre_amount, post_amount, decimals]} 索引，
+    签名者和交易的 mint 也在这一次遍历中确定，之后的查询都是 O(1)。
+    RawTXParser 和 GeyserTXParser 分别通过 from_tx_detail / from_geyser 使用同一套索引。
+    只保存解析需要的字段，不持有原始交易详情的引用。
+    """
+
+    __slots__ = (
+        "balances",
+        "mint",
+        "post_sol",
+        "post_token_count",
+        "pre_sol",
+        "pre_token_count",
+        "who",
+    )
+
+    def __init__(
+        self,
+        who: str,
+        pre_token_balances: Iterable[TokenBalanceRow],
+        post_token_balances: Iterable[TokenBalanceRow],
+        pre_sol: int | None,
+        post_sol: int | None,
+    ) -> None:
+        self.who = who
+        # owner -> {mint -> [pre_amount, post_amount, decimals]}，未出现的余额为 None
+        self.balances: dict[str, dict[str, list]] = {}
+        self.pre_token_count = 0
+        self.post_token_count = 0
+        pre_mint = self._index(pre_token_balances, 0)
+        post_mint = self._index(post_token_balances, 1)
+        # 优先使用交易后签名者持有的 token
+        self.mint: str | None = post_mint or pre_mint
+        self.pre_sol = pre_sol
+        self.post_sol = post_sol
+
+    @classmethod
+    def from_tx_detail(cls, tx_detail: dict) -> "TxView":
+        """从 getTransaction 返回的交易详情建立索引"""
+        meta = tx_detail["meta"]
+        signer = tx_detail["transaction"]["message"]["accountKeys"][0]
+        pre_balances = meta.get("preBalances") or ()
+        post_balances = meta.get("postBalances") or ()
+        return cls(
+            signer if isinstance(signer, str) else signer["pubkey"],
+            _json_rows(meta.get("preTokenBalances") or ()),
+            _json_rows(meta.get("postTokenBalances") or ()),
+            int(pre_balances[0]) if pre_balances else None,
+            int(post_balances[0]) if post_balances else None,
+        )
+
+    @classmethod
+    def from_geyser(cls, update: geyser_pb2.SubscribeUpdateTransaction) -> "TxView":
+        """从 Geyser 推送的 SubscribeUpdateTransaction 建立索引，不经过 dict 转换"""
+        info = update.transaction
+        meta = info.meta
+        signer = info.transaction.message.account_keys[0]
+        return cls(
+            str(Pubkey.from_bytes(signer)),
+            _proto_rows(meta.pre_token_balances),
+            _proto_rows(meta.post_token_balances),
+            meta.pre_balances[0] if meta.pre_balances else None,
+            meta.post_balances[0] if meta.post_balances else None,
+        )
+
+    def _index(self, token_balances: Iterable[TokenBalanceRow], position: int) -> str | None:
+        """将余额记录加入索引，返回签名者持有的第一个非 WSOL 的 token"""
+        mint_of_who = None
+        count = 0
+        for owner, mint, amount, decimals, program_id in token_balances:
+            count += 1
+            entry = self.balances.setdefault(owner, {}).setdefault(
+                mint, [None, None, DEFAULT_TOKEN_DECIMALS]
+            )
+            # 同一个 owner 持有多个相同 mint 的账户时，只使用第一个
+            if entry[position] is None:
+                entry[position] = amount
+                entry[2] = decimals
+
+            if (
+                mint_of_who is None
+                and owner == self.who
+                and mint != _WSOL
+                and program_id == _TOKEN_PROGRAM_ID
+            ):
+                mint_of_who = mint
+        if position == 0:
+            self.pre_token_count = count
+        else:
+            self.post_token_count = count
+        return mint_of_who
+
+    def token_balance(self, owner: str, mint: str) -> tuple[int, int, int]:
+        """返回 owner 持有的 mint 在交易前后的数量和精度"""
+        entry = self.balances.get(owner, {}).get(mint)
+        if entry is None:
+            return 0, 0, DEFAULT_TOKEN_DECIMALS
+        pre, post, decimals = entry
+        return pre or 0, post or 0, decimals
+
+
+def _json_rows(token_balances) -> Iterable[TokenBalanceRow]:
+    for token_balance in token_balances:
+        ui_token_amount = token_balance["uiTokenAmount"]
+        yield (
+            token_balance.get("owner"),
+            token_balance["mint"],
+            int(ui_token_amount["amount"]),
+            ui_token_amount["decimals"],
+            token_balance.get("programId"),
+        )
+
+
+def _proto_rows(token_balances) -> Iterable[TokenBalanceRow]:
+    for token_balance in token_balances:
+        ui_token_amount = token_balance.ui_token_amount
+        yield (
+            token_balance.owner,
+            token_balance.mint,
+            int(ui_token_amount.amount),
+            ui_token_amount.decimals,
+            token_balance.program_id,
+        )
@@ -0,0 +1,318 @@
+"""
+按钱包控制 TxEvent 的发送频率
+
+少数被跟踪的钱包（机器人、做市商）每分钟产生上百笔 swap，每笔都会经过解析、
+TxEventProducer 和跟单处理，挤占其他钱包的处理能力。每个钱包可以配置以下策略：
+
+- pass: 直接发送
+- coalesce: 同一钱包同一 mint 在 coalesce_window 内的事件合并为一个净持仓变化
+- sample: 按 sample_rate 采样发送，开仓和清仓事件总是发送
+
+没有单独配置的钱包使用 default 策略；每分钟事件数超过 hyperactive_threshold 的钱包
+自动使用 hyperactive_policy。
+"""
+
+import asyncio
+import time
+from collections import Counter
+from collections.abc import Awaitable, Callable, Iterable
+from dataclasses import replace
+from enum import Enum
+
+from solbot_common.config import settings
+from solbot_common.log import logger
+from solbot_common.types.tx import TokenAmountChange, TxEvent, TxType
+
+from wallet_tracker.parser.raw_tx import detect_tx_type
+
+Produce = Callable[[TxEvent], Awaitable[None]]
+ProduceMany = Callable[[Iterable[TxEvent]], Awaitable[None]]
+
+# 统计事件速率的时间窗口（秒）
+RATE_WINDOW = 60
+
+
+class RatePolicy(str, Enum):
+    PASS = "pass"
+    COALESCE = "coalesce"
+    SAMPLE = "sample"
+
+
+class WalletRate:
+    """滑动窗口的近似事件速率，只保存当前和上一个窗口的计数"""
+
+    __slots__ = ("count", "previous", "window_start")
+
+    def __init__(self, now: float):
+        self.window_start = now
+        self.count = 0
+        self.previous = 0
+
+    def _advance(self, now: float) -> None:
+        elapsed = now - self.window_start
+        if elapsed >= RATE_WINDOW:
+            windows = int(elapsed // RATE_WINDOW)
+            self.previous = self.count if windows == 1 else 0
+            self.count = 0
+            self.window_start += windows * RATE_WINDOW
+
+    def current(self, now: float) -> float:
+        """最近 RATE_WINDOW 秒内的事件数，上一个窗口的计数按重叠比例折算"""
+        self._advance(now)
+        overlap = 1 - (now - self.window_start) / RATE_WINDOW
+        return self.previous * overlap + self.count
+
+    def add(self, now: float) -> float:
+        """记录一个事件，返回最近 RATE_WINDOW 秒内的事件数"""
+        self._advance(now)
+        self.count += 1
+        return self.current(now)
+
+
+def coalesce_events(events: list[TxEvent]) -> TxEvent | None:
+    """将同一钱包同一 mint 的多个事件合并为一个净持仓变化，净变化为 0 时返回 None
+
+    事件按 (slot, 区块时间) 排序，持仓以最早事件的交易前余额和最晚事件的交易后余额计算，
+    净买入时 SOL 数量为所有买入的实际支出，净卖出时为所有卖出的实际收入，不使用两者的差额，
+    否则卖出获利超过买入支出时会得到 0。交易类型与解析器使用相同的规则判断（包括清仓的余额阈值）。
+    合并后的事件使用最后一笔交易的签名、时间和 slot。
+    """
+    if all(event.slot is not None for event in events):
+        events = sorted(events, key=lambda event: (event.slot, event.timestamp))
+    else:
+        # 部分来源没有 slot，只按区块时间排序，同一秒内保持到达顺序
+        events = sorted(events, key=lambda event: event.timestamp)
+    first, last = events[0], events[-1]
+    pre, post = first.pre_token_amount, last.post_token_amount
+    net_token = post - pre
+    if net_token == 0:
+        return None
+    sol_spent = sol_received = 0
+    token_decimals = first.to_decimals if first.tx_direction == "buy" else first.from_decimals
+    for event in events:
+        if event.tx_direction == "buy":
+            sol_spent += event.from_amount
+        else:
+            sol_received += event.to_amount
+
+    tx_type = detect_tx_type(
+        TokenAmountChange(
+            change_amount=net_token,
+            decimals=token_decimals,
+            pre_balance=pre,
+            post_balance=post,
+        )
+    )
+
+    if net_token > 0:
+        amounts = {
+            "from_amount": sol_spent,
+            "from_decimals": 9,
+            "to_amount": net_token,
+            "to_decimals": token_decimals,
+            "tx_direction": "buy",
+        }
+    else:
+        amounts = {
+            "from_amount": -net_token,
+            "from_decimals": token_decimals,
+            "to_amount": sol_received,
+            "to_decimals": 9,
+            "tx_direction": "sell",
+        }
+    return replace(
+        last,
+        tx_type=tx_type,
+        pre_token_amount=pre,
+        post_token_amount=post,
+        **amounts,
+    )
+
+
+class WalletRatePolicy:
+    """按钱包统计事件速率，并按策略直接发送、合并或采样 TxEvent"""
+
+    def __init__(
+        self,
+        default: RatePolicy | str = RatePolicy.PASS,
+        wallets: dict[str, str] | None = None,
+        hyperactive_threshold: float = 0,
+        hyperactive_policy: RatePolicy | str = RatePolicy.COALESCE,
+        coalesce_window: float = 5,
+        sample_rate: float = 0.1,
+    ):
+        self.default = RatePolicy(default)
+        self.wallets = {wallet: RatePolicy(policy) for wallet, policy in (wallets or {}).items()}
+        self.hyperactive_threshold = hyperactive_threshold
+        self.hyperactive_policy = RatePolicy(hyperactive_policy)
+        self.coalesce_window = coalesce_window
+        # 每 sample_every 个事件发送一个
+        self.sample_every = max(1, round(1 / sample_rate)) if sample_rate > 0 else 0
+        self.rates: dict[str, WalletRate] = {}
+        # (钱包, mint) -> 等待合并的事件
+        self.pending: dict[tuple[str, str], list[TxEvent]] = {}
+        self._flush_tasks: dict[tuple[str, str], asyncio.Task] = {}
+        self._produce: dict[tuple[str, str], Produce] = {}
+        self._sample_counts: Counter[str] = Counter()
+        # 统计
+        self.received: Counter[str] = Counter()
+        self.passed: Counter[str] = Counter()
+        self.coalesced: Counter[str] = Counter()  # 被合并的事件数
+        self.coalesced_emitted: Counter[str] = Counter()  # 合并后发送的事件数
+        self.netted_out: Counter[str] = Counter()  # 合并后净变化为 0、没有发送的批次
+        self.sampled_out: Counter[str] = Counter()  # 采样丢弃的事件数
+
+    def set_policy(self, wallet: str, policy: RatePolicy | str | None) -> None:
+        """为钱包单独指定策略，policy 为 None 时恢复默认策略"""
+        if policy is None:
+            self.wallets.pop(wallet, None)
+        else:
+            self.wallets[wallet] = RatePolicy(policy)
+
+    def rate(self, wallet: str) -> float:
+        """钱包最近一分钟的事件数"""
+        wallet_rate = self.rates.get(wallet)
+        return 0.0 if wallet_rate is None else wallet_rate.current(time.monotonic())
+
+    def policy_for(self, wallet: str, rate: float) -> RatePolicy:
+        policy = self.wallets.get(wallet)
+        if policy is not None:
+            return policy
+        if self.hyperactive_threshold > 0 and rate > self.hyperactive_threshold:
+            return self.hyperactive_policy
+        return self.default
+
+    async def submit(self, tx_event: TxEvent, produce: Produce) -> None:
+        """按钱包的策略处理 TxEvent"""
+        who = tx_event.who
+        now = time.monotonic()
+        wallet_rate = self.rates.get(who)
+        if wallet_rate is None:
+            wallet_rate = self.rates[who] = WalletRate(now)
+        rate = wallet_rate.add(now)
+        self.received[who] += 1
+
+        policy = self.policy_for(who, rate)
+        if policy == RatePolicy.COALESCE and self.coalesce_window > 0:
+            self._add_pending(tx_event, produce)
+            return
+        if policy == RatePolicy.SAMPLE and not self._keep_sample(tx_event):
+            self.sampled_out[who] += 1
+            logger.debug(f"Sampled out tx event of hyperactive wallet {who}")
+            return
+        self.passed[who] += 1
+        await produce(tx_event)
+
+    def _keep_sample(self, tx_event: TxEvent) -> bool:
+        if tx_event.tx_type in (TxType.OPEN_POSITION, TxType.CLOSE_POSITION):
+            return True
+        if self.sample_every == 0:
+            return False
+        self._sample_counts[tx_event.who] += 1
+        return (self._sample_counts[tx_event.who] - 1) % self.sample_every == 0
+
+    def _add_pending(self, tx_event: TxEvent, produce: Produce) -> None:
+        key = (tx_event.who, tx_event.mint)
+        self.pending.setdefault(key, []).append(tx_event)
+        self._produce[key] = produce
+        if key not in self._flush_tasks:
+            self._flush_tasks[key] = asyncio.create_task(self._flush_later(key))
+
+    async def _flush_later(self, key: tuple[str, str]) -> None:
+        await asyncio.sleep(self.coalesce_window)
+        self._flush_tasks.pop(key, None)
+        await self._flush(key)
+
+    def _coalesce(self, key: tuple[str, str]) -> tuple[TxEvent | None, Produce | None]:
+        """取出并合并等待中的事件，返回合并后的事件及其发送函数"""
+        events = self.pending.pop(key, None)
+        produce = self._produce.pop(key, None)
+        if not events or produce is None:
+            return None, None
+        who = key[0]
+        self.coalesced[who] += len(events)
+        tx_event = coalesce_events(events)
+        if tx_event is None:
+            self.netted_out[who] += 1
+            logger.info(f"Coalesced {len(events)} tx events of {who} netted out")
+            return None, None
+        self.coalesced_emitted[who] += 1
+        if len(events) > 1:
+            logger.info(f"Coalesced {len(events)} tx events of {who} into {tx_event.signature}")
+        return tx_event, produce
+
+    async def _flush(self, key: tuple[str, str]) -> None:
+        tx_event, produce = self._coalesce(key)
+        if tx_event is None or produce is None:
+            return
+        try:
+            await produce(tx_event)
+        except Exception as e:
+            logger.error(f"Failed to produce coalesced tx event: {e}")
+
+    async def flush(self, produce_many: ProduceMany | None = None) -> None:
+        """立即发送所有等待合并的事件
+
+        Args:
+            produce_many: 批量发送函数（如 TxEventProducer.produce_many），
+                指定时所有合并后的事件在一次 pipeline 往返中发送
+        """
+        for task in self._flush_tasks.values():
+            task.cancel()
+        self._flush_tasks.clear()
+        if produce_many is None:
+            for key in list(self.pending):
+                await self._flush(key)
+            return
+
+        tx_events = []
+        for key in list(self.pending):
+            tx_event, _ = self._coalesce(key)
+            if tx_event is not None:
+                tx_events.append(tx_event)
+        if not tx_events:
+            return
+        try:
+            await produce_many(tx_events)
+        except Exception as e:
+            logger.error(f"Failed to produce coalesced tx events: {e}")
+
+    def get_stats(self, top: int = 10) -> dict:
+        """总计数以及事件速率最高的钱包"""
+        wallets = sorted(self.rates, key=self.rate, reverse=True)[:top]
+        return {
+            "received": sum(self.received.values()),
+            "passed": sum(self.passed.values()),
+            "coalesced": sum(self.coalesced.values()),
+            "coalesced_emitted": sum(self.coalesced_emitted.values()),
+            "netted_out": sum(self.netted_out.values()),
+            "sampled_out": sum(self.sampled_out.values()),
+            "pending": sum(len(events) for events in self.pending.values()),
+            "top_wallets": [
+                {
+                    "wallet": wallet,
+                    "rate_per_minute": round(self.rate(wallet), 1),
+                    "policy": self.policy_for(wallet, self.rate(wallet)).value,
+                    "received": self.received[wallet],
+                    "coalesced": self.coalesced[wallet],
+                    "sampled_out": self.sampled_out[wallet],
+                }
+                for wallet in wallets
+            ],
+        }
+
+
+def build_rate_policy() -> WalletRatePolicy:
+    config = settings.monitor.rate_policy
+    return WalletRatePolicy(
+        default=config.default,
+        wallets=config.wallets,
+        hyperactive_threshold=config.hyperactive_threshold,
+        hyperactive_policy=config.hyperactive_policy,
+        coalesce_window=config.coalesce_window,
+        sample_rate=config.sample_rate,
+    )
+
+
+# 所有订阅端的 TxEventPipeline 共享同一个策略，按钱包统计所有来源的事件
+wallet_rate_policy = build_rate_policy()
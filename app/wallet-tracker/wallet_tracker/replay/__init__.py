@@ -0,0 +1,10 @@
+from .memory_redis import InMemoryRedis
+from .recorder import IngestRecorder, RecordKind, read_records, recorder
+
+__all__ = [
+    "InMemoryRedis",
+    "IngestRecorder",
+    "RecordKind",
+    "read_records",
+    "recorder",
+]
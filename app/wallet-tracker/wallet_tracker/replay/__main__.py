@@ -0,0 +1,77 @@
+"""
+回放录制的订阅消息，统计吞吐量、各阶段延迟，并与之前的 TxEvent 输出对比
+
+录制：在配置中设置 monitor.record_path，wallet-tracker 运行期间会把收到的原始消息写入该文件
+
+    python -m wallet_tracker.replay burst.rec.gz --speed 1              # 按录制时的速度回放
+    python -m wallet_tracker.replay burst.rec.gz --speed 10             # 10 倍速
+    python -m wallet_tracker.replay burst.rec.gz --speed 0 -o new.jsonl # 尽可能快，输出 TxEvent
+    python -m wallet_tracker.replay burst.rec.gz --speed 0 --expected old.jsonl
+"""
+
+import argparse
+import asyncio
+
+import orjson as json
+from solbot_common.config import settings
+
+from wallet_tracker.replay.replayer import IngestReplayer
+
+
+def read_events(path: str) -> list[dict]:
+    with open(path, "rb") as f:
+        return [json.loads(line) for line in f if line.strip()]
+
+
+def write_events(path: str, events: list[dict]) -> None:
+    with open(path, "wb") as f:
+        for event in events:
+            f.write(json.dumps(event) + b"\n")
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(
+        description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter
+    )
+    parser.add_argument("path", help="recorded file")
+    parser.add_argument("--speed", type=float, default=1.0, help="replay speed, 0 for max speed")
+    parser.add_argument("--workers", type=int, default=2, help="workers of each subscriber")
+    parser.add_argument(
+        "--no-inline",
+        action="store_true",
+        help="parse in TransactionWorker instead of the subscribers",
+    )
+    parser.add_argument(
+        "--parse-processes",
+        type=int,
+        default=settings.monitor.tx_parse_processes,
+        help="process pool size of TransactionWorker",
+    )
+    parser.add_argument("-o", "--output", help="write TxEvents as JSON lines")
+    parser.add_argument("--expected", help="TxEvents of a previous replay to diff against")
+    args = parser.parse_args()
+
+    replayer = IngestReplayer(
+        args.path,
+        speed=args.speed,
+        worker_nums=args.workers,
+        inline_parse=not args.no_inline,
+        parse_processes=args.parse_processes,
+        log_prefilter=settings.monitor.log_prefilter,
+    )
+    expected = read_events(args.expected) if args.expected else None
+    report = asyncio.run(replayer.run(expected))
+    print(report.summary())
+    if report.diff is not None:
+        for signature in report.diff["missing"]:
+            print(f"  missing: {signature}")
+        for signature in report.diff["extra"]:
+            print(f"  extra:   {signature}")
+        for change in report.diff["changed"]:
+            print(f"  changed: {change['signature']} {change['fields']}")
+    if args.output:
+        write_events(args.output, report.events)
+
+
+if __name__ == "__main__":
+    main()
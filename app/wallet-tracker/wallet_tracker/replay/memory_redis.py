@@ -0,0 +1,121 @@
+import asyncio
+import itertools
+import time
+from collections import deque
+
+
+class _Pipeline:
+    """按顺序执行排队的命令，不保证原子性"""
+
+    def __init__(self, redis: "InMemoryRedis"):
+        self.redis = redis
+        self.commands: list = []
+
+    async def __aenter__(self):
+        return self
+
+    async def __aexit__(self, *args):
+        self.commands.clear()
+
+    def __getattr__(self, name):
+        method = getattr(self.redis, name)
+
+        def _queue(*args, **kwargs):
+            self.commands.append((method, args, kwargs))
+            return self
+
+        return _queue
+
+    async def execute(self) -> list:
+        commands, self.commands = self.commands, []
+        return [await method(*args, **kwargs) for method, args, kwargs in commands]
+
+
+def _decode(value) -> str:
+    return value.decode("utf-8") if isinstance(value, bytes) else str(value)
+
+
+class InMemoryRedis:
+    """回放时代替 Redis 的内存实现
+
+    只实现 wallet-tracker 用到的列表、String 和 Stream 命令，
+    数据为 str（与 decode_responses=True 的客户端一致），每个 Stream 记录写入的时间。
+    """
+
+    def __init__(self) -> None:
+        self.lists: dict[str, deque[str]] = {}
+        self.strings: dict[str, tuple[str, float | None]] = {}
+        # stream -> [(id, fields, 写入时间)]
+        self.streams: dict[str, list[tuple[str, dict, float]]] = {}
+        self._stream_ids = itertools.count(1)
+        self._pushed = asyncio.Condition()
+
+    def pipeline(self, transaction: bool = True) -> _Pipeline:
+        return _Pipeline(self)
+
+    async def ping(self) -> bool:
+        return True
+
+    async def lpush(self, name: str, *values) -> int:
+        items = self.lists.setdefault(name, deque())
+        for value in values:
+            items.appendleft(_decode(value))
+        async with self._pushed:
+            self._pushed.notify_all()
+        return len(items)
+
+    async def rpop(self, name: str, count: int | None = None):
+        items = self.lists.get(name)
+        if count is None:
+            return items.pop() if items else None
+        if not items:
+            return None
+        return [items.pop() for _ in range(min(count, len(items)))]
+
+    async def brpop(self, keys, timeout: float = 0):
+        keys = [keys] if isinstance(keys, str) else list(keys)
+        deadline = None if not timeout else time.monotonic() + timeout
+        async with self._pushed:
+            while True:
+                for key in keys:
+                    items = self.lists.get(key)
+                    if items:
+                        return key, items.pop()
+                remaining = None if deadline is None else deadline - time.monotonic()
+                if remaining is not None and remaining <= 0:
+                    return None
+                try:
+                    await asyncio.wait_for(self._pushed.wait(), remaining)
+                except asyncio.TimeoutError:
+                    return None
+
+    async def llen(self, name: str) -> int:
+        return len(self.lists.get(name, ()))
+
+    async def set(self, name: str, value, ex: int | None = None, nx: bool = False):
+        current = self.strings.get(name)
+        if current is not None and current[1] is not None and current[1] < time.monotonic():
+            current = None
+        if nx and current is not None:
+            return None
+        expire_at = time.monotonic() + ex if ex else None
+        self.strings[name] = (_decode(value), expire_at)
+        return True
+
+    async def get(self, name: str):
+        current = self.strings.get(name)
+        if current is None or (current[1] is not None and current[1] < time.monotonic()):
+            return None
+        return current[0]
+
+    async def xadd(self, name: str, fields: dict, maxlen: int | None = None, **kwargs) -> str:
+        message_id = f"{int(time.time() * 1000)}-{next(self._stream_ids)}"
+        fields = {key: _decode(value) for key, value in fields.items()}
+        self.streams.setdefault(name, []).append((message_id, fields, time.monotonic()))
+        return message_id
+
+    async def xlen(self, name: str) -> int:
+        return len(self.streams.get(name, ()))
+
+    async def close(self) -> None:
+        pass
@@ -0,0 +1,89 @@
+import atexit
+import gzip
+import struct
+import time
+from collections.abc import Iterator
+from enum import IntEnum
+from typing import BinaryIO
+
+from solbot_common.log import logger
+
+# 每条记录的头部：类型、收到消息的时间戳、消息长度
+_HEADER = struct.Struct("<BdI")
+
+
+class RecordKind(IntEnum):
+    """录制的消息类型"""
+
+    # Geyser SubscribeUpdate 的 protobuf 字节，包括 block_meta 和通过签名者检查的交易
+    GEYSER = 1
+    # wss 模式的 logsNotification 原始消息
+    LOGS = 2
+    # stream 模式的 transactionNotification 原始消息
+    STREAM = 3
+    # wss 模式通过 RPC 拉取的交易详情（JSON），回放时代替 getTransaction
+    TX_DETAIL = 4
+
+
+class IngestRecorder:
+    """将订阅端收到的原始消息写入 gzip 压缩的文件，用于离线回放
+
+    每条记录为 header + payload，payload 不做任何转换：Geyser 推送为 protobuf 字节，
+    websocket 推送为原始 JSON。未打开文件时 record 直接返回，不影响订阅端的热路径。
+    """
+
+    def __init__(self) -> None:
+        self.file: BinaryIO | None = None
+        self.path: str | None = None
+        self.records = 0
+
+    @property
+    def enabled(self) -> bool:
+        return self.file is not None
+
+    def open(self, path: str, compresslevel: int = 1) -> None:
+        self.close()
+        self.file = gzip.open(path, "ab", compresslevel=compresslevel)  # type: ignore # noqa: SIM115
+        self.path = path
+        self.records = 0
+        # 进程被中断时也要写入 gzip 的结尾，否则文件末尾的数据无法读取
+        atexit.register(self.close)
+        logger.info(f"Recording ingest stream to {path}")
+
+    def record(self, kind: RecordKind, payload: bytes | str) -> None:
+        if self.file is None:
+            return
+        if isinstance(payload, str):
+            payload = payload.encode("utf-8")
+        self.file.write(_HEADER.pack(kind, time.time(), len(payload)))
+        self.file.write(payload)
+        self.records += 1
+
+    def close(self) -> None:
+        if self.file is None:
+            return
+        self.file.close()
+        self.file = None
+        atexit.unregister(self.close)
+        logger.info(f"Recorded {self.records} messages to {self.path}")
+
+
+def read_records(path: str) -> Iterator[tuple[RecordKind, float, bytes]]:
+    """按顺序读取录制文件中的 (类型, 时间戳, 消息)，忽略末尾不完整的记录"""
+    with gzip.open(path, "rb") as f:
+        while True:
+            try:
+                header = f.read(_HEADER.size)
+                if len(header) < _HEADER.size:
+                    return
+                kind, timestamp, length = _HEADER.unpack(header)
+                payload = f.read(length)
+            except EOFError:
+                # 录制进程异常退出，gzip 文件没有结尾
+                return
+            if len(payload) < length:
+                return
+            yield RecordKind(kind), timestamp, payload
+
+
+recorder = IngestRecorder()
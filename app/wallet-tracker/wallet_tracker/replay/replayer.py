@@ -0,0 +1,339 @@
+import asyncio
+import time
+from dataclasses import dataclass
+
+import orjson as json
+from solders.signature import Signature  # type: ignore
+from yellowstone_grpc.grpc import geyser_pb2
+
+from wallet_tracker.benchmark import LatencyHistogram, benchmark_service
+from wallet_tracker.constants import (
+    NEW_TX_DETAIL_CHANNEL,
+    NEW_TX_EVENT_CHANNEL,
+    NEW_TX_SIGNATURE_CHANNEL,
+)
+from wallet_tracker.dedup import SignatureDeduplicator
+from wallet_tracker.geyser.backpressure import OverloadPolicy
+from wallet_tracker.geyser.tx_subscriber import (
+    TransactionDetailSubscriber as GeyserTransactionDetailSubscriber,
+)
+from wallet_tracker.tx_worker import TransactionWorker
+from wallet_tracker.wss.account_log_monitor import LogEvent, decode_message
+from wallet_tracker.wss.tx_stream import TransactionStreamSubscriber
+from wallet_tracker.wss.tx_subscriber import TransactionDetailSubscriber
+
+from .memory_redis import InMemoryRedis
+from .recorder import RecordKind, read_records
+
+# 回放中统计的阶段，detect/total 依赖录制时的区块时间，回放时没有意义
+REPORT_STAGES = ("fetch", "parse", "produce")
+# 对比 TxEvent 时忽略的字段，stream 推送没有区块时间，回放时使用当前时间
+IGNORED_FIELDS = ("timestamp",)
+
+
+class RecordedFetcher:
+    """使用录制的交易详情代替 getTransaction，按录制时的拉取耗时（除以回放倍速）等待"""
+
+    def __init__(self, speed: float):
+        self.speed = speed
+        # signature -> (交易详情, 拉取耗时)
+        self.details: dict[str, tuple[dict, float]] = {}
+
+    def add(self, tx_detail: dict, latency: float) -> None:
+        self.details[tx_detail["transaction"]["signatures"][0]] = (tx_detail, latency)
+
+    async def fetch(self, sig: Signature) -> dict | None:
+        item = self.details.get(str(sig))
+        if item is None:
+            return None
+        tx_detail, latency = item
+        if self.speed > 0 and latency > 0:
+            await asyncio.sleep(latency / self.speed)
+        return tx_detail
+
+
+@dataclass
+class ReplayReport:
+    records: dict[str, int]
+    recorded_duration: float
+    elapsed: float
+    events: list[dict]
+    # 从输入消息到产生 TxEvent 的延迟
+    end_to_end: dict
+    stages: dict
+    dedup: dict
+    diff: dict | None = None
+
+    @property
+    def throughput(self) -> float:
+        return len(self.events) / self.elapsed if self.elapsed > 0 else 0.0
+
+    def summary(self) -> str:
+        lines = [
+            f"records: {self.records}",
+            f"recorded duration: {self.recorded_duration:.2f}s, replay elapsed: {self.elapsed:.2f}s",
+            f"tx events: {len(self.events)}, throughput: {self.throughput:.1f} events/s",
+            f"end to end: {self.end_to_end}",
+            f"dedup: {self.dedup}",
+        ]
+        lines.extend(f"{stage}: {stats}" for stage, stats in self.stages.items())
+        if self.diff is not None:
+            lines.append(
+                f"diff: missing={len(self.diff['missing'])} extra={len(self.diff['extra'])} "
+                f"changed={len(self.diff['changed'])}"
+            )
+        return "\n".join(lines)
+
+
+def diff_events(expected: list[dict], actual: list[dict], ignored_fields=IGNORED_FIELDS) -> dict:
+    """按签名对比两次回放产生的 TxEvent"""
+
+    def _index(events: list[dict]) -> dict[str, dict]:
+        return {
+            event["signature"]: {k: v for k, v in event.items() if k not in ignored_fields}
+            for event in events
+        }
+
+    expected_index, actual_index = _index(expected), _index(actual)
+    changed = []
+    for signature in sorted(expected_index.keys() & actual_index.keys()):
+        before, after = expected_index[signature], actual_index[signature]
+        if before != after:
+            fields = sorted(
+                k for k in before.keys() | after.keys() if before.get(k) != after.get(k)
+            )
+            changed.append(
+                {
+                    "signature": signature,
+                    "fields": {k: [before.get(k), after.get(k)] for k in fields},
+                }
+            )
+    return {
+        "missing": sorted(expected_index.keys() - actual_index.keys()),
+        "extra": sorted(actual_index.keys() - expected_index.keys()),
+        "changed": changed,
+    }
+
+
+class IngestReplayer:
+    """将录制的消息重新输入订阅端，经过与线上相同的去重、解析和发送流程
+
+    - Geyser 推送进入 geyser TransactionDetailSubscriber 的响应队列
+    - logsNotification 经过 AccountLogMonitor 的预过滤，由 wss TransactionDetailSubscriber
+      的 worker 拉取（录制的）交易详情
+    - transactionNotification 进入 TransactionStreamSubscriber
+    - 非 inline 模式和解析失败 spill 的交易由 TransactionWorker 处理
+
+    Redis 使用 InMemoryRedis 代替，TxEvent 从内存中的 tx_event:new 读取。
+    speed 为回放倍速，按录制时的消息间隔等待，0 表示不等待、尽可能快地输入。
+    """
+
+    def __init__(
+        self,
+        path: str,
+        speed: float = 1.0,
+        worker_nums: int = 2,
+        inline_parse: bool = True,
+        parse_processes: int = 0,
+        log_prefilter: bool = False,
+        settle_time: float = 0.5,
+    ):
+        self.path = path
+        self.speed = speed
+        self.worker_nums = worker_nums
+        self.inline_parse = inline_parse
+        self.parse_processes = parse_processes
+        self.log_prefilter = log_prefilter
+        self.settle_time = settle_time
+        self.redis = InMemoryRedis()
+        self.dedup = SignatureDeduplicator()
+        self.fetcher = RecordedFetcher(speed)
+        # 签名 -> 输入时间，用于统计端到端延迟
+        self.fed_at: dict[str, float] = {}
+        self.geyser: GeyserTransactionDetailSubscriber | None = None
+        self.wss: TransactionDetailSubscriber | None = None
+        self.stream: TransactionStreamSubscriber | None = None
+        self.tx_worker = TransactionWorker(
+            self.redis,  # type: ignore
+            parse_processes=parse_processes,
+            stats_interval=0,
+        )
+        self._tasks: list[asyncio.Task] = []
+
+    def load(self) -> list[tuple[RecordKind, float, bytes]]:
+        """读取录制文件，交易详情放入 RecordedFetcher，返回需要输入的消息"""
+        records = []
+        # 签名 -> 收到日志的时间，用于计算录制时的拉取耗时
+        log_times: dict[str, float] = {}
+        for kind, timestamp, payload in read_records(self.path):
+            if kind == RecordKind.TX_DETAIL:
+                tx_detail = json.loads(payload)
+                signature = tx_detail["transaction"]["signatures"][0]
+                self.fetcher.add(tx_detail, timestamp - log_times.get(signature, timestamp))
+                continue
+            if kind == RecordKind.LOGS:
+                message = decode_message(payload)
+                if isinstance(message, LogEvent):
+                    log_times.setdefault(message.signature, timestamp)
+            records.append((kind, timestamp, payload))
+        return records
+
+    def _get_geyser(self) -> GeyserTransactionDetailSubscriber:
+        if self.geyser is None:
+            self.geyser = GeyserTransactionDetailSubscriber(
+                "",
+                "",
+                self.redis,  # type: ignore
+                [],
+                inline_parse=self.inline_parse,
+                dedup=self.dedup,
+                worker_nums=self.worker_nums,
+                max_worker_nums=self.worker_nums,
+                queue_size=10_000,
+                overload_policy=OverloadPolicy.BLOCK,
+                signer_only=False,
+            )
+            self.geyser.is_running = True
+            self.geyser.workers = [
+                asyncio.create_task(self.geyser._process_response_worker())
+                for _ in range(self.worker_nums)
+            ]
+        return self.geyser
+
+    def _get_wss(self) -> TransactionDetailSubscriber:
+        if self.wss is None:
+            self.wss = TransactionDetailSubscriber(
+                "",
+                self.redis,  # type: ignore
+                [],
+                inline_parse=self.inline_parse,
+                dedup=self.dedup,
+            )
+            self.wss.fetcher = self.fetcher  # type: ignore
+            self.wss.account_log_monitor.prefilter = self.log_prefilter
+            self.wss.account_log_monitor.report_every = 0
+            self.wss.workers = [
+                asyncio.create_task(self.wss.worker()) for _ in range(self.worker_nums)
+            ]
+        return self.wss
+
+    def _get_stream(self) -> TransactionStreamSubscriber:
+        if self.stream is None:
+            self.stream = TransactionStreamSubscriber(
+                "",
+                self.redis,  # type: ignore
+                [],
+                inline_parse=self.inline_parse,
+                dedup=self.dedup,
+                worker_nums=self.worker_nums,
+                queue_size=10_000,
+            )
+            self.stream.workers = [
+                asyncio.create_task(self.stream.worker()) for _ in range(self.worker_nums)
+            ]
+        return self.stream
+
+    async def feed(self, kind: RecordKind, payload: bytes) -> None:
+        now = time.monotonic()
+        if kind == RecordKind.GEYSER:
+            response = geyser_pb2.SubscribeUpdate.FromString(payload)
+            if response.HasField("transaction"):
+                signature = str(Signature.from_bytes(response.transaction.transaction.signature))
+                self.fed_at.setdefault(signature, now)
+            await self._get_geyser()._ingest(response)
+        elif kind == RecordKind.LOGS:
+            message = decode_message(payload)
+            if isinstance(message, LogEvent):
+                self.fed_at.setdefault(message.signature, now)
+                await self._get_wss().account_log_monitor.process_log(message)
+        elif kind == RecordKind.STREAM:
+            result = json.loads(payload)["params"]["result"]
+            self.fed_at.setdefault(result["signature"], now)
+            await self._get_stream()._handle_message(payload)
+
+    def _pending(self) -> int:
+        pending = sum(
+            len(self.redis.lists.get(channel, ()))
+            for channel in (NEW_TX_SIGNATURE_CHANNEL, NEW_TX_DETAIL_CHANNEL)
+        )
+        if self.geyser is not None:
+            pending += self.geyser.response_queue.qsize()
+        if self.stream is not None:
+            pending += self.stream.tx_queue.qsize()
+        return pending
+
+    async def _wait_idle(self) -> None:
+        """等待所有队列为空，且 settle_time 内没有产生新的 TxEvent"""
+        last_count = -1
+        while True:
+            count = len(self.redis.streams.get(NEW_TX_EVENT_CHANNEL, ()))
+            if self._pending() == 0 and count == last_count:
+                return
+            last_count = count
+            await asyncio.sleep(self.settle_time)
+
+    async def _stop(self) -> None:
+        if self.geyser is not None:
+            self.geyser.is_running = False
+            self._tasks.extend(self.geyser.workers)
+        if self.wss is not None:
+            self._tasks.extend(self.wss.workers)
+        if self.stream is not None:
+            self._tasks.extend(self.stream.workers)
+        await self.tx_worker.stop()
+        for task in self._tasks:
+            task.cancel()
+        await asyncio.gather(*self._tasks, return_exceptions=True)
+
+    async def run(self, expected: list[dict] | None = None) -> ReplayReport:
+        records = self.load()
+        counts: dict[str, int] = {}
+        for kind, _, _ in records:
+            counts[kind.name.lower()] = counts.get(kind.name.lower(), 0) + 1
+        counts["tx_detail"] = len(self.fetcher.details)
+        recorded_duration = records[-1][1] - records[0][1] if records else 0.0
+
+        # 在开始计时之前创建订阅端
+        kinds = {kind for kind, _, _ in records}
+        if RecordKind.GEYSER in kinds:
+            self._get_geyser()
+        if RecordKind.LOGS in kinds:
+            self._get_wss()
+        if RecordKind.STREAM in kinds:
+            self._get_stream()
+        benchmark_service.snapshot()
+        self._tasks.append(asyncio.create_task(self.tx_worker.start(self.worker_nums)))
+        start = time.monotonic()
+        first_timestamp = records[0][1] if records else 0.0
+        for kind, timestamp, payload in records:
+            if self.speed > 0:
+                delay = (timestamp - first_timestamp) / self.speed - (time.monotonic() - start)
+                if delay > 0:
+                    await asyncio.sleep(delay)
+            await self.feed(kind, payload)
+        await self._wait_idle()
+
+        stream = self.redis.streams.get(NEW_TX_EVENT_CHANNEL, [])
+        end = stream[-1][2] if stream else time.monotonic()
+        end_to_end = LatencyHistogram()
+        events = []
+        for _, fields, produced_at in stream:
+            event = json.loads(fields["data"])
+            events.append(event)
+            fed_at = self.fed_at.get(event["signature"])
+            if fed_at is not None:
+                end_to_end.record(produced_at - fed_at)
+        stages = benchmark_service.snapshot()["stages"]
+        await self._stop()
+
+        events.sort(key=lambda event: event["signature"])
+        return ReplayReport(
+            records=counts,
+            recorded_duration=recorded_duration,
+            elapsed=max(end - start, 0.0),
+            events=events,
+            end_to_end=end_to_end.snapshot(),
+            stages={stage: stages[stage] for stage in REPORT_STAGES},
+            dedup=self.dedup.stats(),
+            diff=None if expected is None else diff_events(expected, events),
+        )
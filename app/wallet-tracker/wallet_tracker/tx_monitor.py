@@ -1,7 +1,9 @@
 from collections.abc import Sequence
+from concurrent.futures import Executor
 from typing import Literal
 
 from solbot_common.config import settings
+from solbot_common.constants import SWAP_PROGRAMS
 from solbot_common.cp.monitor_events import MonitorEvent, MonitorEventConsumer, MonitorEventType
 from solbot_common.log import logger
 from solbot_common.models.tg_bot.monitor import Monitor
@@ -9,7 +11,10 @@ from solbot_db.redis import RedisClient
 from solbot_services.copytrade import CopyTradeService
 from solders.pubkey import Pubkey  # type: ignore
 
+from .cluster import PartitionCoordinator
+from .dedup import SignatureDeduplicator
 from .geyser.tx_subscriber import TransactionDetailSubscriber as GeyserMonitor
+from .wss.tx_stream import TransactionStreamSubscriber as StreamMonitor
 from .wss.tx_subscriber import TransactionDetailSubscriber as RPCMonitor
 
 
@@ -17,16 +22,51 @@ class TxMonitor:
     def __init__(
         self,
         wallets: Sequence[Pubkey],
-        mode: Literal["wss", "geyser"] = "wss",
+        mode: Literal["wss", "geyser", "stream"] = "wss",
+        executor: Executor | None = None,
     ):
+        """
+        Args:
+            wallets: 被跟踪的钱包
+            mode: 订阅方式
+            executor: inline 解析交易使用的进程池，为空时在事件循环中解析
+        """
         self.mode = mode
         redis = RedisClient.get_instance()
+        # 所有被跟踪的钱包，集群模式下只订阅当前节点持有的分区内的钱包
+        self.wallets: set[str] = {str(wallet) for wallet in wallets}
+        self.coordinator: PartitionCoordinator | None = None
+        if settings.monitor.cluster.enable:
+            cluster = settings.monitor.cluster
+            self.coordinator = PartitionCoordinator(
+                redis,
+                node_id=cluster.node_id or None,
+                partitions=cluster.partitions,
+                lease_ttl=cluster.lease_ttl,
+                renew_interval=cluster.renew_interval,
+                on_assign=self._handle_assign,
+                on_revoke=self._handle_revoke,
+            )
+            # 分区认领之后再订阅
+            wallets = []
         self.events = MonitorEventConsumer(redis)
+        # 所有订阅来源共享同一个签名去重，只有多节点部署时才需要通过 Redis 共享
+        dedup_shared = settings.monitor.dedup_shared
+        if dedup_shared is None:
+            dedup_shared = settings.monitor.cluster.enable
+        self.dedup = SignatureDeduplicator(
+            maxsize=settings.monitor.dedup_maxsize,
+            ttl=settings.monitor.dedup_ttl,
+            redis=redis if dedup_shared else None,
+        )
         if mode == "wss":
             self.monitor = RPCMonitor(
                 settings.rpc.rpc_url,
                 redis,
                 wallets,
+                inline_parse=settings.monitor.inline_parse,
+                dedup=self.dedup,
+                executor=executor,
             )
         elif mode == "geyser":
             self.monitor = GeyserMonitor(
@@ -34,6 +74,32 @@ class TxMonitor:
                 settings.rpc.geyser.api_key,
                 redis,
                 wallets,
+                inline_parse=settings.monitor.inline_parse,
+                shard_nums=settings.rpc.geyser.shards,
+                dedup=self.dedup,
+                worker_nums=settings.rpc.geyser.workers,
+                max_worker_nums=settings.rpc.geyser.max_workers,
+                queue_size=settings.rpc.geyser.queue_size,
+                overload_policy=settings.rpc.geyser.overload_policy,
+                scale_up_latency=settings.rpc.geyser.scale_up_latency_ms / 1000,
+                swap_programs=SWAP_PROGRAMS if settings.rpc.geyser.filter_swap_programs else (),
+                account_required=settings.rpc.geyser.account_required,
+                signer_only=settings.rpc.geyser.signer_only,
+                strategy=settings.rpc.geyser.strategy,
+                executor=executor,
+            )
+        elif mode == "stream":
+            # 直接订阅完整的交易数据，不再通过 getTransaction 拉取交易详情
+            self.monitor = StreamMonitor(
+                settings.monitor.stream_endpoint
+                or settings.rpc.rpc_url.replace("https://", "wss://"),
+                redis,
+                wallets,
+                inline_parse=settings.monitor.inline_parse,
+                dedup=self.dedup,
+                commitment=settings.rpc.commitment,
+                worker_nums=settings.monitor.stream_workers,
+                executor=executor,
             )
         else:
             raise ValueError("Invalid mode")
@@ -57,9 +123,16 @@ class TxMonitor:
         copytrade_addresses = await CopyTradeService.get_active_wallet_addresses()
         # 合并两个列表
         active_wallet_addresses = list(set(list(monitor_addresses) + list(copytrade_addresses)))
-        for address in active_wallet_addresses:
-            await self.monitor.subscribe_wallet_transactions(Pubkey.from_string(address))
-            logger.debug(f"Subscribed to wallet: {address}")
+        self.wallets.update(active_wallet_addresses)
+        if self.coordinator is None:
+            await self.monitor.subscribe_many(
+                Pubkey.from_string(address) for address in active_wallet_addresses
+            )
+            logger.debug(f"Subscribed to {len(active_wallet_addresses)} wallets")
+        else:
+            # 认领分区，通过 _handle_assign 订阅分区内的钱包
+            await self.coordinator.start()
+            logger.info(f"Cluster node started: {self.coordinator.get_stats()}")
 
         # 开始处理事件
         logger.info("Start processing monitor events")
@@ -75,12 +148,35 @@ class TxMonitor:
     async def stop(self):
         """停止监听器"""
         await self.events.unsubscribe()
+        if self.coordinator is not None:
+            await self.coordinator.stop()
         await self.monitor.stop()
 
+    def _should_subscribe(self, wallet: str) -> bool:
+        return self.coordinator is None or self.coordinator.owns(wallet)
+
+    async def _handle_assign(self, partitions: set[int]):
+        """当前节点开始持有分区，订阅分区内的钱包"""
+        assert self.coordinator is not None
+        wallets = self.coordinator.filter_wallets(self.wallets, partitions)
+        await self.monitor.subscribe_many(Pubkey.from_string(wallet) for wallet in wallets)
+        logger.info(f"Subscribed to {len(wallets)} wallets of {len(partitions)} partitions")
+
+    async def _handle_revoke(self, partitions: set[int]):
+        """分区被其他节点接管，取消订阅分区内的钱包"""
+        assert self.coordinator is not None
+        wallets = self.coordinator.filter_wallets(self.wallets, partitions)
+        await self.monitor.unsubscribe_many(Pubkey.from_string(wallet) for wallet in wallets)
+        logger.info(f"Unsubscribed from {len(wallets)} wallets of {len(partitions)} partitions")
+
     async def _handle_resume_event(self, event: MonitorEvent):
         """处理恢复监听事件"""
         try:
             wallet = Pubkey.from_string(event.target_wallet)
+            self.wallets.add(event.target_wallet)
+            if not self._should_subscribe(event.target_wallet):
+                logger.debug(f"Wallet {wallet} belongs to another node")
+                return
             await self.monitor.subscribe_wallet_transactions(wallet)
             logger.info(f"Resumed monitoring wallet: {wallet}")
         except Exception as e:
@@ -91,6 +187,9 @@ class TxMonitor:
         """处理暂停监听事件"""
         try:
             wallet = Pubkey.from_string(event.target_wallet)
+            self.wallets.discard(event.target_wallet)
+            if not self._should_subscribe(event.target_wallet):
+                return
             await self.monitor.unsubscribe_wallet_transactions(wallet)
             logger.info(f"Paused monitoring wallet: {wallet}")
         except Exception as e:
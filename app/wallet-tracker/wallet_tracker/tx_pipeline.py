@@ -0,0 +1,117 @@
+import asyncio
+from collections.abc import Callable
+from concurrent.futures import Executor
+
+import aioredis
+from solbot_common.cp.tx_event import TxEventProducer
+from solbot_common.log import logger
+from solbot_common.types import TxEvent
+
+from wallet_tracker import benchmark
+from wallet_tracker.constants import FAILED_TX_DETAIL_CHANNEL
+from wallet_tracker.enrichment import TokenEnricher, token_enricher
+from wallet_tracker.exceptions import (
+    NotSwapTransaction,
+    TransactionError,
+    UnknownTransactionType,
+    ZeroChangeAmountError,
+)
+from wallet_tracker.parser.protocol import TransactionParserInterface
+from wallet_tracker.rate_policy import WalletRatePolicy, wallet_rate_policy
+
+
+class TxEventPipeline:
+    """交易解析流水线
+
+    解析交易详情并将最终的 TxEvent 发送到 tx_event:new。
+    只有解析失败时才会把交易详情序列化后写入 Redis 列表（spill），
+    正常情况下不会产生额外的 Redis 往返和 JSON 编解码。
+
+    指定 executor（如 ProcessPoolExecutor）时，CPU 密集的 parse 会在 executor 中执行，
+    避免阻塞事件循环。
+
+    解析得到的 TxEvent 从进程内的缓存附带代币信息（enricher），
+    再按钱包的发送策略（rate_policy）直接发送、合并或采样，两者默认使用所有流水线共享的实例。
+    """
+
+    def __init__(
+        self,
+        redis: aioredis.Redis,
+        executor: Executor | None = None,
+        rate_policy: WalletRatePolicy | None = None,
+        enricher: TokenEnricher | None = None,
+    ):
+        self.redis = redis
+        self.executor = executor
+        self.tx_event_producer = TxEventProducer(redis)
+        self.rate_policy = rate_policy if rate_policy is not None else wallet_rate_policy
+        self.enricher = enricher if enricher is not None else token_enricher
+
+    async def spill(self, channel: str, tx_detail_text: str) -> None:
+        """将交易详情写入指定的 Redis 列表"""
+        assert self.redis is not None
+        await self.redis.lpush(channel, tx_detail_text)
+
+    async def process(
+        self,
+        tx_parser: TransactionParserInterface,
+        dump_tx_detail: Callable[[], str],
+        spill_channel: str = FAILED_TX_DETAIL_CHANNEL,
+    ) -> bool:
+        """解析单个交易并产生 TxEvent
+
+        Args:
+            tx_parser: 交易解析器
+            dump_tx_detail: 序列化交易详情的函数，仅在需要 spill 时调用
+            spill_channel: 解析失败时写入的 Redis 列表
+
+        Returns:
+            bool: 交易是否处理完成（产生了 TxEvent 或被判定为无需处理）
+        """
+        tx_hash = tx_parser.get_tx_hash()
+        try:
+            block_time = tx_parser.get_block_time()
+            await benchmark.record_block_time(tx_hash, block_time)
+
+            async with benchmark.with_parse_tx(tx_hash):
+                tx_event = await self._parse(tx_parser)
+
+            # FIXME: 解析失败，该如何处理, 后续需要对失败队列加入监控并发出警报
+            if tx_event is None:
+                logger.error(f"Parse tx failed, details: {tx_hash}")
+                await self._spill_failed(spill_channel, dump_tx_detail)
+                return False
+            self.enricher.enrich(tx_event)
+            async with benchmark.with_produce_tx(tx_hash):
+                await self.rate_policy.submit(tx_event, self.tx_event_producer.produce)
+            logger.success(f"New tx event: {tx_hash}")
+        except TransactionError as e:
+            logger.info(f"Transaction status is not valid, status: {e}")
+        except NotSwapTransaction:
+            logger.info(f"Tx is not swap transaction, details: {tx_hash}")
+        except UnknownTransactionType:
+            logger.info(f"Tx type is not valid, details: {tx_hash}")
+        except ZeroChangeAmountError:
+            logger.info(f"Tx amount is zero, details: {tx_hash}")
+        except Exception as e:
+            logger.error(f"Failed to process transaction: {e}, details: {tx_hash}")
+            logger.exception(e)
+            await self._spill_failed(spill_channel, dump_tx_detail)
+            return False
+        finally:
+            await benchmark.finish(tx_hash)
+        return True
+
+    async def _parse(self, tx_parser: TransactionParserInterface) -> TxEvent | None:
+        if self.executor is None:
+            return tx_parser.parse()
+        loop = asyncio.get_running_loop()
+        return await loop.run_in_executor(self.executor, tx_parser.parse)
+
+    async def _spill_failed(self, channel: str, dump_tx_detail: Callable[[], str]) -> None:
+        try:
+            tx_detail_text = dump_tx_detail()
+            await self.spill(channel, tx_detail_text)
+            logger.info(f"Spilled transaction to {channel}")
+        except Exception as e:
+            logger.error(f"Failed to spill transaction to {channel}: {e}")
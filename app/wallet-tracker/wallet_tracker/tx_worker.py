@@ -1,97 +1,101 @@
 import asyncio
+import time
+from concurrent.futures import Executor, ProcessPoolExecutor
 
 import aioredis
 import orjson as json
 from aioredis.exceptions import RedisError
-from solbot_common.cp.tx_event import TxEventProducer
 from solbot_common.log import logger
 
-from wallet_tracker import benchmark
 from wallet_tracker.constants import FAILED_TX_DETAIL_CHANNEL, NEW_TX_DETAIL_CHANNEL
-from wallet_tracker.exceptions import (
-    NotSwapTransaction,
-    TransactionError,
-    UnknownTransactionType,
-    ZeroChangeAmountError,
-)
 from wallet_tracker.parser import RawTXParser
+from wallet_tracker.tx_pipeline import TxEventPipeline
 
 
 class TransactionWorker:
     """
     交易处理工作类
 
-    从 Redis 中获取交易签名，并根据签名查询交易详情，需要识别出交易类型
+    从 Redis 中获取交易详情，需要识别出交易类型
     - 建仓
     - 加仓
     - 减仓
     - 清仓
+
+    在 inline 模式下，订阅端会直接解析交易，这里只处理解析失败后 spill 过来的交易
+
+    每个 worker 先通过 BRPOP 阻塞等待第一条交易，再用 pipeline 批量 RPOP 剩余的交易，
+    BRPOP/RPOP 本身是原子操作，多个 worker 之间不需要加锁。
+    传入 executor（与订阅端共享的进程池）或配置 parse_processes 后，交易解析会分发到进程池中执行。
     """
 
-    def __init__(self, redis: aioredis.Redis):
+    def __init__(
+        self,
+        redis: aioredis.Redis,
+        batch_size: int = 32,
+        parse_processes: int = 0,
+        stats_interval: int = 10,
+        executor: Executor | None = None,
+    ):
         self.redis: aioredis.Redis = redis
         self.is_running = False
-        self.lock = asyncio.Lock()
-        self.tx_event_producer = TxEventProducer(redis)
+        self.batch_size = max(1, batch_size)
+        self.parse_processes = parse_processes
+        self.stats_interval = stats_interval
+        # 外部传入的 executor 由调用方负责关闭
+        self.executor: Executor | None = executor
+        self._owns_executor = False
+        self.pipeline = TxEventPipeline(redis, executor=executor)
+        self.workers: list[asyncio.Task] = []
 
-    async def push_parse_failed_to_redis(self, tx_event: str):
-        """解析失败的交易详情放入失败队列"""
-        assert self.redis is not None
-        await self.redis.lpush(FAILED_TX_DETAIL_CHANNEL, tx_event)
+        # 统计信息
+        self.processed_count = 0
+        self.queue_depth = 0
+        self.throughput = 0.0
 
     async def process_transaction(self, tx_detail: dict):
         """处理单个交易"""
         tx_parser = RawTXParser(tx_detail)
-        tx_hash = tx_parser.get_tx_hash()
+        await self.pipeline.process(
+            tx_parser,
+            # 使用 orjson 的 dumps，它返回 bytes，需要解码为 str
+            lambda: json.dumps(tx_detail).decode("utf-8"),
+            spill_channel=FAILED_TX_DETAIL_CHANNEL,
+        )
+        self.processed_count += 1
 
-        # 使用 orjson 的 dumps，它返回 bytes，需要解码为 str
-        tx_detail_text = json.dumps(tx_detail).decode("utf-8")
-        try:
-            block_time = tx_parser.get_block_time()
-            await benchmark.record_block_time(tx_hash, block_time)
-
-            async with benchmark.with_parse_tx(tx_hash):
-                tx_event = tx_parser.parse()
-
-            # FIXME: 解析失败，该如何处理, 后续需要对失败队列加入监控并发出警报
-            if tx_event is None:
-                logger.error(f"Parse tx failed, details: {tx_detail_text}")
-                # 加入到失败队列
-                await self.push_parse_failed_to_redis(tx_detail_text)
-                return
-            await self.tx_event_producer.produce(tx_event)
-            logger.success(f"New tx event: {tx_hash}")
-        except TransactionError as e:
-            logger.info(f"Transaction status is not valid, status: {e}")
-        except NotSwapTransaction:
-            logger.info(f"Tx is not swap transaction, details: {tx_hash}")
-            return
-        except UnknownTransactionType:
-            logger.info(f"Tx type is not valid, details: {tx_hash}")
-            return
-        except ZeroChangeAmountError:
-            logger.info(f"Tx amount is zero, details: {tx_hash}")
-            return
-        except Exception as e:
-            logger.error(f"Failed to process transaction: {e}, details: {tx_detail_text}")
-            logger.exception(e)
-            # 加入到失败队列
-            await self.push_parse_failed_to_redis(tx_detail_text)
-        # finally:
-        #     await benchmark.show_timeline(tx_hash)
+    async def pop_batch(self) -> list[str]:
+        """从 tx_detail:new 中批量获取交易详情
+
+        Returns:
+            list[str]: 交易详情列表，超时返回空列表
+        """
+        assert self.redis is not None
+        result = await self.redis.brpop(NEW_TX_DETAIL_CHANNEL, timeout=1)
+        if result is None:  # timeout occurred
+            return []
+        _, tx_detail = result
+        batch = [tx_detail]
+        if self.batch_size == 1:
+            return batch
+
+        async with self.redis.pipeline(transaction=False) as pipe:
+            for _ in range(self.batch_size - 1):
+                pipe.rpop(NEW_TX_DETAIL_CHANNEL)
+            results = await pipe.execute()
+        batch.extend(item for item in results if item is not None)
+        return batch
 
     async def worker(self):
         """单个 worker 协程"""
         while self.is_running:
             try:
-                assert self.redis is not None
-                async with self.lock:
-                    result = await self.redis.brpop(NEW_TX_DETAIL_CHANNEL, timeout=1)
-                    if result is None:  # timeout occurred
-                        continue
-                _, tx_detail = result
-                json_data = json.loads(tx_detail)
-                await self.process_transaction(json_data)
+                batch = await self.pop_batch()
+                if not batch:
+                    continue
+                await asyncio.gather(
+                    *(self.process_transaction(json.loads(tx_detail)) for tx_detail in batch)
+                )
             except RedisError as e:
                 logger.error(f"Failed to push transaction to Redis: {e}")
                 continue
@@ -103,10 +107,45 @@ class TransactionWorker:
                 logger.exception(e)
                 continue
 
+    async def report_stats(self):
+        """定期统计吞吐量和队列长度"""
+        last_count = self.processed_count
+        last_time = time.monotonic()
+        while self.is_running:
+            await asyncio.sleep(self.stats_interval)
+            try:
+                self.queue_depth = await self.redis.llen(NEW_TX_DETAIL_CHANNEL)
+            except RedisError as e:
+                logger.error(f"Failed to get queue depth: {e}")
+                continue
+            now = time.monotonic()
+            self.throughput = (self.processed_count - last_count) / (now - last_time)
+            last_count, last_time = self.processed_count, now
+            logger.info(
+                f"TransactionWorker stats: throughput={self.throughput:.2f} tx/s, "
+                f"queue_depth={self.queue_depth}, processed={self.processed_count}"
+            )
+            rate_stats = self.pipeline.rate_policy.get_stats(top=3)
+            if rate_stats["coalesced"] or rate_stats["sampled_out"]:
+                logger.info(f"Rate policy stats: {rate_stats}")
+
+    def get_stats(self) -> dict:
+        return {
+            "processed": self.processed_count,
+            "throughput": self.throughput,
+            "queue_depth": self.queue_depth,
+        }
+
     async def start(self, num_workers: int = 2):
         """启动多个 worker 协程并行处理消息"""
         self.is_running = True
+        if self.executor is None and self.parse_processes > 0:
+            self.executor = ProcessPoolExecutor(max_workers=self.parse_processes)
+            self._owns_executor = True
+            self.pipeline.executor = self.executor
         self.workers = [asyncio.create_task(self.worker()) for _ in range(num_workers)]
+        if self.stats_interval > 0:
+            self.workers.append(asyncio.create_task(self.report_stats()))
         try:
             await asyncio.gather(*self.workers)
         except asyncio.CancelledError:
@@ -120,9 +159,18 @@ class TransactionWorker:
                 if not worker.done():
                     worker.cancel()
             await asyncio.gather(*self.workers, return_exceptions=True)
+            self._shutdown_executor()
 
     async def stop(self) -> None:
         """Stop the wallet monitor gracefully."""
         self.is_running = False
         for worker in self.workers:
             worker.cancel()
+        self._shutdown_executor()
+
+    def _shutdown_executor(self) -> None:
+        if self.executor is not None and self._owns_executor:
+            self.pipeline.executor = None
+            self.executor.shutdown(wait=False, cancel_futures=True)
+            self.executor = None
+            self._owns_executor = False
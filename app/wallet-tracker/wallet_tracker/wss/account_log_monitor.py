@@ -4,21 +4,286 @@
 """
 
 import asyncio
-from collections.abc import Sequence
+import itertools
+from collections import Counter
+from collections.abc import Awaitable, Callable, Sequence
+from typing import Any, NamedTuple
 
 import aioredis
-from _pickle import PicklingError
-from solana.rpc.websocket_api import connect
+import orjson
+import websockets
 from solbot_common.config import settings
+from solbot_common.constants import SWAP_PROGRAMS
 from solbot_common.log import logger
-from solders.errors import SerdeJSONError  # type: ignore
 from solders.pubkey import Pubkey  # type: ignore
-from solders.rpc.config import RpcTransactionLogsFilterMentions  # type: ignore
-from solders.rpc.responses import LogsNotification, SubscriptionResult  # type: ignore
-from websockets.exceptions import ConnectionClosedError, ConnectionClosedOK
+from websockets.exceptions import ConnectionClosed
 
 from wallet_tracker import benchmark
 from wallet_tracker.constants import NEW_TX_SIGNATURE_CHANNEL
+from wallet_tracker.dedup import SignatureDeduplicator
+from wallet_tracker.replay.recorder import RecordKind, recorder
+
+# 日志被截断时无法判断是否调用了 swap 程序，需要拉取交易详情
+LOG_TRUNCATED = "Log truncated"
+
+
+def classify_logs(err: object | None, logs: Sequence[str]) -> str | None:
+    """根据日志推送判断是否需要拉取交易详情
+
+    Returns:
+        str | None: 需要丢弃时返回原因，否则返回 None
+    """
+    if err is not None:
+        return "failed"
+    for log in logs:
+        if log == LOG_TRUNCATED:
+            return None
+        for program_id in SWAP_PROGRAMS:
+            if program_id in log:
+                return None
+    return "not_swap"
+
+
+class LogEvent(NamedTuple):
+    """logsNotification 中需要的字段"""
+
+    subscription: int
+    signature: str
+    err: Any
+    logs: list[str]
+
+
+class SubscribeResult(NamedTuple):
+    """JSON-RPC 请求的响应，error 不为空时请求失败"""
+
+    id: int
+    result: Any
+    error: Any
+
+
+def decode_message(raw: str | bytes) -> LogEvent | SubscribeResult | None:
+    """解析 websocket 消息，只提取日志推送中需要的字段
+
+    不再将整条消息反序列化为 solders 对象，无法识别的消息返回 None
+
+    Raises:
+        orjson.JSONDecodeError: 消息不是合法的 JSON
+    """
+    message = orjson.loads(raw)
+    if not isinstance(message, dict):
+        return None
+    if message.get("method") == "logsNotification":
+        params = message["params"]
+        value = params["result"]["value"]
+        return LogEvent(params["subscription"], value["signature"], value["err"], value["logs"])
+    request_id = message.get("id")
+    if isinstance(request_id, int):
+        return SubscribeResult(request_id, message.get("result"), message.get("error"))
+    return None
+
+
+class LogsConnection:
+    """单个 websocket 连接，负责一部分钱包的日志订阅
+
+    直接基于 websockets 收发原始消息并使用 orjson 解析，心跳和重连由连接自己管理。
+    订阅请求不再串行等待响应，而是通过 JSON-RPC 请求 id 与订阅结果进行关联，
+    多个订阅请求可以同时发送。连接断开后只重新订阅该连接负责的钱包。
+    """
+
+    def __init__(
+        self,
+        index: int,
+        websocket_url: str,
+        on_log: Callable[[LogEvent], Awaitable[None]],
+        max_subscriptions: int,
+        base_delay: float = 5,
+        ping_interval: float = 20,
+        ping_timeout: float = 30,
+    ):
+        self.index = index
+        self.base_delay = base_delay
+        self.ping_interval = ping_interval
+        self.ping_timeout = ping_timeout
+        self.websocket_url = websocket_url
+        self.on_log = on_log
+        self.max_subscriptions = max_subscriptions
+        self.websocket: websockets.WebSocketClientProtocol | None = None
+        self.is_running = False
+        # 该连接负责的钱包
+        self.wallets: set[str] = set()
+        # 钱包地址 -> 订阅 id
+        self.subscription_ids: dict[str, int] = {}
+        # 请求 id -> 等待订阅结果的钱包地址
+        self.pending_requests: dict[int, str] = {}
+        self.connected = asyncio.Event()
+        self.invalid_messages = 0
+        self._request_ids = itertools.count(1)
+        self._tasks: set[asyncio.Task] = set()
+
+    @property
+    def is_full(self) -> bool:
+        return len(self.wallets) >= self.max_subscriptions
+
+    async def _send_request(self, method: str, params: list) -> int | None:
+        websocket = self.websocket
+        if websocket is None:
+            return None
+        request_id = next(self._request_ids)
+        request = {"jsonrpc": "2.0", "id": request_id, "method": method, "params": params}
+        await websocket.send(orjson.dumps(request).decode())
+        return request_id
+
+    async def _send_subscribe(self, wallet: str) -> None:
+        if self.websocket is None:
+            return
+        request_id = next(self._request_ids)
+        # 先登记再发送，避免响应先于登记到达
+        self.pending_requests[request_id] = wallet
+        request = {
+            "jsonrpc": "2.0",
+            "id": request_id,
+            "method": "logsSubscribe",
+            "params": [{"mentions": [wallet]}, {"commitment": settings.rpc.commitment}],
+        }
+        try:
+            await self.websocket.send(orjson.dumps(request).decode())
+        except ConnectionClosed:
+            self.pending_requests.pop(request_id, None)
+
+    async def subscribe(self, wallet: str) -> None:
+        """订阅钱包，未连接时会在连接建立后订阅"""
+        if wallet in self.wallets:
+            return
+        self.wallets.add(wallet)
+        await self._send_subscribe(wallet)
+
+    async def unsubscribe(self, wallet: str) -> None:
+        """取消订阅钱包"""
+        self.wallets.discard(wallet)
+        subscription_id = self.subscription_ids.pop(wallet, None)
+        if subscription_id is None:
+            return
+        try:
+            await self._send_request("logsUnsubscribe", [subscription_id])
+        except ConnectionClosed:
+            pass
+        logger.info(f"Unsubscribed from wallet: {wallet}")
+
+    def process_subscribe_result(self, message: SubscribeResult) -> None:
+        wallet = self.pending_requests.pop(message.id, None)
+        if wallet is None:
+            # logsUnsubscribe 的响应
+            return
+        if message.error is not None:
+            logger.error(f"Failed to subscribe to logs of {wallet}: {message.error}")
+            return
+
+        if wallet not in self.wallets:
+            # 等待订阅结果期间取消了订阅
+            task = asyncio.create_task(self._unsubscribe_stale(message.result))
+            self._tasks.add(task)
+            task.add_done_callback(self._tasks.discard)
+            return
+        self.subscription_ids[wallet] = message.result
+        logger.info(f"Subscribed to logs of {wallet} with subscription ID: {message.result}")
+
+    async def _unsubscribe_stale(self, subscription_id: int) -> None:
+        try:
+            await self._send_request("logsUnsubscribe", [subscription_id])
+        except Exception as e:
+            logger.warning(f"Failed to unsubscribe stale subscription {subscription_id}: {e}")
+
+    async def _heartbeat(self, websocket: websockets.WebSocketClientProtocol) -> None:
+        """定时发送 ping，超时未收到 pong 时关闭连接触发重连"""
+        while True:
+            await asyncio.sleep(self.ping_interval)
+            try:
+                pong_waiter = await websocket.ping()
+                await asyncio.wait_for(pong_waiter, self.ping_timeout)
+            except asyncio.TimeoutError:
+                logger.warning(f"Connection {self.index} ping timeout, closing")
+                await websocket.close()
+                return
+            except ConnectionClosed:
+                return
+
+    async def _receive(self, websocket: websockets.WebSocketClientProtocol) -> None:
+        async for raw in websocket:
+            try:
+                message = decode_message(raw)
+            except (orjson.JSONDecodeError, KeyError, TypeError) as e:
+                # 取消订阅后仍可能收到无法解析的消息，直接跳过
+                self.invalid_messages += 1
+                logger.warning(f"Skipping invalid message: {e}")
+                continue
+            if isinstance(message, LogEvent):
+                recorder.record(RecordKind.LOGS, raw)
+                await self.on_log(message)
+            elif isinstance(message, SubscribeResult):
+                self.process_subscribe_result(message)
+
+    async def run(self) -> None:
+        """保持连接，断开后按指数退避重新连接并重新订阅"""
+        self.is_running = True
+        retry_count = 0
+
+        while self.is_running:
+            heartbeat = None
+            try:
+                async with websockets.connect(
+                    self.websocket_url,
+                    # 心跳由 _heartbeat 管理
+                    ping_interval=None,
+                    close_timeout=20,
+                    max_size=None,
+                ) as websocket:
+                    self.websocket = websocket
+                    logger.info(
+                        f"Connection {self.index} connected to Solana WebSocket RPC"
+                        f"({self.websocket_url})"
+                    )
+                    retry_count = 0  # Reset retry count on successful connection
+                    heartbeat = asyncio.create_task(self._heartbeat(websocket))
+
+                    # 同时发送该连接负责的所有钱包的订阅请求
+                    await asyncio.gather(*(self._send_subscribe(w) for w in list(self.wallets)))
+                    self.connected.set()
+                    await self._receive(websocket)
+                    logger.warning(f"WebSocket connection {self.index} closed")
+            except asyncio.CancelledError:
+                break
+            except ConnectionClosed as ws_error:
+                logger.warning(f"WebSocket connection closed: {ws_error}")
+            except Exception as e:
+                logger.error(f"Error in connection {self.index}: {e}")
+                logger.exception(e)
+            finally:
+                if heartbeat is not None:
+                    heartbeat.cancel()
+
+            # Clean up and prepare for reconnection
+            self.connected.clear()
+            self.websocket = None
+            self.subscription_ids.clear()
+            self.pending_requests.clear()
+            if not self.is_running:
+                break
+
+            # Implement exponential backoff for all reconnection attempts
+            retry_count += 1
+            delay = min(self.base_delay * (2 ** (retry_count - 1)), 60)  # Cap at 60 seconds
+            logger.info(
+                f"Connection {self.index} reconnecting in {delay} seconds (attempt {retry_count})"
+            )
+            await asyncio.sleep(delay)
+
+    async def close(self) -> None:
+        self.is_running = False
+        try:
+            if self.websocket:
+                await self.websocket.close()
+        except Exception as e:
+            logger.error(f"Error during cleanup: {e}")
 
 
 class AccountLogMonitor:
@@ -28,6 +293,10 @@ class AccountLogMonitor:
         rpc_endpoint: str,
         redis_client: aioredis.Redis,
         redis_channel: str = NEW_TX_SIGNATURE_CHANNEL,
+        dedup: SignatureDeduplicator | None = None,
+        max_subscriptions_per_connection: int = 1000,
+        prefilter: bool = False,
+        report_every: int = 1000,
     ):
         """
         初始化监控器
@@ -36,28 +305,42 @@ class AccountLogMonitor:
             init_wallets: 要监控的钱包地址列表
             rpc_endpoint: Solana RPC 端点
             redis_channel: Redis 发布订阅频道名
+            dedup: 交易签名去重，同一笔交易提及多个钱包或重连重放时只推送一次
+            max_subscriptions_per_connection: 单个 websocket 连接最多订阅的钱包数量，
+                超过后会建立新的连接
+            prefilter: 是否根据日志丢弃失败的交易以及没有调用 SWAP_PROGRAMS 中程序的交易
+            report_every: 每收到多少条日志输出一次过滤统计
         """
         self.init_wallets = list(init_wallets)
         self.websocket_url = rpc_endpoint.replace("https://", "wss://")
         self.redis_channel = redis_channel
         self.redis = redis_client
+        self.dedup = dedup if dedup is not None else SignatureDeduplicator()
+        self.max_subscriptions_per_connection = max_subscriptions_per_connection
+        self.prefilter = prefilter
+        self.report_every = report_every
+        # 过滤统计：每种原因丢弃的日志数量，每丢弃一条即节省一次 getTransaction 调用
+        self.drop_counters: Counter[str] = Counter()
+        self.received_count = 0
         self.is_running = False
-        # FIXME: 目前采用的是钱包与钱包建立映射关系，是否可能出现多个钱包跟踪同一个目标钱包的情况。其中一个钱包取消了订阅，是否可能导致其他钱包也无法收到消息
-        self.subscription_ids = {}  # 新增：存储钱包地址和订阅ID的映射
-        self.websocket = None  # 新增：存储 websocket 连接
-        self.waitting_subscribe_response_wallet = None  # 新增：存储等待订阅响应的钱包地址
-        self.subscribed_wallets = set()  # 新增：存储已订阅的钱包地址
-        self.subscribe_lock = asyncio.Lock()  # 新增：订阅锁
+        self.connections: list[LogsConnection] = []
+        self.connection_tasks: list[asyncio.Task] = []
+        # 钱包地址 -> 负责该钱包的连接
+        self.wallet_connections: dict[str, LogsConnection] = {}
         self.waitting_subscribe_wallet: asyncio.Queue[Pubkey] = (
             asyncio.Queue()
-        )  # 新增：等待订阅的钱包队列
+        )  # 等待订阅的钱包队列
         self.waitting_unsubscribe_wallet: asyncio.Queue[Pubkey] = (
             asyncio.Queue()
-        )  # 新增：等待取消订阅的钱包队列
-        self.__subscribe_task_join_handle = None  # 新增：订阅任务句柄
-        self.__unsubscribe_task_join_handle = None  # 新增：取消订阅任务句柄
+        )  # 等待取消订阅的钱包队列
+        self.__subscribe_task_join_handle = None  # 订阅任务句柄
+        self.__unsubscribe_task_join_handle = None  # 取消订阅任务句柄
+
+    @property
+    def subscribed_wallets(self) -> set[str]:
+        return set(self.wallet_connections)
 
-    async def process_log(self, message: LogsNotification) -> None:
+    async def process_log(self, message: LogEvent) -> None:
         """
         处理接收到的日志数据
 
@@ -65,7 +348,24 @@ class AccountLogMonitor:
             message: WebSocket 返回的日志数据
         """
         try:
-            signature = str(message.result.value.signature)
+            signature = message.signature
+            self.received_count += 1
+            if self.report_every > 0 and self.received_count % self.report_every == 0:
+                logger.info(f"Log prefilter stats: {self.get_stats()}")
+
+            if self.prefilter:
+                reason = classify_logs(message.err, message.logs)
+                if reason is not None:
+                    self.drop_counters[reason] += 1
+                    dropped = self.drop_counters[reason]
+                    if dropped == 1 or (self.report_every > 0 and dropped % self.report_every == 0):
+                        # 不在 SWAP_PROGRAMS 中的交易所的 swap 也会计入 not_swap
+                        logger.info(f"Log prefilter dropped {dropped} {reason} notifications")
+                    logger.debug(f"Drop tx signature({reason}): {signature}")
+                    return
+            if await self.dedup.is_duplicate(signature):
+                logger.debug(f"Skip duplicate tx signature: {signature}")
+                return
             assert self.redis is not None, "Redis is not connected"
             # 发送到 Redis
             await self.redis.lpush(self.redis_channel, signature)
@@ -74,52 +374,47 @@ class AccountLogMonitor:
         except Exception as e:
             logger.error(f"Error processing log: {e}")
 
-    async def process_subscribe_result(self, message: SubscriptionResult) -> None:
-        subscription_id = message.result
-        if self.waitting_subscribe_response_wallet is None:
-            raise ValueError(f"Unexpected subscription result: {message}")
+    def get_stats(self) -> dict:
+        return {
+            "received": self.received_count,
+            "invalid": sum(connection.invalid_messages for connection in self.connections),
+            "dropped": dict(self.drop_counters),
+            "saved_rpc_calls": sum(self.drop_counters.values()),
+        }
 
-        async with self.subscribe_lock:
-            self.subscription_ids[self.waitting_subscribe_response_wallet] = subscription_id
-            old_wallet = self.waitting_subscribe_response_wallet
-            self.waitting_subscribe_response_wallet = None
+    def _get_connection(self) -> LogsConnection:
+        """获取一个未满的连接，所有连接都满时新建连接"""
+        for connection in self.connections:
+            if not connection.is_full:
+                return connection
 
-        logger.info(f"Subscribed to logs with subscription ID: {subscription_id}")
-        if old_wallet not in self.subscribed_wallets:
-            self.subscribed_wallets.add(old_wallet)
+        connection = LogsConnection(
+            len(self.connections),
+            self.websocket_url,
+            self.process_log,
+            self.max_subscriptions_per_connection,
+        )
+        self.connections.append(connection)
+        if self.is_running:
+            self.connection_tasks.append(asyncio.create_task(connection.run()))
+        return connection
 
     async def subscribe_wallet(self, wallet: Pubkey) -> None:
         """订阅单个钱包"""
-        if not self.websocket:
-            logger.warning(
-                f"WebSocket connection is not established. Cannot subscribe to wallet: {wallet}"
-            )
+        wallet_str = str(wallet)
+        if wallet_str in self.wallet_connections:
             return
-
         logger.debug(f"Subscribing to wallet: {wallet}")
-        async with self.subscribe_lock:
-            self.waitting_subscribe_response_wallet = str(wallet)
-            await self.websocket.logs_subscribe(
-                filter_=RpcTransactionLogsFilterMentions(wallet),
-                commitment=settings.rpc.commitment,
-            )
+        connection = self._get_connection()
+        self.wallet_connections[wallet_str] = connection
+        await connection.subscribe(wallet_str)
 
     async def unsubscribe_wallet(self, wallet: Pubkey) -> None:
         """取消订阅单个钱包"""
-        if not self.websocket:
-            logger.warning(
-                f"WebSocket connection is not established. Cannot subscribe to wallet: {wallet}"
-            )
+        connection = self.wallet_connections.pop(str(wallet), None)
+        if connection is None:
             return
-
-        wallet_str = str(wallet)
-        if wallet_str in self.subscription_ids:
-            async with self.subscribe_lock:
-                subscription_id = self.subscription_ids[wallet_str]
-                del self.subscription_ids[wallet_str]
-                self.subscribed_wallets.remove(wallet_str)
-                await self.websocket.logs_unsubscribe(subscription_id)
-            logger.info(f"Unsubscribed from wallet: {wallet}")
+        await connection.unsubscribe(str(wallet))
 
     async def __subscribe_task(self) -> None:
         """订阅所有钱包"""
@@ -150,87 +445,30 @@ class AccountLogMonitor:
     async def start(self) -> None:
         """启动监控服务"""
         self.is_running = True
-        retry_count = 0
-        max_retries = 5
-        base_delay = 5
 
-        while self.is_running:
-            # 如果断开了，重新连接时，需要将已订阅的钱包重新进行订阅
-            for wallet in self.subscribed_wallets:
-                self.waitting_subscribe_wallet.put_nowait(Pubkey.from_string(wallet))
+        for wallet in self.init_wallets:
+            await self.subscribe_wallet(wallet)
+        if not self.connections:
+            self._get_connection()
+        for connection in self.connections:
+            self.connection_tasks.append(asyncio.create_task(connection.run()))
 
-            try:
-                async with connect(
-                    self.websocket_url,
-                    ping_timeout=30,
-                    ping_interval=20,
-                    close_timeout=20,
-                ) as websocket:
-                    self.websocket = websocket
-                    logger.info(
-                        f"Successfully connected to Solana WebSocket RPC({self.websocket_url})"
-                    )
-                    retry_count = 0  # Reset retry count on successful connection
+        if self.__subscribe_task_join_handle is None:
+            self.__subscribe_task_join_handle = asyncio.create_task(self.__subscribe_task())
+        if self.__unsubscribe_task_join_handle is None:
+            self.__unsubscribe_task_join_handle = asyncio.create_task(self.__unsubscribe_task())
 
-                    for wallet in self.init_wallets:
-                        await self.waitting_subscribe_wallet.put(wallet)
-
-                    if self.__subscribe_task_join_handle is None:
-                        self.__subscribe_task_join_handle = asyncio.create_task(
-                            self.__subscribe_task()
-                        )
-                    if self.__unsubscribe_task_join_handle is None:
-                        self.__unsubscribe_task_join_handle = asyncio.create_task(
-                            self.__unsubscribe_task()
-                        )
-
-                    while self.is_running:
-                        try:
-                            messages = await websocket.recv()
-                            for message in messages:
-                                if isinstance(message, SubscriptionResult):
-                                    await self.process_subscribe_result(message)
-                                    continue
-                                elif isinstance(message, LogsNotification):
-                                    await self.process_log(message)
-                        except (ConnectionClosedError, ConnectionClosedOK) as ws_error:
-                            logger.warning(f"WebSocket connection closed: {ws_error}")
-                            break
-                        except (SerdeJSONError, PicklingError) as e:
-                            # FIXME: 取消订阅后，接收到的消息反序列化失败
-                            logger.warning(f"Skipping invalid message: {e}")
-                        except Exception as e:
-                            logger.error(f"Error processing message: {e}")
-                            logger.exception(e)
-                            break
-            except Exception as e:
-                logger.error(f"Error in monitor loop: {e}")
-                logger.exception(e)
-
-            # Clean up and prepare for reconnection
-            self.subscription_ids.clear()
-            await self.cleanup()
-
-            # Implement exponential backoff for all reconnection attempts
-            retry_count += 1
-            if retry_count > max_retries:
-                logger.error(f"Maximum retries ({max_retries}) reached. Stopping monitor.")
-                self.is_running = False
-                break
-
-            delay = min(base_delay * (2 ** (retry_count - 1)), 60)  # Cap at 60 seconds
-            logger.info(
-                f"Attempting reconnection in {delay} seconds (attempt {retry_count}/{max_retries})"
-            )
-            await asyncio.sleep(delay)
+        # 各连接独立重连，这里只需要等待服务停止
+        while self.is_running:
+            await asyncio.sleep(1)
 
     async def cleanup(self) -> None:
         """清理连接"""
-        try:
-            if self.websocket:
-                await self.websocket.close()
-        except Exception as e:
-            logger.error(f"Error during cleanup: {e}")
+        for connection in self.connections:
+            await connection.close()
+        for task in self.connection_tasks:
+            task.cancel()
+        self.connection_tasks.clear()
 
         try:
             if self.redis:
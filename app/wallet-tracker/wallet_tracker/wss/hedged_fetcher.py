@@ -0,0 +1,144 @@
+import asyncio
+import time
+from collections import deque
+from collections.abc import Awaitable, Callable
+
+from solbot_common.log import logger
+from solders.signature import Signature  # type: ignore
+
+FetchFunc = Callable[[Signature], Awaitable[dict | None]]
+
+
+class EndpointStats:
+    """单个节点最近 window 次请求的延迟和错误率"""
+
+    def __init__(self, window: int = 100, default_latency: float = 0.5):
+        self.latencies: deque[float] = deque(maxlen=window)
+        self.errors: deque[bool] = deque(maxlen=window)
+        self.default_latency = default_latency
+
+    def record(self, latency: float, error: bool = False) -> None:
+        self.errors.append(error)
+        if not error:
+            self.latencies.append(latency)
+
+    def percentile(self, q: float) -> float:
+        if not self.latencies:
+            return self.default_latency
+        latencies = sorted(self.latencies)
+        return latencies[min(len(latencies) - 1, int(len(latencies) * q))]
+
+    @property
+    def p50(self) -> float:
+        return self.percentile(0.5)
+
+    @property
+    def p99(self) -> float:
+        return self.percentile(0.99)
+
+    @property
+    def error_rate(self) -> float:
+        if not self.errors:
+            return 0.0
+        return sum(self.errors) / len(self.errors)
+
+
+class Endpoint:
+    def __init__(self, name: str, fetch: FetchFunc, cost: float = 1.0):
+        self.name = name
+        self.fetch = fetch
+        self.cost = cost
+        self.stats = EndpointStats()
+
+    @property
+    def score(self) -> float:
+        """分数越低越优先：按延迟中位数、错误率和调用成本加权"""
+        return self.stats.p50 * self.cost / max(1 - self.stats.error_rate, 0.01)
+
+    @property
+    def hedge_delay(self) -> float:
+        """等待该节点返回的时间，超过后向下一个节点发起对冲请求"""
+        return min(max(self.stats.p99, 0.05), 2.0)
+
+
+class HedgedTxDetailFetcher:
+    """对冲请求拉取交易详情
+
+    不再同时向所有节点发起请求，而是按照各节点最近的延迟、错误率和成本排序，
+    先请求最优的节点。超过该节点的对冲延迟（p99）仍未返回，或者请求失败、
+    交易不存在时，才向下一个节点发起请求，最先返回的有效结果会被采用。
+    Shyft 等第三方接口以较高的成本作为兜底。
+    """
+
+    def __init__(self, endpoints: list[Endpoint]):
+        if not endpoints:
+            raise ValueError("endpoints must not be empty")
+        self.endpoints = endpoints
+
+    def ranked_endpoints(self) -> list[Endpoint]:
+        return sorted(self.endpoints, key=lambda endpoint: endpoint.score)
+
+    async def _fetch_from(self, endpoint: Endpoint, signature: Signature) -> dict | None:
+        start = time.monotonic()
+        try:
+            tx_detail = await endpoint.fetch(signature)
+        except asyncio.CancelledError:
+            # 被对冲请求抢先返回而取消：实际延迟至少为已等待的时间，作为慢样本记录，
+            # 否则变慢的节点会一直保持原来的低延迟并排在最前
+            endpoint.stats.record(time.monotonic() - start)
+            raise
+        except Exception as e:
+            endpoint.stats.record(time.monotonic() - start, error=True)
+            logger.warning(f"Error fetching from {endpoint.name}: {e}")
+            raise
+        endpoint.stats.record(time.monotonic() - start)
+        return tx_detail
+
+    async def fetch(self, signature: Signature) -> dict | None:
+        pending: dict[asyncio.Task, Endpoint] = {}
+        candidates = iter(self.ranked_endpoints())
+
+        def launch() -> Endpoint | None:
+            endpoint = next(candidates, None)
+            if endpoint is not None:
+                logger.debug(f"Fetching transaction {signature} from {endpoint.name}")
+                task = asyncio.create_task(self._fetch_from(endpoint, signature))
+                pending[task] = endpoint
+            return endpoint
+
+        try:
+            launched = launch()
+            while pending:
+                timeout = launched.hedge_delay if launched is not None else None
+                done, _ = await asyncio.wait(
+                    pending, timeout=timeout, return_when=asyncio.FIRST_COMPLETED
+                )
+                if not done:
+                    # 超过对冲延迟仍未返回，向下一个节点发起请求
+                    launched = launch()
+                    continue
+
+                for task in done:
+                    endpoint = pending.pop(task)
+                    if not task.cancelled() and task.exception() is None:
+                        tx_detail = task.result()
+                        if tx_detail is not None:
+                            logger.info(f"Successfully fetched transaction from {endpoint.name}")
+                            return tx_detail
+                    # 请求失败或交易不存在，立即尝试下一个节点
+                    launched = launch()
+            return None
+        finally:
+            for task in pending:
+                task.cancel()
+
+    def get_stats(self) -> dict:
+        return {
+            endpoint.name: {
+                "p50_ms": round(endpoint.stats.p50 * 1000, 2),
+                "p99_ms": round(endpoint.stats.p99 * 1000, 2),
+                "error_rate": round(endpoint.stats.error_rate, 4),
+                "cost": endpoint.cost,
+            }
+            for endpoint in self.endpoints
+        }
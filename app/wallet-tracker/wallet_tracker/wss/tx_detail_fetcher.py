@@ -1,28 +1,124 @@
+import asyncio
+
 import httpx
 import orjson as json
-from solana.rpc.async_api import AsyncClient
+from solana.rpc.commitment import Commitment
 from solbot_common.config import settings
 from solbot_common.log import logger
 from solders.signature import Signature  # type: ignore
 
 
 class TxDetailRawFetcher:
-    def __init__(self, rpc_url: str = settings.rpc.rpc_url) -> None:
+    """通过 RPC 节点拉取交易详情
+
+    短时间窗口（batch_window 秒或 max_batch_size 个签名）内的多个 fetch 请求会被合并为
+    一个 JSON-RPC 批量请求，结果再分发给各自等待的协程。
+    在当前 commitment 下交易尚不可见时（result 为 null），单独对该签名进行重试。
+    """
+
+    def __init__(
+        self,
+        rpc_url: str = settings.rpc.rpc_url,
+        batch_window: float = 0.005,
+        max_batch_size: int = 32,
+        max_retries: int = 3,
+        retry_delay: float = 0.3,
+        client: httpx.AsyncClient | None = None,
+        commitment: Commitment | None = None,
+    ) -> None:
         self.rpc_url = rpc_url
-        self.client = AsyncClient(rpc_url)
+        self.commitment = commitment or settings.rpc.commitment
+        self.batch_window = batch_window
+        self.max_batch_size = max_batch_size
+        self.max_retries = max_retries
+        self.retry_delay = retry_delay
+        self.client = client or httpx.AsyncClient(timeout=10)
+        # 等待发送的请求: (签名, 剩余重试次数, future)
+        self._pending: list[tuple[str, int, asyncio.Future]] = []
+        self._flush_handle: asyncio.TimerHandle | None = None
+        self._tasks: set[asyncio.Task] = set()
 
     async def fetch(self, signature: Signature) -> dict | None:
         logger.debug(f"Fetching transaction from {self.rpc_url}")
-        resp = await self.client.get_transaction(
-            signature,
-            encoding="json",
-            commitment=settings.rpc.commitment,
-            max_supported_transaction_version=0,
-        )
-        data = json.loads(resp.to_json())
-        if "result" not in data:
-            raise Exception(f"Error message: {data}")
-        return data["result"]
+        future = asyncio.get_running_loop().create_future()
+        self._enqueue(str(signature), self.max_retries, future)
+        return await future
+
+    def _enqueue(self, signature: str, retries: int, future: asyncio.Future) -> None:
+        self._pending.append((signature, retries, future))
+        if len(self._pending) >= self.max_batch_size:
+            self._flush()
+        elif self._flush_handle is None:
+            self._flush_handle = asyncio.get_running_loop().call_later(
+                self.batch_window, self._flush
+            )
+
+    def _flush(self) -> None:
+        if self._flush_handle is not None:
+            self._flush_handle.cancel()
+            self._flush_handle = None
+        batch, self._pending = self._pending, []
+        if not batch:
+            return
+        self._spawn(self._send_batch(batch))
+
+    def _spawn(self, coro) -> None:
+        task = asyncio.create_task(coro)
+        self._tasks.add(task)
+        task.add_done_callback(self._tasks.discard)
+
+    def _build_request(self, request_id: int, signature: str) -> dict:
+        return {
+            "jsonrpc": "2.0",
+            "id": request_id,
+            "method": "getTransaction",
+            "params": [
+                signature,
+                {
+                    "encoding": "json",
+                    "commitment": self.commitment,
+                    "maxSupportedTransactionVersion": 0,
+                },
+            ],
+        }
+
+    async def _send_batch(self, batch: list[tuple[str, int, asyncio.Future]]) -> None:
+        payload = [self._build_request(i, signature) for i, (signature, _, _) in enumerate(batch)]
+        try:
+            response = await self.client.post(
+                self.rpc_url,
+                content=json.dumps(payload),
+                headers={"Content-Type": "application/json"},
+            )
+            response.raise_for_status()
+            data = json.loads(response.content)
+            if not isinstance(data, list):
+                raise Exception(f"Error message: {data}")
+        except Exception as e:
+            for _, _, future in batch:
+                if not future.done():
+                    future.set_exception(e)
+            return
+
+        results = {item.get("id"): item for item in data}
+        for i, (signature, retries, future) in enumerate(batch):
+            if future.done():
+                continue
+            item = results.get(i)
+            if item is None or "result" not in item:
+                future.set_exception(Exception(f"Error message: {item}"))
+            elif item["result"] is not None:
+                future.set_result(item["result"])
+            elif retries > 0:
+                # 交易在当前 commitment 下尚不可见，稍后单独重试
+                self._spawn(self._retry(signature, retries - 1, future))
+            else:
+                future.set_result(None)
+
+    async def _retry(self, signature: str, retries: int, future: asyncio.Future) -> None:
+        await asyncio.sleep(self.retry_delay)
+        if not future.done():
+            self._enqueue(signature, retries, future)
 
 
 class TxDetailShyftFetcher:
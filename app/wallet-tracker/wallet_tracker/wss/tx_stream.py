@@ -0,0 +1,340 @@
+"""
+通过 transactionSubscribe 订阅完整的交易数据
+
+logsSubscribe 只推送交易签名，需要再调用 getTransaction 拉取交易详情，
+检测延迟和 RPC 调用量都翻倍。支持 transactionSubscribe 的节点（如 Helius）
+可以通过 accountInclude 订阅涉及被跟踪钱包的交易，直接推送完整的交易数据，
+收到后立即交给解析器处理。
+"""
+
+import asyncio
+import itertools
+import time
+from collections.abc import Iterable, Sequence
+from concurrent.futures import Executor
+
+import aioredis
+import orjson
+import websockets
+from solbot_common.log import logger
+from solders.pubkey import Pubkey  # type: ignore
+from websockets.exceptions import ConnectionClosed
+
+from wallet_tracker import benchmark
+from wallet_tracker.constants import NEW_TX_DETAIL_CHANNEL
+from wallet_tracker.dedup import SignatureDeduplicator
+from wallet_tracker.parser import RawTXParser
+from wallet_tracker.replay.recorder import RecordKind, recorder
+from wallet_tracker.tx_pipeline import TxEventPipeline
+
+
+class TransactionStreamSubscriber:
+    """transactionSubscribe 交易订阅者
+
+    所有被跟踪的钱包放在同一个订阅的 accountInclude 中。订阅的钱包发生变化时，
+    在 debounce 时间窗口结束后发送一次新的订阅请求，新的订阅生效后再取消旧的订阅，
+    避免切换期间漏掉交易，切换期间重复推送的交易由签名去重过滤。
+    """
+
+    def __init__(
+        self,
+        endpoint: str,
+        redis_client: aioredis.Redis,
+        wallets: Sequence[Pubkey],
+        inline_parse: bool = True,
+        dedup: SignatureDeduplicator | None = None,
+        commitment: str = "confirmed",
+        worker_nums: int = 2,
+        queue_size: int = 1000,
+        debounce_interval: float = 0.2,
+        base_delay: float = 5,
+        ping_interval: float = 20,
+        ping_timeout: float = 30,
+        executor: Executor | None = None,
+    ):
+        self.endpoint = endpoint
+        self.redis = redis_client
+        self.inline_parse = inline_parse
+        self.pipeline = TxEventPipeline(redis_client, executor=executor)
+        self.dedup = dedup if dedup is not None else SignatureDeduplicator()
+        self.commitment = commitment
+        self.subscribed_wallets: set[str] = {str(wallet) for wallet in wallets}
+        self.is_running = False
+        self.websocket: websockets.WebSocketClientProtocol | None = None
+        self.connected = asyncio.Event()
+        # 当前生效的订阅 id，以及等待响应的订阅请求 id
+        self.subscription_id: int | None = None
+        self.pending_request_id: int | None = None
+        # 所有尚未收到响应的订阅请求 id，被新的请求替换后的订阅需要取消
+        self._subscribe_requests: set[int] = set()
+        self._request_ids = itertools.count(1)
+        # 收到的交易先放入队列，由 worker 解析，避免阻塞接收
+        self.worker_nums = worker_nums
+        self.tx_queue: asyncio.Queue[dict] = asyncio.Queue(maxsize=queue_size)
+        self.workers: list[asyncio.Task] = []
+        self._task: asyncio.Task | None = None
+        # 订阅更新相关，在 debounce 时间窗口内的多次订阅变更只会发送一次请求
+        self.debounce_interval = debounce_interval
+        self._flush_task: asyncio.Task | None = None
+        # 重连和心跳
+        self.base_delay = base_delay
+        self.ping_interval = ping_interval
+        self.ping_timeout = ping_timeout
+
+    def _build_subscribe_params(self) -> list:
+        return [
+            {
+                "vote": False,
+                "failed": False,
+                "accountInclude": sorted(self.subscribed_wallets),
+            },
+            {
+                "commitment": self.commitment,
+                "encoding": "jsonParsed",
+                "transactionDetails": "full",
+                "showRewards": False,
+                "maxSupportedTransactionVersion": 0,
+            },
+        ]
+
+    async def _send_request(self, method: str, params: list) -> int | None:
+        websocket = self.websocket
+        if websocket is None:
+            return None
+        request_id = next(self._request_ids)
+        request = {"jsonrpc": "2.0", "id": request_id, "method": method, "params": params}
+        await websocket.send(orjson.dumps(request).decode())
+        return request_id
+
+    async def _subscribe(self) -> None:
+        """按当前的钱包集合发送订阅请求，没有钱包时只取消旧的订阅"""
+        if not self.subscribed_wallets:
+            self.pending_request_id = None
+            await self._unsubscribe_current()
+            return
+        self.pending_request_id = await self._send_request(
+            "transactionSubscribe", self._build_subscribe_params()
+        )
+        if self.pending_request_id is not None:
+            self._subscribe_requests.add(self.pending_request_id)
+
+    async def _unsubscribe_current(self) -> None:
+        subscription_id, self.subscription_id = self.subscription_id, None
+        if subscription_id is not None:
+            await self._send_request("transactionUnsubscribe", [subscription_id])
+
+    async def _process_response(self, message: dict) -> None:
+        request_id = message.get("id")
+        if request_id not in self._subscribe_requests:
+            # transactionUnsubscribe 的响应
+            return
+        self._subscribe_requests.discard(request_id)
+        if request_id != self.pending_request_id:
+            # 等待响应期间订阅已被新的请求替换
+            if message.get("result") is not None:
+                await self._send_request("transactionUnsubscribe", [message["result"]])
+            return
+        self.pending_request_id = None
+        if message.get("error") is not None:
+            logger.error(f"Failed to subscribe transactions: {message['error']}")
+            return
+        # 新的订阅生效后再取消旧的订阅
+        await self._unsubscribe_current()
+        self.subscription_id = message["result"]
+        logger.info(
+            f"Subscribed to transactions of {len(self.subscribed_wallets)} wallets "
+            f"with subscription ID: {self.subscription_id}"
+        )
+
+    def _build_tx_detail(self, result: dict) -> dict:
+        """将推送的交易构建成 getTransaction 返回的结构，方便统一解析交易数据"""
+        transaction = result["transaction"]
+        return {
+            "slot": result.get("slot"),
+            "transaction": transaction["transaction"],
+            "meta": transaction["meta"],
+            "version": transaction.get("version", 0),
+            # 推送中没有 blockTime，使用收到交易的时间
+            "blockTime": transaction.get("blockTime") or int(time.time()),
+        }
+
+    async def _handle_message(self, raw: str | bytes) -> None:
+        try:
+            message = orjson.loads(raw)
+            if message.get("method") == "transactionNotification":
+                recorder.record(RecordKind.STREAM, raw)
+                tx_detail = self._build_tx_detail(message["params"]["result"])
+                await self.tx_queue.put(tx_detail)
+            elif "id" in message:
+                await self._process_response(message)
+        except (orjson.JSONDecodeError, AttributeError, KeyError, TypeError) as e:
+            logger.warning(f"Skipping invalid message: {e}")
+
+    async def _receive(self, websocket: websockets.WebSocketClientProtocol) -> None:
+        async for raw in websocket:
+            await self._handle_message(raw)
+
+    async def _process_tx_detail(self, tx_detail: dict) -> None:
+        """处理单个交易
+
+        inline 模式下直接解析并发送 TxEvent，只有解析失败时才写入 tx_detail:new，
+        交由 TransactionWorker 重试。
+        """
+        signature = tx_detail["transaction"]["signatures"][0]
+        if await self.dedup.is_duplicate(signature):
+            logger.debug(f"Skip duplicate tx signature: {signature}")
+            return
+        await benchmark.init(signature)
+
+        if not self.inline_parse:
+            await self.redis.lpush(NEW_TX_DETAIL_CHANNEL, orjson.dumps(tx_detail).decode("utf-8"))
+            return
+        await self.pipeline.process(
+            RawTXParser(tx_detail),
+            lambda: orjson.dumps(tx_detail).decode("utf-8"),
+            spill_channel=NEW_TX_DETAIL_CHANNEL,
+        )
+
+    async def worker(self) -> None:
+        while True:
+            tx_detail = await self.tx_queue.get()
+            try:
+                await self._process_tx_detail(tx_detail)
+            except Exception as e:
+                logger.error(f"Error processing transaction: {e}")
+                logger.exception(e)
+            finally:
+                self.tx_queue.task_done()
+
+    async def _heartbeat(self, websocket: websockets.WebSocketClientProtocol) -> None:
+        """定时发送 ping，超时未收到 pong 时关闭连接触发重连"""
+        while True:
+            await asyncio.sleep(self.ping_interval)
+            try:
+                pong_waiter = await websocket.ping()
+                await asyncio.wait_for(pong_waiter, self.ping_timeout)
+            except asyncio.TimeoutError:
+                logger.warning("Transaction stream ping timeout, closing")
+                await websocket.close()
+                return
+            except ConnectionClosed:
+                return
+
+    async def run(self) -> None:
+        """保持连接，断开后按指数退避重新连接并重新订阅"""
+        retry_count = 0
+        while self.is_running:
+            heartbeat = None
+            try:
+                async with websockets.connect(
+                    self.endpoint, ping_interval=None, close_timeout=20, max_size=None
+                ) as websocket:
+                    self.websocket = websocket
+                    logger.info("Connected to transaction stream")
+                    retry_count = 0
+                    heartbeat = asyncio.create_task(self._heartbeat(websocket))
+                    await self._subscribe()
+                    self.connected.set()
+                    await self._receive(websocket)
+                    logger.warning("Transaction stream closed")
+            except asyncio.CancelledError:
+                break
+            except ConnectionClosed as ws_error:
+                logger.warning(f"Transaction stream closed: {ws_error}")
+            except Exception as e:
+                logger.error(f"Error in transaction stream: {e}")
+                logger.exception(e)
+            finally:
+                if heartbeat is not None:
+                    heartbeat.cancel()
+
+            self.connected.clear()
+            self.websocket = None
+            self.subscription_id = None
+            self.pending_request_id = None
+            self._subscribe_requests.clear()
+            if not self.is_running:
+                break
+
+            retry_count += 1
+            delay = min(self.base_delay * (2 ** (retry_count - 1)), 60)  # Cap at 60 seconds
+            logger.info(f"Reconnecting transaction stream in {delay} seconds")
+            await asyncio.sleep(delay)
+
+    async def start(self) -> None:
+        """启动订阅和解析 worker"""
+        self.is_running = True
+        self.workers = [asyncio.create_task(self.worker()) for _ in range(self.worker_nums)]
+        self._task = asyncio.create_task(self.run())
+
+    async def stop(self) -> None:
+        """Stop the wallet monitor gracefully."""
+        self.is_running = False
+        if self._flush_task is not None:
+            self._flush_task.cancel()
+            self._flush_task = None
+        if self.websocket is not None:
+            try:
+                await self.websocket.close()
+            except Exception as e:
+                logger.error(f"Error during cleanup: {e}")
+        if self._task is not None:
+            self._task.cancel()
+            self._task = None
+        for worker in self.workers:
+            worker.cancel()
+        self.workers.clear()
+
+    async def _flush_subscription(self) -> None:
+        """等待 debounce 时间窗口结束后发送新的订阅请求"""
+        await asyncio.sleep(self.debounce_interval)
+        self._flush_task = None
+        if self.websocket is None:
+            # 尚未建立连接，连接时会订阅所有钱包
+            return
+        try:
+            await self._subscribe()
+        except ConnectionClosed as e:
+            logger.warning(f"Failed to update subscription: {e}")
+
+    def _schedule_flush(self) -> None:
+        if self._flush_task is None:
+            self._flush_task = asyncio.create_task(self._flush_subscription())
+
+    async def subscribe_many(self, wallets: Iterable[Pubkey]) -> None:
+        """批量订阅钱包的交易信息。
+
+        Args:
+            wallets (Iterable[Pubkey]): 要订阅的钱包地址
+        """
+        before = len(self.subscribed_wallets)
+        self.subscribed_wallets.update(str(wallet) for wallet in wallets)
+        if len(self.subscribed_wallets) != before:
+            self._schedule_flush()
+
+    async def unsubscribe_many(self, wallets: Iterable[Pubkey]) -> None:
+        """批量取消订阅钱包的交易信息。
+
+        Args:
+            wallets (Iterable[Pubkey]): 要取消订阅的钱包地址
+        """
+        before = len(self.subscribed_wallets)
+        self.subscribed_wallets.difference_update(str(wallet) for wallet in wallets)
+        if len(self.subscribed_wallets) != before:
+            self._schedule_flush()
+
+    async def subscribe_wallet_transactions(self, wallet: Pubkey) -> None:
+        """订阅钱包的交易信息。
+
+        Args:
+            wallet (Pubkey): 要订阅的钱包地址
+        """
+        await self.subscribe_many([wallet])
+
+    async def unsubscribe_wallet_transactions(self, wallet: Pubkey) -> None:
+        """取消订阅钱包的交易信息。
+
+        Args:
+            wallet (Pubkey): 要取消订阅的钱包地址
+        """
+        await self.unsubscribe_many([wallet])
@@ -1,5 +1,6 @@
 import asyncio
-from collections.abc import Sequence
+from collections.abc import Iterable, Sequence
+from concurrent.futures import Executor
 
 import orjson as json
 from aioredis import Redis
@@ -16,11 +17,30 @@ from wallet_tracker.constants import (
     NEW_TX_DETAIL_CHANNEL,
     NEW_TX_SIGNATURE_CHANNEL,
 )
+from wallet_tracker.dedup import SignatureDeduplicator
 from wallet_tracker.exceptions import NotSwapTransaction, TransactionError
-from wallet_tracker.wss.tx_detail_fetcher import TxDetailRawFetcher
+from wallet_tracker.parser import RawTXParser
+from wallet_tracker.replay.recorder import RecordKind, recorder
+from wallet_tracker.tx_pipeline import TxEventPipeline
+from wallet_tracker.wss.hedged_fetcher import Endpoint, HedgedTxDetailFetcher
+from wallet_tracker.wss.tx_detail_fetcher import TxDetailRawFetcher, TxDetailShyftFetcher
 
 from .account_log_monitor import AccountLogMonitor
 
+# 第三方接口的调用成本高于 RPC 节点，只作为兜底
+SHYFT_FETCH_COST = 3.0
+
+
+def build_endpoints() -> list[Endpoint]:
+    """根据配置构建拉取交易详情的节点列表"""
+    endpoints = [
+        Endpoint(f"Raw-{i}", TxDetailRawFetcher(endpoint).fetch)
+        for i, endpoint in enumerate(settings.rpc.endpoints)
+    ]
+    if "shyft" in settings.monitor.fetch_fallbacks:
+        endpoints.append(Endpoint("Shyft", TxDetailShyftFetcher().fetch, SHYFT_FETCH_COST))
+    return endpoints
+
 
 class TransactionDetailSubscriber:
     """
@@ -32,71 +52,41 @@ class TransactionDetailSubscriber:
         rpc_endpoint: str,
         redis_client: Redis,
         wallets: Sequence[Pubkey],
+        inline_parse: bool = True,
+        dedup: SignatureDeduplicator | None = None,
+        executor: Executor | None = None,
     ):
         self.wallets = wallets
         self.rpc_endpoint = rpc_endpoint
         self.redis = redis_client
+        self.inline_parse = inline_parse
+        self.pipeline = TxEventPipeline(redis_client, executor=executor)
         self.rpc_client: Client | None = None
         self.is_running = False
-        self.fetchers = [
-            (f"Raw-{i}", TxDetailRawFetcher(endpoint).fetch)
-            for i, endpoint in enumerate(settings.rpc.endpoints)
-        ]
+        self.fetcher = HedgedTxDetailFetcher(build_endpoints())
         self.lock = asyncio.Lock()
         self.account_log_monitor = AccountLogMonitor(
             self.wallets,
             settings.rpc.rpc_url,
             self.redis,
+            dedup=dedup,
+            max_subscriptions_per_connection=settings.monitor.wss_max_subscriptions_per_connection,
+            prefilter=settings.monitor.log_prefilter,
         )
 
     async def fetch_transaction_detail(self, tx_sig: str) -> dict | None:
-        tasks = []
-        for fetcher_name, fetcher in self.fetchers:
-            tasks.append(self._fetch_with_name(fetcher_name, fetcher, tx_sig))
-
         try:
-            remaining = set(tasks)
-            while remaining:
-                done, remaining = await asyncio.wait(remaining, return_when=asyncio.FIRST_COMPLETED)
-
-                # 检查完成的任务结果
-                for task in done:
-                    try:
-                        result = task.result()
-                        if result is not None:
-                            # 找到有效结果，取消剩余任务
-                            for t in remaining:
-                                t.cancel()
-                            return result
-                    except Exception:
-                        continue
-
-            # 所有任务都完成但没有找到有效结果
-            logger.error(f"Transaction not found: {tx_sig}")
-            return None
-
+            tx_detail = await self.fetcher.fetch(Signature.from_string(tx_sig))
         except Exception as e:
             logger.error(f"Failed to fetch transaction: {e}")
             logger.exception(e)
-            # 发生异常时取消所有未完成的任务
-            for task in tasks:
-                if not task.done():
-                    task.cancel()
             return None
 
-    async def _fetch_with_name(self, fetcher_name: str, fetcher, tx_sig: str) -> dict | None:
-        try:
-            logger.info(f"Fetching transaction from {fetcher_name}")
-            tx_detail = await fetcher(Signature.from_string(tx_sig))
-            if tx_detail is not None:
-                logger.info(f"Successfully fetched transaction from {fetcher_name}")
-                return tx_detail
-            logger.warning(f"Failed to fetch transaction from {fetcher_name}")
-            return None
-        except Exception as e:
-            logger.error(f"Error fetching from {fetcher_name}: {e}")
-            logger.exception(e)
-            return None
+        if tx_detail is None:
+            logger.error(f"Transaction not found: {tx_sig}")
+        elif recorder.enabled:
+            recorder.record(RecordKind.TX_DETAIL, json.dumps(tx_detail))
+        return tx_detail
 
     async def push_transaction_to_redis(self, tx_detail: str):
         assert self.redis is not None
@@ -116,6 +106,19 @@ class TransactionDetailSubscriber:
             await self.push_failed_transaction_to_redis(tx_sig)
             return
 
+        if self.inline_parse:
+            # 直接在当前 worker 中解析，跳过 tx_detail:new 的 Redis 往返
+            # 只有解析失败时才序列化交易详情，交由 TransactionWorker 重试
+            try:
+                await self.pipeline.process(
+                    RawTXParser(tx_detail),
+                    lambda: json.dumps(tx_detail).decode("utf-8"),
+                    spill_channel=NEW_TX_DETAIL_CHANNEL,
+                )
+            finally:
+                await benchmark.show_timeline(tx_sig)
+            return
+
         # 使用 orjson 的 dumps，它返回 bytes，需要解码为 str
         tx_detail_text = json.dumps(tx_detail).decode("utf-8")
         try:
@@ -191,6 +194,26 @@ class TransactionDetailSubscriber:
         """
         await self.account_log_monitor.waitting_subscribe_wallet.put(wallet)
 
+    async def subscribe_many(self, wallets: Iterable[Pubkey]) -> None:
+        """批量订阅钱包的交易信息。
+
+        logsSubscribe 每个请求只能订阅一个地址，这里只是批量放入待订阅队列。
+
+        Args:
+            wallets (Iterable[Pubkey]): 要订阅的钱包地址
+        """
+        for wallet in wallets:
+            self.account_log_monitor.waitting_subscribe_wallet.put_nowait(wallet)
+
+    async def unsubscribe_many(self, wallets: Iterable[Pubkey]) -> None:
+        """批量取消订阅钱包的交易信息。
+
+        Args:
+            wallets (Iterable[Pubkey]): 要取消订阅的钱包地址
+        """
+        for wallet in wallets:
+            self.account_log_monitor.waitting_unsubscribe_wallet.put_nowait(wallet)
+
     async def unsubscribe_wallet_transactions(self, wallet: Pubkey) -> None:
         """取消订阅钱包的交易信息。
 
@@ -103,15 +103,87 @@ class WalletConfig(BaseModel):
         return Keypair.from_base58_string(self.private_key)
 
 
+class ClusterConfig(BaseModel):
+    # 多节点部署时开启，各节点通过 Redis 租约认领钱包分区，只订阅自己的分区
+    enable: bool = False
+    node_id: str = ""  # 节点 id，为空时使用 主机名-进程号
+    partitions: int = 64  # 钱包分区数量，所有节点必须一致
+    lease_ttl: float = 5  # 分区租约有效期（秒），节点宕机后其分区在该时间后被其他节点接管
+    renew_interval: float = 1  # 续约和重新平衡分区的间隔（秒）
+
+
+class RatePolicyConfig(BaseModel):
+    # 每个钱包的 TxEvent 发送策略: pass 直接发送, coalesce 合并同一 mint 的事件, sample 采样发送
+    default: str = "pass"
+    # 每分钟事件数超过该值的钱包使用 hyperactive_policy，0 表示不按速率切换策略
+    hyperactive_threshold: float = 0
+    hyperactive_policy: str = "coalesce"
+    coalesce_window: float = 5  # 合并同一钱包同一 mint 事件的时间窗口（秒）
+    sample_rate: float = 0.1  # sample 策略发送的事件比例，开仓和清仓事件总是发送
+    wallets: dict[str, str] = Field(default_factory=dict)  # 钱包地址 -> 单独指定的策略
+
+    @field_validator("default", "hyperactive_policy", mode="after")
+    def validate_policy(cls, value: str) -> str:
+        if value.lower() not in ["pass", "coalesce", "sample"]:
+            raise ValueError(f"Invalid rate policy: {value}")
+        return value.lower()
+
+    @field_validator("wallets", mode="after")
+    def validate_wallets(cls, value: dict[str, str]) -> dict[str, str]:
+        for wallet, policy in value.items():
+            if policy.lower() not in ["pass", "coalesce", "sample"]:
+                raise ValueError(f"Invalid rate policy for {wallet}: {policy}")
+        return {wallet: policy.lower() for wallet, policy in value.items()}
+
+
 class MonitorConfig(BaseModel):
     model_config = ConfigDict(arbitrary_types_allowed=True)
 
-    mode: str = "wss"  # or "geyser"
+    mode: str = "wss"  # or "geyser", "stream"
     wallets: list[Pubkey] = Field(default_factory=list)
+    # 订阅端直接解析交易并发送 TxEvent，tx_detail:new 列表只用于解析失败时的 spill
+    inline_parse: bool = True
+    # TransactionWorker 配置
+    tx_workers: int = 2  # 并发拉取 tx_detail:new 的协程数
+    tx_worker_batch_size: int = 32  # 每次从 Redis 列表中批量拉取的交易数
+    # 解析交易的进程数，订阅端 inline 解析和 TransactionWorker 共享，0 表示在事件循环中直接解析
+    tx_parse_processes: int = 0
+    tx_worker_stats_interval: int = 10  # 吞吐量、队列长度统计的输出间隔（秒）
+    # 交易签名去重配置
+    dedup_maxsize: int = 100_000  # 本地最多记录的签名数量
+    dedup_ttl: int = 300  # 去重时间窗口（秒）
+    # 是否通过 Redis 在多个节点之间共享去重状态，未设置时跟随 cluster.enable，
+    # 单节点部署不会为每笔交易多一次 Redis SET NX
+    dedup_shared: bool | None = None
+    # TxEvent 附带代币信息（symbol、路由提示、池子），下游服务可以跳过查询
+    enrich_tokens: bool = True
+    enrich_cache_size: int = 10_000  # 进程内最多缓存的代币数量
+    enrich_ttl: int = 300  # 路由信息的缓存时间（秒），代币毕业后路由会变化
+    # RPC 节点都拉取失败时使用的第三方接口，可选 shyft
+    # （Solscan 返回的不是 getTransaction 格式，无法交给 RawTXParser 解析）
+    fetch_fallbacks: list[str] = Field(default_factory=list)
+    # wss 模式下单个 websocket 连接最多订阅的钱包数量，超过后建立新的连接
+    wss_max_subscriptions_per_connection: int = 1000
+    # wss 模式下根据日志丢弃失败的交易和没有调用 swap 程序的交易，不再拉取交易详情。
+    # 只识别 SWAP_PROGRAMS 中的程序，PumpSwap AMM、Orca、Raydium CPMM/CLMM 等的交易也会被丢弃，默认关闭
+    log_prefilter: bool = False
+    # stream 模式下支持 transactionSubscribe 的 websocket 节点（如 Helius），
+    # 为空时使用第一个 RPC 节点
+    stream_endpoint: str = ""
+    stream_workers: int = 2  # stream 模式下解析推送交易的 worker 数量
+    # 延迟统计配置
+    benchmark_flush_interval: int = 60  # 各阶段延迟分位数的聚合间隔（秒）
+    benchmark_max_snapshots: int = 1440  # Redis 中最多保留的聚合快照数量
+    benchmark_sample_rate: float = 0.01  # 记录完整时间线的交易比例
+    benchmark_timeline_ttl: int = 3600  # 采样交易时间线的保留时间（秒）
+    # 将订阅端收到的原始消息录制到该文件（gzip），用于 python -m wallet_tracker.replay 回放，为空时不录制
+    record_path: str = ""
+    cluster: ClusterConfig = Field(default_factory=ClusterConfig)
+    rate_policy: RatePolicyConfig = Field(default_factory=RatePolicyConfig)
 
     @field_validator("mode", mode="after")
     def validate_mode(cls, value: str) -> str:
-        if value.lower() not in ["wss", "geyser"]:
+        if value.lower() not in ["wss", "geyser", "stream"]:
             raise ValueError(f"Invalid mode: {value}")
         return value
 
@@ -124,6 +196,30 @@ class GeyserConfig(BaseModel):
     enable: bool = False
     endpoint: str = ""
     api_key: str = ""
+    shards: int = 1  # 订阅流数量，被跟踪的钱包通过一致性哈希分配到各个订阅流
+    workers: int = 2  # 处理推送的最少 worker 数量
+    max_workers: int = 8  # 队列等待时间过长时，worker 最多扩容到的数量
+    queue_size: int = 1000  # 响应队列长度
+    overload_policy: str = "spill"  # 队列满时的处理策略: block, shed, spill
+    scale_up_latency_ms: int = 200  # 队列等待时间超过该值时扩容 worker
+    # 服务端过滤：只订阅调用了 SWAP_PROGRAMS 的交易，每个程序占用一个过滤器
+    filter_swap_programs: bool = False
+    account_required: list[str] = Field(default_factory=list)  # 交易必须同时包含的账户
+    signer_only: bool = True  # 只处理签名者是被跟踪钱包的交易
+    # 订阅策略: wallets 按钱包订阅, programs 订阅 SWAP_PROGRAMS 的所有交易并在本地匹配签名者
+    strategy: str = "wallets"
+
+    @field_validator("overload_policy", mode="after")
+    def validate_overload_policy(cls, value: str) -> str:
+        if value.lower() not in ["block", "shed", "spill"]:
+            raise ValueError(f"Invalid overload policy: {value}")
+        return value.lower()
+
+    @field_validator("strategy", mode="after")
+    def validate_strategy(cls, value: str) -> str:
+        if value.lower() not in ["wallets", "programs"]:
+            raise ValueError(f"Invalid strategy: {value}")
+        return value.lower()
 
 
 class RPCConfig(BaseModel):
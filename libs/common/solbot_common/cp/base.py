@@ -1,6 +1,6 @@
 import asyncio
 import time
-from collections.abc import Callable, Coroutine
+from collections.abc import Callable, Coroutine, Iterable
 from typing import Any, Generic, Protocol, TypeVar
 
 import aioredis
@@ -17,6 +17,10 @@ class DataProtocol(Protocol):
 
 T = TypeVar("T", bound=DataProtocol)
 MAX_PROCESS_TIME = 15
+# Keep about the last 10k events. Approximate trimming (MAXLEN ~, also the
+# aioredis default) lets Redis drop whole radix tree nodes instead of trimming
+# on every XADD
+STREAM_MAXLEN = 10000
 
 
 class Producer(Generic[T]):
@@ -33,9 +37,103 @@ class Producer(Generic[T]):
         await self.redis.xadd(
             name=self.channel,
             fields={"data": data.to_json(), "timestamp": int(time.time())},
-            maxlen=10000,  # Keep last 10k events
+            maxlen=STREAM_MAXLEN,
+            approximate=True,
         )
 
+    async def produce_many(self, items: Iterable[T]) -> None:
+        """Produces multiple events in a single pipelined round trip.
+
+        Args:
+            items: Events to add to the stream, in order
+        """
+        timestamp = int(time.time())
+        async with self.redis.pipeline(transaction=False) as pipe:
+            for data in items:
+                pipe.xadd(
+                    name=self.channel,
+                    fields={"data": data.to_json(), "timestamp": timestamp},
+                    maxlen=STREAM_MAXLEN,
+                    approximate=True,
+                )
+            await pipe.execute()
+
+
+class AckBatcher:
+    """Batches XACKs of a consumer group.
+
+    Message ids are acknowledged with a single XACK once ``max_batch`` ids are
+    pending or ``interval`` seconds after the first pending id, whichever comes
+    first. Delivery stays at-least-once: ids that were not acknowledged before a
+    crash remain in the pending entries list and are processed again.
+    """
+
+    def __init__(
+        self,
+        redis_client: aioredis.Redis,
+        channel: str,
+        consumer_group: str,
+        max_batch: int = 100,
+        interval: float = 0.05,
+    ) -> None:
+        """
+        Args:
+            redis_client: Redis client instance
+            channel: Stream name
+            consumer_group: Name of the consumer group
+            max_batch: Flush once this many ids are pending, 1 disables batching
+            interval: Maximum delay in seconds before a pending id is acknowledged
+        """
+        self.redis = redis_client
+        self.channel = channel
+        self.consumer_group = consumer_group
+        self.max_batch = max_batch
+        self.interval = interval
+        self.pending: list[str] = []
+        self._timer: asyncio.TimerHandle | None = None
+        self._flushes: set[asyncio.Task] = set()
+        # 统计
+        self.acked = 0
+        self.round_trips = 0
+
+    async def ack(self, message_id: str) -> None:
+        """Schedules the acknowledgement of a processed message."""
+        self.pending.append(message_id)
+        if len(self.pending) >= self.max_batch:
+            await self.flush()
+        elif self._timer is None:
+            self._timer = asyncio.get_running_loop().call_later(
+                self.interval, self._flush_in_background
+            )
+
+    def _flush_in_background(self) -> None:
+        self._timer = None
+        task = asyncio.create_task(self.flush())
+        self._flushes.add(task)
+        task.add_done_callback(self._flushes.discard)
+
+    async def flush(self) -> None:
+        """Acknowledges all pending ids with a single XACK."""
+        if self._timer is not None:
+            self._timer.cancel()
+            self._timer = None
+        if not self.pending:
+            return
+        message_ids, self.pending = self.pending, []
+        try:
+            await self.redis.xack(self.channel, self.consumer_group, *message_ids)
+            self.acked += len(message_ids)
+            self.round_trips += 1
+        except Exception as e:
+            # 未确认的消息留在 pending 列表中，重启后由 process_pending 重新处理
+            logger.error(f"Error acknowledging {len(message_ids)} messages: {e}")
+
+    async def close(self) -> None:
+        """Flushes the remaining ids and waits for background flushes."""
+        await self.flush()
+        if self._flushes:
+            await asyncio.gather(*self._flushes, return_exceptions=True)
+
 
 class Consumer(Generic[T]):
     def __init__(
@@ -49,6 +147,8 @@ class Consumer(Generic[T]):
         poll_timeout_ms: int = 5000,
         max_retries: int = 3,
         dead_letter_channel: str | None = None,
+        ack_batch_size: int = 100,
+        ack_interval: float = 0.05,
     ) -> None:
         """Initialize the transaction event consumer.
 
@@ -60,6 +160,8 @@ class Consumer(Generic[T]):
             poll_timeout_ms: Timeout in milliseconds for blocking read
             max_retries: Maximum number of retries for failed messages
             dead_letter_channel: Channel name for dead letter queue
+            ack_batch_size: Number of acknowledgements sent in one XACK
+            ack_interval: Maximum delay in seconds before a message is acknowledged
         """
         self.channel = channel
         self.data_class = data_class
@@ -72,6 +174,9 @@ class Consumer(Generic[T]):
         self.dead_letter_channel = dead_letter_channel or f"{channel}:dead"
         self.is_running = False
         self.callback: Callable[[T], Coroutine[Any, Any, None]] | None = None
+        self.acker = AckBatcher(
+            redis_client, channel, consumer_group, max_batch=ack_batch_size, interval=ack_interval
+        )
 
     async def setup(self) -> None:
         """Setup the consumer group if it doesn't exist."""
@@ -203,7 +308,7 @@ class Consumer(Generic[T]):
                 await self.callback(data)
 
             # Acknowledge the message on successful processing
-            await self.redis.xack(self.channel, self.consumer_group, message_id)
+            await self.acker.ack(message_id)
 
         except Exception as e:
             logger.exception(f"Error processing message {message_id}: {e}")
@@ -223,7 +328,7 @@ class Consumer(Generic[T]):
             # Add back to stream for retry
             await self.redis.xadd(self.channel, fields)
             # Acknowledge the original message
-            await self.redis.xack(self.channel, self.consumer_group, message_id)
+            await self.acker.ack(message_id)
 
     async def _move_to_dead_letter(self, message_id: str, fields: dict, error: str) -> None:
         """Move a message to the dead letter queue.
@@ -286,6 +391,7 @@ class Consumer(Generic[T]):
             except Exception as e:
                 logger.error(f"Error reading from stream: {e}")
                 await asyncio.sleep(1)  # Avoid tight loop on errors
+        await self.acker.close()
 
     def stop(self) -> None:
         """Stop consuming messages."""
@@ -311,6 +417,8 @@ class ConsumerProducerBuilder(Generic[T]):
         poll_timeout_ms: int = 5000,
         max_retries: int = 3,
         dead_letter_channel: str | None = None,
+        ack_batch_size: int = 100,
+        ack_interval: float = 0.05,
     ) -> Consumer[T]:
         return Consumer(
             channel=self.channel,
@@ -322,6 +430,8 @@ class ConsumerProducerBuilder(Generic[T]):
             poll_timeout_ms=poll_timeout_ms,
             max_retries=max_retries,
             dead_letter_channel=dead_letter_channel,
+            ack_batch_size=ack_batch_size,
+            ack_interval=ack_interval,
         )
 
     # def build_producer(self) -> Producer[T]:
@@ -0,0 +1,120 @@
+import asyncio
+import time
+from collections import deque
+from collections.abc import Awaitable, Callable, Hashable
+
+from loguru import logger
+
+Job = Callable[[], Awaitable[None]]
+
+
+class KeyedExecutor:
+    """Runs jobs with the same key sequentially and jobs with different keys in parallel.
+
+    - At most ``max_concurrency`` jobs run at the same time across all keys
+    - At most ``max_pending`` jobs are queued or running; ``submit`` waits for a
+      free slot beyond that, which applies backpressure to the stream reader
+    - Jobs of one key run in submission order, so e.g. a wallet's BUY and SELL
+      of the same mint are processed in the order they were produced
+    """
+
+    def __init__(
+        self,
+        max_concurrency: int = 10,
+        max_pending: int = 1000,
+        latency_window: int = 1000,
+    ) -> None:
+        """
+        Args:
+            max_concurrency: Maximum number of jobs running at the same time
+            max_pending: Maximum number of jobs queued or running
+            latency_window: Number of recent queue times kept for the metrics
+        """
+        if max_concurrency < 1:
+            raise ValueError("max_concurrency must be greater than 0")
+        self.max_concurrency = max_concurrency
+        self.max_pending = max(max_pending, max_concurrency)
+        self._concurrency = asyncio.Semaphore(max_concurrency)
+        self._slots = asyncio.Semaphore(self.max_pending)
+        # key -> [(提交时间, job)]，key 存在时表示该 key 有正在运行的协程
+        self._queues: dict[Hashable, deque[tuple[float, Job]]] = {}
+        self._runners: set[asyncio.Task] = set()
+
+        # 统计
+        self.in_flight = 0
+        self.pending = 0
+        self.completed = 0
+        self.failed = 0
+        # 从提交到开始执行的等待时间（秒），包括等待同一 key 的前序任务和全局并发
+        self.queue_times: deque[float] = deque(maxlen=latency_window)
+        self.max_queue_time = 0.0
+
+    async def submit(self, key: Hashable, job: Job) -> None:
+        """Queues a job after the previously submitted jobs of the same key."""
+        await self._slots.acquire()
+        self.pending += 1
+        queue = self._queues.get(key)
+        if queue is not None:
+            queue.append((time.monotonic(), job))
+            return
+        self._queues[key] = deque([(time.monotonic(), job)])
+        runner = asyncio.create_task(self._run(key))
+        self._runners.add(runner)
+        runner.add_done_callback(self._runners.discard)
+
+    async def _run(self, key: Hashable) -> None:
+        queue = self._queues[key]
+        try:
+            while queue:
+                async with self._concurrency:
+                    submitted_at, job = queue.popleft()
+                    queue_time = time.monotonic() - submitted_at
+                    self.queue_times.append(queue_time)
+                    self.max_queue_time = max(self.max_queue_time, queue_time)
+                    self.pending -= 1
+                    self.in_flight += 1
+                    try:
+                        await job()
+                        self.completed += 1
+                    except Exception as e:
+                        self.failed += 1
+                        logger.exception(f"Error running job of key {key}: {e}")
+                    finally:
+                        self.in_flight -= 1
+                        self._slots.release()
+        finally:
+            # 被取消时释放还在排队的任务占用的名额
+            for _ in queue:
+                self.pending -= 1
+                self._slots.release()
+            del self._queues[key]
+
+    async def join(self) -> None:
+        """Waits until all submitted jobs have finished."""
+        while self._runners:
+            await asyncio.gather(*self._runners, return_exceptions=True)
+
+    async def cancel(self) -> None:
+        """Cancels the running and queued jobs."""
+        for runner in self._runners:
+            runner.cancel()
+        await asyncio.gather(*self._runners, return_exceptions=True)
+
+    def get_stats(self) -> dict:
+        queue_times = sorted(self.queue_times)
+
+        def percentile(p: float) -> float:
+            if not queue_times:
+                return 0.0
+            return queue_times[min(len(queue_times) - 1, int(p * len(queue_times)))] * 1000
+
+        return {
+            "in_flight": self.in_flight,
+            "pending": self.pending,
+            "keys": len(self._queues),
+            "completed": self.completed,
+            "failed": self.failed,
+            "queue_time_p50_ms": round(percentile(0.5), 2),
+            "queue_time_p99_ms": round(percentile(0.99), 2),
+            "queue_time_max_ms": round(self.max_queue_time * 1000, 2),
+        }
@@ -5,6 +5,7 @@ from typing import Any
 
 import aioredis
 
+from solbot_common.cp.base import STREAM_MAXLEN
 from solbot_common.log import logger
 from solbot_common.types import SwapEvent
 
@@ -27,7 +28,8 @@ class SwapEventProducer:
             await self.redis.xadd(
                 name=SWAP_EVENT_CHANNEL,
                 fields={"data": swap_event.to_json(), "timestamp": int(time.time())},
-                maxlen=10000,  # Keep last 10k events
+                maxlen=STREAM_MAXLEN,
+                approximate=True,
             )
         except Exception as e:
             # Log error but don't re-raise to avoid disrupting the producer
@@ -1,9 +1,13 @@
 import asyncio
-from collections.abc import Callable, Coroutine
+import time
+from collections.abc import Callable, Coroutine, Iterable
+from functools import partial
 from typing import Any
 
 import aioredis
 
+from solbot_common.cp.base import STREAM_MAXLEN, AckBatcher
+from solbot_common.cp.executor import KeyedExecutor
 from solbot_common.log import logger
 from solbot_common.types.tx import TxEvent
 
@@ -24,12 +28,32 @@ class TxEventProducer:
             await self.redis.xadd(
                 name=NEW_TX_EVENT_CHANNEL,
                 fields={"data": tx_event.to_json()},
-                maxlen=10000,  # Keep last 10k events
+                maxlen=STREAM_MAXLEN,
+                approximate=True,
             )
         except Exception as e:
             # Log error but don't re-raise to avoid disrupting the producer
             logger.error(f"Error producing tx event to Redis Stream: {e}")
 
+    async def produce_many(self, tx_events: Iterable[TxEvent]) -> None:
+        """Produces multiple transaction events in a single pipelined round trip.
+
+        Args:
+            tx_events: Transaction events to add to the stream, in order
+        """
+        try:
+            async with self.redis.pipeline(transaction=False) as pipe:
+                for tx_event in tx_events:
+                    pipe.xadd(
+                        name=NEW_TX_EVENT_CHANNEL,
+                        fields={"data": tx_event.to_json()},
+                        maxlen=STREAM_MAXLEN,
+                        approximate=True,
+                    )
+                await pipe.execute()
+        except Exception as e:
+            logger.error(f"Error producing tx events to Redis Stream: {e}")
+
 
 class TxEventConsumer:
     def __init__(
@@ -40,15 +64,28 @@ class TxEventConsumer:
         batch_size: int = 10,
         poll_timeout_ms: int = 5000,
         max_concurrent_tasks: int = 10,
+        ack_batch_size: int = 100,
+        ack_interval: float = 0.05,
+        max_pending_tasks: int = 1000,
+        stats_interval: float = 60,
     ) -> None:
         """Initialize the transaction event consumer.
 
+        Events of the same wallet and mint are processed in stream order,
+        events of different wallets or mints are processed in parallel.
+
         Args:
             redis_client: Redis client instance
             consumer_group: Name of the consumer group
             consumer_name: Unique name for this consumer instance
             batch_size: Number of events to process in one batch
             poll_timeout_ms: Timeout in milliseconds for blocking read
+            max_concurrent_tasks: Maximum number of events processed at the same time
+            ack_batch_size: Number of acknowledgements sent in one XACK
+            ack_interval: Maximum delay in seconds before a message is acknowledged
+            max_pending_tasks: Maximum number of events read but not yet processed,
+                reading from the stream pauses beyond that
+            stats_interval: Interval in seconds between stats logs, 0 disables them
         """
         self.redis = redis_client
         self.consumer_group = consumer_group
@@ -57,8 +94,17 @@ class TxEventConsumer:
         self.poll_timeout_ms = poll_timeout_ms
         self.is_running = False
         self.callback: Callable[[TxEvent], Coroutine[Any, Any, None]] | None = None
-        self.task_pool = set()
-        self.semaphore = asyncio.Semaphore(max_concurrent_tasks)
+        self.executor = KeyedExecutor(
+            max_concurrency=max_concurrent_tasks, max_pending=max_pending_tasks
+        )
+        self.stats_interval = stats_interval
+        self.acker = AckBatcher(
+            redis_client,
+            NEW_TX_EVENT_CHANNEL,
+            consumer_group,
+            max_batch=ack_batch_size,
+            interval=ack_interval,
+        )
 
     async def setup(self) -> None:
         """Setup the consumer group if it doesn't exist."""
@@ -105,6 +151,17 @@ class TxEventConsumer:
         except Exception as e:
             logger.error(f"Error processing pending messages: {e}")
 
+    def _decode(self, message_id: str, fields: dict) -> TxEvent | None:
+        data = fields.get("data")
+        if data is None:
+            logger.warning(f"Data is None, message_id: {message_id}")
+            return None
+        try:
+            return TxEvent.from_json(data)
+        except Exception as e:
+            logger.exception(f"Error decoding message {message_id}: {e}")
+            return None
+
     async def _process_message(self, message_id: str, fields: dict) -> None:
         """Process a single message and acknowledge it.
 
@@ -112,25 +169,34 @@ class TxEventConsumer:
             message_id: ID of the message in Redis Stream
             fields: Message fields containing the event data
         """
+        tx_event = self._decode(message_id, fields)
+        if tx_event is not None:
+            await self._process_event(message_id, tx_event)
+
+    async def _process_event(self, message_id: str, tx_event: TxEvent) -> None:
         try:
             if self.callback is not None:
-                data = fields["data"]
-                if data is None:
-                    logger.warning(f"Data is None, message_id: {message_id}")
-                    return
-                tx_event = TxEvent.from_json(data)
                 await self.callback(tx_event)
             # Acknowledge the message
-            await self.redis.xack(NEW_TX_EVENT_CHANNEL, self.consumer_group, message_id)
+            await self.acker.ack(message_id)
         except Exception as e:
             logger.exception(f"Error processing message {message_id}: {e}")
             # Could implement retry logic here
 
-    def _create_task(self, message_id: str, fields: dict) -> None:
-        """创建新的异步任务来处理消息"""
-        task = asyncio.create_task(self._process_message(message_id, fields))
-        self.task_pool.add(task)
-        task.add_done_callback(self.task_pool.discard)
+    async def _submit(self, message_id: str, fields: dict) -> None:
+        """按钱包和代币排队处理消息，同一钱包同一代币的事件按顺序处理"""
+        tx_event = self._decode(message_id, fields)
+        if tx_event is None:
+            return
+        key = (tx_event.who, tx_event.mint)
+        await self.executor.submit(key, partial(self._process_event, message_id, tx_event))
+
+    def get_stats(self) -> dict:
+        return {
+            **self.executor.get_stats(),
+            "acked": self.acker.acked,
+            "ack_round_trips": self.acker.round_trips,
+        }
 
     async def start(self) -> None:
         """Start consuming messages from the stream."""
@@ -144,6 +210,7 @@ class TxEventConsumer:
         await self.process_pending()
 
         # Then start processing new messages
+        last_stats = time.monotonic()
         while self.is_running:
             try:
                 # Read new messages
@@ -158,12 +225,19 @@ class TxEventConsumer:
                 if messages:
                     for stream, stream_messages in messages:
                         for message_id, fields in stream_messages:
-                            self._create_task(message_id, fields)
+                            await self._submit(message_id, fields)
+                if self.stats_interval and time.monotonic() - last_stats >= self.stats_interval:
+                    last_stats = time.monotonic()
+                    logger.info(f"{self.consumer_group} consumer stats: {self.get_stats()}")
             except asyncio.CancelledError:
+                await self.executor.cancel()
                 break
             except Exception as e:
                 logger.error(f"Error reading from stream: {e}")
                 await asyncio.sleep(1)  # Avoid tight loop on errors
+        # 正常停止时处理完已读取的消息，被取消时未确认的消息留在 pending 列表中
+        await self.executor.join()
+        await self.acker.close()
 
     def stop(self) -> None:
         """Stop consuming messages."""
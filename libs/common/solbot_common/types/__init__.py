@@ -1,11 +1,12 @@
 from .swap import SwapEvent, SwapResult
-from .tx import SolAmountChange, TokenAmountChange, TxEvent, TxType
+from .tx import SolAmountChange, TokenAmountChange, TokenEnrichment, TxEvent, TxType
 
 __all__ = [
     "SolAmountChange",
     "SwapEvent",
     "SwapResult",
     "TokenAmountChange",
+    "TokenEnrichment",
     "TxEvent",
     "TxType",
 ]
@@ -12,6 +12,23 @@ class TxType(Enum):
     CLOSE_POSITION = "close_position"  # 清仓
 
 
+@dataclass
+class TokenEnrichment:
+    """wallet-tracker 在解析交易时附带的代币信息，下游服务可以直接使用，跳过各自的查询
+
+    各字段未知时为 None，下游服务需要回退到原来的查询方式。
+    """
+
+    symbol: str | None = None
+    token_name: str | None = None
+    # 交易路由提示: pump 表示代币还在 Pump.fun bonding curve 上，
+    # raydium_v4 表示代币在 Raydium 上有池子（pool_id），dex 表示都没有找到
+    route: Literal["pump", "raydium_v4", "dex"] | None = None
+    pool_id: str | None = None
+    # 路由提示的查询时间（unix 时间戳），代币毕业后路由会变化，下游服务应忽略过旧的提示
+    resolved_at: float | None = None
+
+
 @dataclass
 class TxEvent:
     signature: str
@@ -27,6 +44,8 @@ class TxEvent:
     pre_token_amount: int
     post_token_amount: int
     program_id: str | None = None
+    slot: int | None = None  # 交易所在的 slot
+    enrichment: TokenEnrichment | None = None  # 代币信息，可能为空
 
     def to_json(self) -> str:
         return json.dumps(asdict(self)).decode("utf-8")
@@ -35,6 +54,8 @@ class TxEvent:
     def from_json(cls, tx_detail: str) -> "TxEvent":
         obj = cls(**json.loads(tx_detail))
         obj.tx_type = TxType(obj.tx_type)
+        if isinstance(obj.enrichment, dict):
+            obj.enrichment = TokenEnrichment(**obj.enrichment)
         return obj
 
 
@@ -0,0 +1,164 @@
+#!/usr/bin/env python3
+"""
+对比 logsNotification 的两种接收方式的吞吐量：
+
+- solana: solana.rpc.websocket_api.connect，每条消息反序列化为 solders 对象
+- raw: LogsConnection，基于 websockets + orjson 只提取需要的字段
+
+先单独测试解析速度，再通过本地 websocket 服务推送消息测试端到端吞吐量。
+
+    uv run python scripts/benchmark_logs_ingest.py --count 20000
+"""
+
+import argparse
+import asyncio
+import json
+import multiprocessing
+import time
+from pathlib import Path
+
+import websockets
+from solana.rpc.websocket_api import connect
+from solders.rpc.responses import LogsNotification, parse_websocket_message  # type: ignore
+from solders.signature import Signature  # type: ignore
+from wallet_tracker.wss.account_log_monitor import LogsConnection, decode_message
+
+TX_EXAMPLES = Path(__file__).parent.parent / "tests" / "wallet_tracker" / "tx_examples" / "raw"
+
+
+def build_frames(count: int) -> list[str]:
+    logs = []
+    for path in sorted(TX_EXAMPLES.glob("*.json")):
+        tx = json.loads(path.read_text())
+        tx = tx.get("result", tx)
+        logs.append(tx["meta"]["logMessages"])
+
+    frames = []
+    for i in range(count):
+        message = {
+            "jsonrpc": "2.0",
+            "method": "logsNotification",
+            "params": {
+                "result": {
+                    "context": {"slot": i},
+                    "value": {
+                        "signature": str(Signature.new_unique()),
+                        "err": None,
+                        "logs": logs[i % len(logs)],
+                    },
+                },
+                "subscription": 1,
+            },
+        }
+        frames.append(json.dumps(message))
+    return frames
+
+
+def bench_decode(frames: list[str]) -> None:
+    start = time.perf_counter()
+    for frame in frames:
+        parse_websocket_message(frame)
+    solana_elapsed = time.perf_counter() - start
+
+    start = time.perf_counter()
+    for frame in frames:
+        decode_message(frame)
+    raw_elapsed = time.perf_counter() - start
+
+    print("decode only:")
+    print(f"  solana: {len(frames) / solana_elapsed:>10.0f} msg/s")
+    print(f"  raw:    {len(frames) / raw_elapsed:>10.0f} msg/s")
+
+
+async def bench_solana(url: str, count: int) -> tuple[float, float]:
+    received = 0
+    async with connect(url) as websocket:
+        await websocket.send("start")
+        start, cpu_start = time.perf_counter(), time.process_time()
+        while received < count:
+            for message in await websocket.recv():
+                if isinstance(message, LogsNotification):
+                    received += 1
+        return time.perf_counter() - start, time.process_time() - cpu_start
+
+
+async def bench_raw(url: str, count: int) -> tuple[float, float]:
+    done = asyncio.Event()
+    received = 0
+
+    async def on_log(message):
+        nonlocal received
+        received += 1
+        if received == count:
+            done.set()
+
+    connection = LogsConnection(0, url, on_log, 1)
+    task = asyncio.create_task(connection.run())
+    await connection.connected.wait()
+    assert connection.websocket is not None
+    await connection.websocket.send("start")
+    start, cpu_start = time.perf_counter(), time.process_time()
+    await done.wait()
+    elapsed, cpu_elapsed = time.perf_counter() - start, time.process_time() - cpu_start
+    await connection.close()
+    task.cancel()
+    return elapsed, cpu_elapsed
+
+
+def serve(frames: list[str], port: int) -> None:
+    """在独立进程中运行 websocket 服务，避免推送消息占用被测进程的 CPU"""
+
+    async def handler(websocket, *args):
+        async for _ in websocket:
+            # 收到 start 后推送所有消息
+            for frame in frames:
+                await websocket.send(frame)
+
+    async def _serve():
+        async with websockets.serve(handler, "127.0.0.1", port, max_size=None):
+            await asyncio.Future()
+
+    asyncio.run(_serve())
+
+
+async def bench_end_to_end(frames: list[str], port: int) -> None:
+    server = multiprocessing.Process(target=serve, args=(frames, port), daemon=True)
+    server.start()
+    url = f"ws://127.0.0.1:{port}"
+    try:
+        for _ in range(50):
+            try:
+                async with websockets.connect(url):
+                    break
+            except OSError:
+                await asyncio.sleep(0.1)
+        results = {
+            "solana": await bench_solana(url, len(frames)),
+            "raw": await bench_raw(url, len(frames)),
+        }
+    finally:
+        server.terminate()
+
+    # 本地服务推送消息的速度可能成为瓶颈，同时给出按客户端 CPU 时间计算的吞吐量，
+    # 即单核能处理的消息数
+    print("end to end (local websocket server):")
+    for name, (elapsed, cpu_elapsed) in results.items():
+        print(
+            f"  {name + ':':<7} {len(frames) / elapsed:>10.0f} msg/s, "
+            f"{len(frames) / cpu_elapsed:>10.0f} msg/cpu-s"
+        )
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument("--count", type=int, default=20000, help="notifications to send")
+    parser.add_argument("--port", type=int, default=18900, help="local websocket server port")
+    args = parser.parse_args()
+
+    frames = build_frames(args.count)
+    bench_decode(frames)
+    asyncio.run(bench_end_to_end(frames, args.port))
+
+
+if __name__ == "__main__":
+    main()
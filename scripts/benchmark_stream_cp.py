@@ -0,0 +1,123 @@
+#!/usr/bin/env python3
+"""
+对比 tx_event:new Redis Stream 生产、消费两种方式的吞吐量（需要本地 Redis）：
+
+- before: 每个事件一次 XADD，每条消息一次 XACK
+- after: Producer.produce_many 通过 pipeline 批量 XADD，AckBatcher 批量 XACK
+
+两种方式都使用 MAXLEN ~ 近似裁剪（aioredis 的 xadd 默认 approximate=True）。
+
+    uv run python scripts/benchmark_stream_cp.py --count 20000 --redis redis://localhost:6379/15
+"""
+
+import argparse
+import asyncio
+import time
+
+import aioredis
+from solbot_common.cp.base import STREAM_MAXLEN, AckBatcher, Producer
+from solbot_common.types.tx import TxEvent, TxType
+
+STREAM = "benchmark:tx_event"
+GROUP = "benchmark"
+
+
+def build_events(count: int) -> list[TxEvent]:
+    return [
+        TxEvent(
+            signature=f"sig-{i}",
+            from_amount=1_000_000_000,
+            from_decimals=9,
+            to_amount=123_456_789,
+            to_decimals=6,
+            mint="8qAbzjWBxD2kxnNwE9voR9Xkr2zT8mg1aM6ri34Jpump",
+            who="DfMxre4cKmvogbLrPigxmibVTTQDuzjdXojWzjCXXhzj",
+            tx_type=TxType.ADD_POSITION,
+            tx_direction="buy",
+            timestamp=int(time.time()),
+            pre_token_amount=1,
+            post_token_amount=123_456_790,
+        )
+        for i in range(count)
+    ]
+
+
+async def reset(redis: aioredis.Redis) -> None:
+    await redis.delete(STREAM)
+    await redis.xgroup_create(STREAM, GROUP, id="$", mkstream=True)
+
+
+async def produce_before(redis: aioredis.Redis, events: list[TxEvent], batch: int) -> None:
+    for tx_event in events:
+        await redis.xadd(
+            STREAM,
+            {"data": tx_event.to_json(), "timestamp": int(time.time())},
+            maxlen=STREAM_MAXLEN,
+        )
+
+
+async def produce_after(redis: aioredis.Redis, events: list[TxEvent], batch: int) -> None:
+    producer: Producer[TxEvent] = Producer(redis, STREAM)
+    for start in range(0, len(events), batch):
+        await producer.produce_many(events[start : start + batch])
+
+
+async def consume(redis: aioredis.Redis, count: int, batch: int, acker: AckBatcher | None) -> None:
+    consumed = 0
+    while consumed < count:
+        messages = await redis.xreadgroup(GROUP, "bench", {STREAM: ">"}, count=batch, block=1000)
+        if not messages:
+            break
+        for _, stream_messages in messages:
+            for message_id, fields in stream_messages:
+                TxEvent.from_json(fields["data"])
+                if acker is None:
+                    await redis.xack(STREAM, GROUP, message_id)
+                else:
+                    await acker.ack(message_id)
+                consumed += 1
+    if acker is not None:
+        await acker.close()
+
+
+async def run(mode: str, redis: aioredis.Redis, events: list[TxEvent], batch: int) -> None:
+    await reset(redis)
+    produce = produce_before if mode == "before" else produce_after
+    start = time.perf_counter()
+    await produce(redis, events, batch)
+    produce_elapsed = time.perf_counter() - start
+
+    # 流的长度不超过 MAXLEN 时两种裁剪方式都不会删除消息，消费全部写入的事件
+    count = min(len(events), await redis.xlen(STREAM))
+    acker = None if mode == "before" else AckBatcher(redis, STREAM, GROUP, max_batch=batch)
+    start = time.perf_counter()
+    await consume(redis, count, batch, acker)
+    consume_elapsed = time.perf_counter() - start
+    pending = (await redis.xpending(STREAM, GROUP))["pending"]
+    print(
+        f"{mode:>6}: produce {len(events) / produce_elapsed:>9.0f} events/s, "
+        f"consume+ack {count / consume_elapsed:>9.0f} events/s, pending after run: {pending}"
+    )
+
+
+async def main() -> None:
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--count", type=int, default=20000)
+    parser.add_argument(
+        "--batch", type=int, default=100, help="pipeline / XREADGROUP / XACK 批量大小"
+    )
+    parser.add_argument("--redis", default="redis://localhost:6379/15")
+    args = parser.parse_args()
+
+    redis = aioredis.Redis.from_url(args.redis, decode_responses=True)
+    events = build_events(args.count)
+    try:
+        for mode in ("before", "after"):
+            await run(mode, redis, events, args.batch)
+    finally:
+        await redis.delete(STREAM)
+        await redis.close()
+
+
+if __name__ == "__main__":
+    asyncio.run(main())
@@ -0,0 +1,69 @@
+#!/usr/bin/env python3
+"""
+测试 Geyser programs 策略下本地匹配签名者的吞吐量
+
+模拟订阅 swap 程序后收到的交易推送，其中只有少部分交易的签名者是被跟踪的钱包，
+统计单核每秒能过滤的推送数量（包括订阅流字节统计）。
+pump.fun 高峰期大约每秒几千笔交易，匹配吞吐量需要远高于该值。
+
+    uv run python scripts/benchmark_wallet_matcher.py --wallets 50000 --updates 200000
+"""
+
+import argparse
+import random
+import time
+
+from solders.pubkey import Pubkey  # type: ignore
+from solders.signature import Signature  # type: ignore
+from wallet_tracker.geyser.filters import StreamStats
+from wallet_tracker.geyser.matcher import WalletMatcher
+from yellowstone_grpc.grpc import geyser_pb2
+
+# pump.fun 高峰期的交易速率
+PUMP_FUN_TPS = 5000
+
+
+def build_updates(
+    tracked: list[Pubkey], count: int, hit_rate: float
+) -> list[geyser_pb2.SubscribeUpdate]:
+    accounts = [bytes(Pubkey.new_unique()) for _ in range(16)]
+    updates = []
+    for _ in range(count):
+        if random.random() < hit_rate:
+            signer = bytes(random.choice(tracked))
+        else:
+            signer = bytes(Pubkey.new_unique())
+        response = geyser_pb2.SubscribeUpdate(filters=["programs"])
+        response.transaction.transaction.signature = bytes(Signature.new_unique())
+        message = response.transaction.transaction.transaction.message
+        message.account_keys.extend([signer, *accounts])
+        updates.append(response)
+    return updates
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument("--wallets", type=int, default=50_000, help="tracked wallets")
+    parser.add_argument("--updates", type=int, default=200_000, help="transaction updates")
+    parser.add_argument("--hit-rate", type=float, default=0.01, help="tracked signer ratio")
+    args = parser.parse_args()
+
+    tracked = [Pubkey.new_unique() for _ in range(args.wallets)]
+    start = time.perf_counter()
+    matcher = WalletMatcher(str(wallet) for wallet in tracked)
+    print(f"build matcher with {len(matcher)} wallets: {time.perf_counter() - start:.3f}s")
+
+    updates = build_updates(tracked, args.updates, args.hit_rate)
+    stats = StreamStats()
+    start = time.perf_counter()
+    for response in updates:
+        stats.observe(response.ByteSize(), matcher.match(response.transaction))
+    elapsed = time.perf_counter() - start
+
+    rate = len(updates) / elapsed
+    print(f"matched {stats.accepted_messages}/{stats.received_messages} updates")
+    print(f"throughput: {rate:.0f} updates/s ({rate / PUMP_FUN_TPS:.0f}x pump.fun peak)")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,187 @@
+import asyncio
+from dataclasses import replace
+
+import pytest
+from solbot_common.cp.base import STREAM_MAXLEN, AckBatcher, Producer
+from solbot_common.cp.executor import KeyedExecutor
+from solbot_common.cp.tx_event import NEW_TX_EVENT_CHANNEL, TxEventConsumer, TxEventProducer
+from solbot_common.types.tx import TxEvent, TxType
+
+TX_EVENT = TxEvent(
+    signature="sig",
+    from_amount=1,
+    from_decimals=9,
+    to_amount=1,
+    to_decimals=6,
+    mint="mint",
+    who="wallet",
+    tx_type=TxType.OPEN_POSITION,
+    tx_direction="buy",
+    timestamp=0,
+    pre_token_amount=0,
+    post_token_amount=1,
+)
+
+
+class RecordingRedis:
+    """记录发送到 Redis 的命令，每次 execute 或单独的命令算一次往返"""
+
+    def __init__(self):
+        self.round_trips: list[list[tuple]] = []
+
+    async def xack(self, *args):
+        self.round_trips.append([("xack", *args)])
+
+    async def xadd(self, **kwargs):
+        self.round_trips.append([("xadd", kwargs)])
+
+    def pipeline(self, transaction=True):
+        redis = self
+
+        class Pipeline:
+            def __init__(self):
+                self.commands = []
+
+            async def __aenter__(self):
+                return self
+
+            async def __aexit__(self, *args):
+                pass
+
+            def xadd(self, **kwargs):
+                self.commands.append(("xadd", kwargs))
+
+            async def execute(self):
+                redis.round_trips.append(self.commands)
+
+        return Pipeline()
+
+
+@pytest.mark.asyncio
+async def test_ack_batcher_flushes_on_count_and_timer():
+    redis = RecordingRedis()
+    acker = AckBatcher(redis, "stream", "group", max_batch=3, interval=0.02)  # type: ignore
+    for i in range(4):
+        await acker.ack(f"{i}-0")
+    assert redis.round_trips == [[("xack", "stream", "group", "0-0", "1-0", "2-0")]]
+
+    await asyncio.sleep(0.05)
+    assert redis.round_trips[-1] == [("xack", "stream", "group", "3-0")]
+
+    await acker.ack("4-0")
+    await acker.close()
+    assert redis.round_trips[-1] == [("xack", "stream", "group", "4-0")]
+    assert (acker.acked, acker.round_trips) == (5, 3)
+
+
+@pytest.mark.asyncio
+async def test_produce_many_uses_one_round_trip():
+    redis = RecordingRedis()
+    await TxEventProducer(redis).produce_many([TX_EVENT] * 3)  # type: ignore
+    await Producer(redis, "channel").produce_many([TX_EVENT] * 2)  # type: ignore
+    assert [len(commands) for commands in redis.round_trips] == [3, 2]
+    for commands in redis.round_trips:
+        for _, kwargs in commands:
+            assert kwargs["maxlen"] == STREAM_MAXLEN
+            assert kwargs["approximate"] is True
+
+
+@pytest.mark.asyncio
+async def test_keyed_executor_orders_per_key_and_bounds_concurrency():
+    executor = KeyedExecutor(max_concurrency=2, max_pending=4)
+    running = 0
+    max_running = 0
+    finished: list[tuple[str, int]] = []
+
+    def job(key: str, index: int, delay: float):
+        async def _run():
+            nonlocal running, max_running
+            running += 1
+            max_running = max(max_running, running)
+            await asyncio.sleep(delay)
+            running -= 1
+            finished.append((key, index))
+
+        return _run
+
+    # 同一个 key 的第一个任务最慢，仍然先完成
+    for index, delay in enumerate([0.03, 0.0, 0.01]):
+        await executor.submit("a", job("a", index, delay))
+    for index in range(3):
+        await executor.submit(index, job(str(index), 0, 0.01))
+    await executor.join()
+
+    assert [index for key, index in finished if key == "a"] == [0, 1, 2]
+    assert len(finished) == 6
+    assert max_running == 2
+    stats = executor.get_stats()
+    assert (stats["completed"], stats["in_flight"], stats["pending"], stats["keys"]) == (6, 0, 0, 0)
+    assert stats["queue_time_max_ms"] > 0
+
+
+@pytest.mark.asyncio
+async def test_keyed_executor_applies_backpressure():
+    executor = KeyedExecutor(max_concurrency=1, max_pending=2)
+    release = asyncio.Event()
+
+    async def blocked():
+        await release.wait()
+
+    await executor.submit("a", blocked)
+    await executor.submit("b", blocked)
+    submit = asyncio.create_task(executor.submit("c", blocked))
+    await asyncio.sleep(0.01)
+    assert not submit.done()
+    assert executor.get_stats()["in_flight"] == 1
+
+    release.set()
+    await submit
+    await executor.join()
+    assert executor.completed == 3
+
+
+class StreamRedis(RecordingRedis):
+    """第一次读取新消息时返回 messages，之后停止消费者"""
+
+    def __init__(self, messages: list[tuple[str, dict]]):
+        super().__init__()
+        self.messages = messages
+        self.consumer: TxEventConsumer | None = None
+
+    async def xgroup_create(self, **kwargs):
+        pass
+
+    async def xreadgroup(self, streams, **kwargs):
+        if ">" not in streams.values():
+            return []
+        if not self.messages:
+            assert self.consumer is not None
+            self.consumer.stop()
+            return []
+        messages, self.messages = self.messages, []
+        return [(NEW_TX_EVENT_CHANNEL, messages)]
+
+
+@pytest.mark.asyncio
+async def test_tx_event_consumer_keeps_order_of_same_wallet_and_mint():
+    buy = replace(TX_EVENT, signature="buy")
+    sell = replace(TX_EVENT, signature="sell", tx_type=TxType.CLOSE_POSITION, tx_direction="sell")
+    other = replace(TX_EVENT, signature="other", mint="other")
+    events = [buy, sell, other]
+    redis = StreamRedis([(str(i), {"data": event.to_json()}) for i, event in enumerate(events)])
+    consumer = TxEventConsumer(redis, "group", "consumer")  # type: ignore
+    redis.consumer = consumer
+    handled: list[str] = []
+
+    async def callback(tx_event: TxEvent):
+        # 买入处理得最慢，同一钱包同一代币的卖出仍在其后处理
+        await asyncio.sleep(0.03 if tx_event.signature == "buy" else 0)
+        handled.append(tx_event.signature)
+
+    consumer.register_callback(callback)
+    await consumer.start()
+
+    assert handled == ["other", "buy", "sell"]
+    assert consumer.get_stats()["completed"] == 3
+    # 停止时处理完已读取的消息并批量确认
+    assert [sorted(commands[0][3:]) for commands in redis.round_trips] == [["0", "1", "2"]]
@@ -96,6 +96,7 @@ def swap_event_from_logs_second():
         priority_fee=None,
         amount=1000,
         timestamp=0,
+        tx_event=None,
     )
 
 
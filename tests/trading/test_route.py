@@ -1,8 +1,11 @@
 """Tests for the trading route finding logic. This uses actual RPC client (and connects to the network)"""
 
 
+import time
+
 import pytest
 from solbot_common.constants import PUMP_FUN_PROGRAM
+from solbot_common.types.tx import TokenEnrichment
 
 from app.trading.trading.transaction import TradingRoute
 
@@ -19,4 +22,29 @@ async def test_find_route(executor, request, swap_event_fixture, expected_route)
     swap_event = request.getfixturevalue(swap_event_fixture)
     route = await executor.find_route(swap_event)
     assert route == expected_route
- 
\ No newline at end of file
+ 
+
+@pytest.mark.asyncio
+async def test_find_route_uses_route_hint(executor, swap_event_from_logs):
+    """The route hint attached by wallet-tracker skips the graduation status lookup"""
+    # The lookup would fail and fall back to the program id
+    executor._launch_cache = None
+    swap_event_from_logs.program_id = None
+    swap_event_from_logs.tx_event.enrichment = TokenEnrichment(route="pump", resolved_at=time.time())
+    assert await executor.find_route(swap_event_from_logs) == TradingRoute.PUMP
+
+    swap_event_from_logs.tx_event.enrichment = TokenEnrichment(route="dex", resolved_at=time.time())
+    assert await executor.find_route(swap_event_from_logs) == TradingRoute.DEX
+
+
+@pytest.mark.asyncio
+async def test_find_route_ignores_stale_route_hint(executor, swap_event_from_logs):
+    """A pump hint older than the enrichment TTL may predate graduation, so it is not trusted"""
+    executor._launch_cache = None
+    swap_event_from_logs.program_id = None
+    swap_event_from_logs.tx_event.enrichment = TokenEnrichment(route="pump", resolved_at=0)
+    # The graduation lookup fails and falls back to the aggregator
+    assert await executor.find_route(swap_event_from_logs) == TradingRoute.DEX
+
+    swap_event_from_logs.tx_event.enrichment = TokenEnrichment(route="pump")
+    assert await executor.find_route(swap_event_from_logs) == TradingRoute.DEX
@@ -0,0 +1,235 @@
+import asyncio
+import json
+from pathlib import Path
+
+import pytest
+import websockets
+from solders.pubkey import Pubkey
+from solders.signature import Signature
+from wallet_tracker.wss.account_log_monitor import (
+    AccountLogMonitor,
+    LogEvent,
+    LogsConnection,
+    SubscribeResult,
+    classify_logs,
+    decode_message,
+)
+
+
+class LogsServer:
+    """模拟 logsSubscribe 的 websocket 节点，倒序返回订阅结果"""
+
+    def __init__(self):
+        self.next_subscription_id = 100
+        self.subscriptions: dict[str, int] = {}
+        self.connections = []
+
+    async def handler(self, websocket, *args):
+        self.connections.append(websocket)
+        async for raw in websocket:
+            requests = json.loads(raw)
+            if isinstance(requests, dict):
+                requests = [requests]
+            responses = []
+            for request in requests:
+                if request["method"] != "logsSubscribe":
+                    continue
+                wallet = request["params"][0]["mentions"][0]
+                self.next_subscription_id += 1
+                self.subscriptions[wallet] = self.next_subscription_id
+                responses.append(
+                    {"jsonrpc": "2.0", "result": self.next_subscription_id, "id": request["id"]}
+                )
+            for response in reversed(responses):
+                await websocket.send(json.dumps(response))
+
+    async def notify(self, wallet: str, signature: str):
+        message = {
+            "jsonrpc": "2.0",
+            "method": "logsNotification",
+            "params": {
+                "result": {
+                    "context": {"slot": 1},
+                    "value": {"signature": signature, "err": None, "logs": []},
+                },
+                "subscription": self.subscriptions[wallet],
+            },
+        }
+        await self.connections[-1].send(json.dumps(message))
+
+
+async def wait_until(predicate, timeout: float = 3):
+    async def _wait():
+        while not predicate():
+            await asyncio.sleep(0.01)
+
+    await asyncio.wait_for(_wait(), timeout)
+
+
+@pytest.mark.asyncio
+async def test_connection_correlates_subscriptions_and_resubscribes():
+    server = LogsServer()
+    logs = []
+
+    async def on_log(message):
+        logs.append(message.signature)
+
+    async with websockets.serve(server.handler, "127.0.0.1", 0) as ws_server:
+        port = ws_server.sockets[0].getsockname()[1]
+        connection = LogsConnection(0, f"ws://127.0.0.1:{port}", on_log, 100, base_delay=0.01)
+        wallets = [str(Pubkey.new_unique()) for _ in range(20)]
+        for wallet in wallets:
+            await connection.subscribe(wallet)
+        task = asyncio.create_task(connection.run())
+
+        await wait_until(lambda: len(connection.subscription_ids) == len(wallets))
+        assert connection.subscription_ids == server.subscriptions
+
+        # 无法解析的消息被跳过，不影响后续消息
+        await server.connections[-1].send("not json")
+        await server.connections[-1].send('{"jsonrpc": "2.0", "method": "logsNotification"}')
+        signature = str(Signature.new_unique())
+        await server.notify(wallets[3], signature)
+        await wait_until(lambda: len(logs) == 1)
+        assert logs == [signature]
+        assert connection.invalid_messages == 2
+
+        # 连接断开后重新订阅该连接负责的所有钱包
+        await server.connections[-1].close()
+        await wait_until(lambda: len(server.connections) == 2)
+        await wait_until(
+            lambda: len(connection.subscription_ids) == len(wallets)
+            and connection.subscription_ids == server.subscriptions
+        )
+
+        await connection.close()
+        task.cancel()
+
+
+@pytest.mark.asyncio
+async def test_wallets_are_spread_over_connections():
+    monitor = AccountLogMonitor(
+        [],
+        "https://rpc.local",
+        None,  # type: ignore
+        max_subscriptions_per_connection=10,
+    )
+    wallets = [Pubkey.new_unique() for _ in range(25)]
+    for wallet in wallets:
+        await monitor.subscribe_wallet(wallet)
+
+    assert [len(connection.wallets) for connection in monitor.connections] == [10, 10, 5]
+    assert monitor.subscribed_wallets == {str(wallet) for wallet in wallets}
+
+    await monitor.unsubscribe_wallet(wallets[0])
+    assert len(monitor.connections[0].wallets) == 9
+    # 空出来的位置会被新的钱包使用
+    await monitor.subscribe_wallet(Pubkey.new_unique())
+    assert len(monitor.connections[0].wallets) == 10
+
+
+def read_logs(name: str) -> list[str]:
+    path = Path(__file__).parent / "tx_examples" / f"{name}.json"
+    with open(path) as f:
+        tx = json.load(f)
+    return tx.get("result", tx)["meta"]["logMessages"]
+
+
+def logs_notification(signature: str, logs: list[str], err=None) -> LogEvent:
+    message = {
+        "jsonrpc": "2.0",
+        "method": "logsNotification",
+        "params": {
+            "result": {
+                "context": {"slot": 1},
+                "value": {"signature": signature, "err": err, "logs": logs},
+            },
+            "subscription": 1,
+        },
+    }
+    event = decode_message(json.dumps(message))
+    assert isinstance(event, LogEvent)
+    return event
+
+
+def test_decode_message():
+    event = logs_notification("sig", ["Program log: a"])
+    assert event == LogEvent(1, "sig", None, ["Program log: a"])
+    assert decode_message(b'{"jsonrpc": "2.0", "result": 42, "id": 7}') == SubscribeResult(
+        7, 42, None
+    )
+    assert decode_message(b'{"jsonrpc": "2.0", "method": "slotNotification"}') is None
+
+
+def test_classify_logs():
+    assert classify_logs(None, read_logs("raw/open")) is None
+    assert classify_logs(None, read_logs("raw/transfer")) == "not_swap"
+    assert classify_logs({"InstructionError": [0, "Custom"]}, read_logs("raw/open")) == "failed"
+    assert classify_logs(None, ["Program log: a", "Log truncated"]) is None
+
+
+@pytest.mark.asyncio
+async def test_process_log_drops_before_queuing():
+    monitor = AccountLogMonitor([], "https://rpc.local", None, prefilter=True)  # type: ignore
+    queued = []
+
+    async def is_duplicate(signature):
+        queued.append(signature)
+        return True
+
+    monitor.dedup.is_duplicate = is_duplicate  # type: ignore
+    swap = str(Signature.new_unique())
+    await monitor.process_log(logs_notification(swap, read_logs("raw/open")))
+    await monitor.process_log(
+        logs_notification(str(Signature.new_unique()), read_logs("raw/transfer"))
+    )
+    await monitor.process_log(
+        logs_notification(
+            str(Signature.new_unique()),
+            read_logs("raw/open"),
+            err={"InstructionError": [0, {"Custom": 1}]},
+        )
+    )
+
+    assert queued == [swap]
+    assert monitor.get_stats() == {
+        "received": 3,
+        "invalid": 0,
+        "dropped": {"not_swap": 1, "failed": 1},
+        "saved_rpc_calls": 2,
+    }
+
+
+@pytest.mark.asyncio
+async def test_prefilter_is_off_by_default_and_logs_drop_counter():
+    from loguru import logger
+
+    monitor = AccountLogMonitor([], "https://rpc.local", None)  # type: ignore
+    queued = []
+
+    async def is_duplicate(signature):
+        queued.append(signature)
+        return True
+
+    monitor.dedup.is_duplicate = is_duplicate  # type: ignore
+    # 没有调用 SWAP_PROGRAMS 中程序的交易（如 Orca）默认不会被丢弃
+    transfer = str(Signature.new_unique())
+    await monitor.process_log(logs_notification(transfer, read_logs("raw/transfer")))
+    assert queued == [transfer]
+
+    messages = []
+    handler = logger.add(messages.append, level="INFO", format="{message}")
+    try:
+        monitor.prefilter = True
+        monitor.report_every = 2
+        for _ in range(3):
+            await monitor.process_log(
+                logs_notification(str(Signature.new_unique()), read_logs("raw/transfer"))
+            )
+    finally:
+        logger.remove(handler)
+    dropped = [message.strip() for message in messages if "prefilter dropped" in message]
+    assert dropped == [
+        "Log prefilter dropped 1 not_swap notifications",
+        "Log prefilter dropped 2 not_swap notifications",
+    ]
@@ -0,0 +1,82 @@
+import asyncio
+import json
+
+import httpx
+import pytest
+from solders.signature import Signature
+from wallet_tracker.wss.tx_detail_fetcher import TxDetailRawFetcher
+
+
+class BatchRPC:
+    """模拟支持 JSON-RPC 批量请求的节点，pending 中的交易第一次查询时返回 null"""
+
+    def __init__(self, pending: set[str] | None = None):
+        self.pending = pending or set()
+        self.batches: list[list[str]] = []
+
+    def handler(self, request: httpx.Request) -> httpx.Response:
+        payload = json.loads(request.content)
+        self.batches.append([item["params"][0] for item in payload])
+        results = []
+        for item in payload:
+            signature = item["params"][0]
+            if signature in self.pending:
+                self.pending.remove(signature)
+                result = None
+            else:
+                result = {"transaction": {"signatures": [signature]}}
+            results.append({"jsonrpc": "2.0", "id": item["id"], "result": result})
+        return httpx.Response(200, json=results)
+
+
+def make_fetcher(rpc: BatchRPC, **kwargs) -> TxDetailRawFetcher:
+    client = httpx.AsyncClient(transport=httpx.MockTransport(rpc.handler))
+    return TxDetailRawFetcher("http://rpc.local", client=client, **kwargs)
+
+
+@pytest.mark.asyncio
+async def test_signatures_are_fetched_in_one_batch():
+    rpc = BatchRPC()
+    fetcher = make_fetcher(rpc, batch_window=0.01)
+    signatures = [Signature.new_unique() for _ in range(20)]
+
+    results = await asyncio.gather(*(fetcher.fetch(signature) for signature in signatures))
+
+    assert len(rpc.batches) == 1
+    for signature, tx_detail in zip(signatures, results, strict=True):
+        assert tx_detail["transaction"]["signatures"][0] == str(signature)
+
+
+@pytest.mark.asyncio
+async def test_batch_is_flushed_at_max_size():
+    rpc = BatchRPC()
+    fetcher = make_fetcher(rpc, batch_window=10, max_batch_size=5)
+    signatures = [Signature.new_unique() for _ in range(10)]
+
+    await asyncio.wait_for(
+        asyncio.gather(*(fetcher.fetch(signature) for signature in signatures)), timeout=1
+    )
+
+    assert [len(batch) for batch in rpc.batches] == [5, 5]
+
+
+@pytest.mark.asyncio
+async def test_unavailable_transaction_is_retried():
+    signatures = [Signature.new_unique() for _ in range(3)]
+    rpc = BatchRPC(pending={str(signatures[0])})
+    fetcher = make_fetcher(rpc, retry_delay=0.01)
+
+    results = await asyncio.gather(*(fetcher.fetch(signature) for signature in signatures))
+
+    assert all(result is not None for result in results)
+    assert rpc.batches[1] == [str(signatures[0])]
+
+
+@pytest.mark.asyncio
+async def test_missing_transaction_returns_none_after_retries():
+    signature = Signature.new_unique()
+    rpc = BatchRPC()
+    rpc.pending = {str(signature)}
+    fetcher = make_fetcher(rpc, max_retries=0)
+
+    assert await fetcher.fetch(signature) is None
@@ -0,0 +1,116 @@
+import json
+import random
+
+import pytest
+from wallet_tracker.benchmark import BenchmarkService, LatencyHistogram
+from wallet_tracker.benchmark.service import SNAPSHOTS_KEY, TIMELINES_KEY, timeline_key
+
+
+class FakePipeline:
+    def __init__(self, redis: "FakeRedis"):
+        self.redis = redis
+
+    async def __aenter__(self):
+        return self
+
+    async def __aexit__(self, *args):
+        pass
+
+    def __getattr__(self, name):
+        def _call(*args, **kwargs):
+            self.redis.commands.append((name, args, kwargs))
+
+        return _call
+
+    async def execute(self):
+        pass
+
+
+class FakeRedis:
+    def __init__(self):
+        self.commands = []
+
+    def pipeline(self, transaction=True):
+        return FakePipeline(self)
+
+
+@pytest.fixture
+def service():
+    # BenchmarkService 是单例，测试中使用独立的实例
+    instance = object.__new__(BenchmarkService)
+    BenchmarkService.__init__(
+        instance, flush_interval=1, sample_rate=1, timeline_ttl=60, max_snapshots=10
+    )
+    instance.redis = FakeRedis()  # type: ignore
+    return instance
+
+
+def test_histogram_percentiles_are_within_relative_error():
+    random.seed(1)
+    values = sorted(random.expovariate(10) for _ in range(50_000))
+    histogram = LatencyHistogram()
+    for value in values:
+        histogram.record(value)
+
+    assert histogram.count == len(values)
+    for q in (0.5, 0.9, 0.99):
+        expected = values[int(len(values) * q)]
+        assert histogram.percentile(q) == pytest.approx(expected, rel=0.04)
+    assert histogram.percentile(1) == pytest.approx(values[-1], rel=1e-5)
+
+
+def test_histogram_clamps_negative_and_merges():
+    first, second = LatencyHistogram(), LatencyHistogram()
+    first.record(-0.5)
+    second.record(0.002)
+    first.merge(second)
+    assert first.count == 2
+    assert first.percentile(0.5) == 0
+    assert first.snapshot()["max_ms"] == 2
+    assert LatencyHistogram().snapshot()["p50_ms"] is None
+
+
+@pytest.mark.asyncio
+async def test_flush_writes_snapshot_and_sampled_timelines(service: BenchmarkService):
+    service.detect("tx1", 101.5)
+    service.block_time("tx1", 100)
+    service.observe("parse", 0.001)
+    service.mark("tx1", "tx_start_parse", 101.6)
+    service.finish("tx1", 101.7)
+    assert service.detected == {}
+    assert await service.get_timeline("tx1") == {
+        "tx_detected": 101.5,
+        "block_time": 100,
+        "tx_start_parse": 101.6,
+        "tx_finished": 101.7,
+    }
+
+    snapshot = await service.flush()
+    assert snapshot["stages"]["detect"]["count"] == 1
+    assert snapshot["stages"]["detect"]["p50_ms"] == pytest.approx(1500, rel=0.04)
+    assert snapshot["stages"]["total"]["count"] == 1
+    # 每个时间窗口重新统计
+    assert service.histograms["detect"].count == 0
+    assert service.completed == {}
+
+    commands = {name: (args, kwargs) for name, args, kwargs in service.redis.commands}  # type: ignore
+    assert json.loads(commands["lpush"][0][1])["stages"]["parse"]["count"] == 1
+    assert commands["ltrim"][0] == (SNAPSHOTS_KEY, 0, 9)
+    assert commands["hset"][0] == (timeline_key("tx1"),)
+    assert commands["expire"][0] == (timeline_key("tx1"), 60)
+    assert commands["zadd"][0] == (TIMELINES_KEY, {"tx1": 101.7})
+
+
+def test_unsampled_transactions_are_bounded(service: BenchmarkService):
+    service.sample_rate = 0
+    service.max_inflight = 3
+    for i in range(10):
+        service.detect(f"tx{i}", i)
+    assert list(service.detected) == ["tx7", "tx8", "tx9"]
+    assert service.sampled == {}
+    service.block_time("tx9", 8)
+    service.finish("tx9", 10)
+    assert service.completed == {}
+    # 未被采样的交易同样统计 total
+    assert service.histograms["total"].count == 1
+    assert service.histograms["total"].percentile(1) == pytest.approx(2, rel=0.04)
@@ -0,0 +1,214 @@
+import asyncio
+import time
+
+import aioredis
+import pytest
+import pytest_asyncio
+from solbot_common.config import settings
+from solders.pubkey import Pubkey
+from wallet_tracker.cluster import (
+    LEASE_KEY_PREFIX,
+    NODES_KEY,
+    RELEASE_SCRIPT,
+    RENEW_SCRIPT,
+    PartitionCoordinator,
+    partition_of,
+)
+
+PARTITIONS = 16
+
+
+class SharedRedis:
+    """多个节点共享的 Redis，实现租约用到的命令，脚本用 Python 实现相同的语义"""
+
+    def __init__(self):
+        self.strings: dict[str, tuple[str, float]] = {}
+        self.zsets: dict[str, dict[str, float]] = {}
+
+    def _get(self, key):
+        item = self.strings.get(key)
+        if item is None or item[1] <= time.monotonic():
+            self.strings.pop(key, None)
+            return None
+        return item[0]
+
+    async def set(self, name, value, px=None, nx=False):
+        if nx and self._get(name) is not None:
+            return None
+        self.strings[name] = (value, time.monotonic() + px / 1000)
+        return True
+
+    async def mget(self, keys):
+        return [self._get(key) for key in keys]
+
+    async def zadd(self, name, mapping):
+        self.zsets.setdefault(name, {}).update(mapping)
+
+    async def zremrangebyscore(self, name, min, max):
+        zset = self.zsets.get(name, {})
+        for member, score in list(zset.items()):
+            if score <= max:
+                del zset[member]
+
+    async def zrange(self, name, start, end):
+        return list(self.zsets.get(name, {}))
+
+    async def zrem(self, name, member):
+        self.zsets.get(name, {}).pop(member, None)
+
+    def pipeline(self, transaction=True):
+        redis = self
+
+        class Pipeline:
+            def __init__(self):
+                self.calls = []
+
+            async def __aenter__(self):
+                return self
+
+            async def __aexit__(self, *args):
+                pass
+
+            def __getattr__(self, name):
+                return lambda *args, **kwargs: self.calls.append(
+                    getattr(redis, name)(*args, **kwargs)
+                )
+
+            async def execute(self):
+                return [await call for call in self.calls]
+
+        return Pipeline()
+
+    def register_script(self, script):
+        async def renew(keys, args):
+            node_id, ttl_ms = args
+            renewed = []
+            for index, key in enumerate(keys):
+                if self._get(key) == node_id:
+                    self.strings[key] = (node_id, time.monotonic() + ttl_ms / 1000)
+                    renewed.append(index)
+            return renewed
+
+        async def release(keys, args):
+            released = 0
+            for key in keys:
+                if self._get(key) == args[0]:
+                    del self.strings[key]
+                    released += 1
+            return released
+
+        return {RENEW_SCRIPT: renew, RELEASE_SCRIPT: release}[script]
+
+    def kill(self, node_id: str):
+        """模拟节点宕机：租约和心跳不再续约，立即过期"""
+        for key, (value, _) in list(self.strings.items()):
+            if value == node_id:
+                del self.strings[key]
+        self.zsets.get(NODES_KEY, {}).pop(node_id, None)
+
+
+class Node:
+    def __init__(self, redis, node_id: str, wallets: list[str]):
+        self.wallets = wallets
+        self.subscribed: set[str] = set()
+        self.coordinator = PartitionCoordinator(
+            redis,
+            node_id=node_id,
+            partitions=PARTITIONS,
+            lease_ttl=0.5,
+            renew_interval=0.05,
+            on_assign=self.assign,
+            on_revoke=self.revoke,
+        )
+
+    async def assign(self, partitions: set[int]):
+        self.subscribed.update(self.coordinator.filter_wallets(self.wallets, partitions))
+
+    async def revoke(self, partitions: set[int]):
+        self.subscribed.difference_update(self.coordinator.filter_wallets(self.wallets, partitions))
+
+
+async def wait_until(predicate, timeout: float = 5):
+    async def _wait():
+        while not predicate():
+            await asyncio.sleep(0.02)
+
+    await asyncio.wait_for(_wait(), timeout)
+
+
+def balanced(nodes: list[Node], wallets: list[str]) -> bool:
+    """每个钱包恰好由一个节点订阅，且每个节点持有的分区数量不超过上限"""
+    owners = [sum(wallet in node.subscribed for node in nodes) for wallet in wallets]
+    target = -(-PARTITIONS // len(nodes))
+    return all(count == 1 for count in owners) and all(
+        len(node.coordinator.owned) <= target and not node.coordinator.draining for node in nodes
+    )
+
+
+async def check_failover(redis, kill):
+    wallets = [str(Pubkey.new_unique()) for _ in range(200)]
+    nodes = [Node(redis, f"node-{i}", wallets) for i in range(3)]
+    try:
+        await nodes[0].coordinator.start()
+        assert len(nodes[0].coordinator.owned) == PARTITIONS
+        assert nodes[0].subscribed == set(wallets)
+
+        # 新节点加入后分区重新平衡，交接期间不会出现没有节点订阅的钱包
+        await nodes[1].coordinator.start()
+        await nodes[2].coordinator.start()
+        await wait_until(lambda: balanced(nodes, wallets))
+        assert all(node.coordinator.owned for node in nodes)
+
+        # 节点宕机后，存活的节点在租约过期后接管其分区
+        dead = nodes.pop()
+        if kill is None:
+            await dead.coordinator.stop()
+        else:
+            assert dead.coordinator._task is not None
+            dead.coordinator._task.cancel()
+            kill(dead.coordinator.node_id)
+        started = time.monotonic()
+        await wait_until(lambda: balanced(nodes, wallets))
+        assert time.monotonic() - started < 3
+    finally:
+        for node in nodes:
+            await node.coordinator.stop()
+
+
+def test_partition_of_is_stable():
+    wallet = str(Pubkey.new_unique())
+    assert partition_of(wallet, PARTITIONS) == partition_of(wallet, PARTITIONS)
+    partitions = {partition_of(str(Pubkey.new_unique()), PARTITIONS) for _ in range(1000)}
+    assert partitions == set(range(PARTITIONS))
+
+
+@pytest.mark.asyncio
+async def test_nodes_share_partitions_and_fail_over():
+    redis = SharedRedis()
+    await check_failover(redis, redis.kill)
+    assert not redis.zsets[NODES_KEY]
+
+
+@pytest.mark.asyncio
+async def test_graceful_stop_releases_partitions():
+    redis = SharedRedis()
+    await check_failover(redis, None)
+    assert not [key for key in redis.strings if key.startswith(LEASE_KEY_PREFIX)]
+
+
+@pytest_asyncio.fixture
+async def local_redis():
+    redis = aioredis.Redis.from_url(str(settings.db.redis), decode_responses=True)
+    try:
+        await asyncio.wait_for(redis.ping(), 1)
+    except Exception:
+        pytest.skip("local Redis is not available")
+    yield redis
+    await redis.delete(NODES_KEY, *[f"{LEASE_KEY_PREFIX}{p}" for p in range(PARTITIONS)])
+    await redis.close()
+
+
+@pytest.mark.asyncio
+async def test_fail_over_with_local_redis(local_redis):
+    # 宕机的节点不再续约，租约在 lease_ttl 后过期
+    await check_failover(local_redis, lambda node_id: None)
@@ -0,0 +1,75 @@
+import time
+
+import pytest
+from wallet_tracker.dedup import SignatureDeduplicator
+
+
+class SharedRedis:
+    """多个节点共享的 Redis，只实现 SET NX EX 和 DEL"""
+
+    def __init__(self):
+        self.data: dict[str, float] = {}
+
+    async def set(self, name, value, ex=None, nx=False):
+        now = time.monotonic()
+        if nx and self.data.get(name, 0) > now:
+            return None
+        self.data[name] = now + ex
+        return True
+
+    async def delete(self, name):
+        self.data.pop(name, None)
+
+
+@pytest.mark.asyncio
+async def test_duplicate_signature_is_detected():
+    dedup = SignatureDeduplicator()
+    assert await dedup.is_duplicate("sig1") is False
+    assert await dedup.is_duplicate("sig1") is True
+    assert await dedup.is_duplicate("sig2") is False
+    assert dedup.stats()["local_hits"] == 1
+    assert dedup.stats()["misses"] == 2
+    assert dedup.hit_rate == pytest.approx(1 / 3)
+
+
+@pytest.mark.asyncio
+async def test_signature_expires_after_window():
+    dedup = SignatureDeduplicator(ttl=0)
+    assert await dedup.is_duplicate("sig1") is False
+    assert await dedup.is_duplicate("sig1") is False
+    assert len(dedup) == 0
+
+
+def test_size_is_bounded():
+    dedup = SignatureDeduplicator(maxsize=10)
+    for i in range(100):
+        dedup.seen_local(f"sig{i}")
+    assert len(dedup) == 10
+    assert dedup.seen_local("sig99") is True
+    assert dedup.seen_local("sig0") is False
+
+
+@pytest.mark.asyncio
+async def test_signature_is_shared_across_nodes():
+    redis = SharedRedis()
+    node1 = SignatureDeduplicator(redis=redis)  # type: ignore
+    node2 = SignatureDeduplicator(redis=redis)  # type: ignore
+
+    assert await node1.is_duplicate("sig1") is False
+    assert await node2.is_duplicate("sig1") is True
+    assert node2.stats()["remote_hits"] == 1
+    # 远端命中后会记录到本地，之后不再访问 Redis
+    assert await node2.is_duplicate("sig1") is True
+    assert node2.stats()["local_hits"] == 1
+
+
+@pytest.mark.asyncio
+async def test_forget_allows_signature_again():
+    redis = SharedRedis()
+    dedup = SignatureDeduplicator(redis=redis)  # type: ignore
+    assert await dedup.is_duplicate("sig1") is False
+    await dedup.forget("sig1")
+    # 其他节点也不会再认为该签名已处理过
+    assert await SignatureDeduplicator(redis=redis).is_duplicate("sig1") is False  # type: ignore
+    await dedup.forget("sig1")
+    assert await dedup.is_duplicate("sig1") is False
@@ -0,0 +1,100 @@
+import asyncio
+import time
+from dataclasses import replace
+
+import pytest
+from solbot_common.types.tx import TokenEnrichment, TxEvent, TxType
+from wallet_tracker.enrichment import PUMP_FUN_PROGRAM_ID, TokenEnricher
+
+MINT = "So11111111111111111111111111111111111111112"
+
+TX_EVENT = TxEvent(
+    signature="sig",
+    from_amount=1_000_000_000,
+    from_decimals=9,
+    to_amount=100,
+    to_decimals=6,
+    mint="mint",
+    who="wallet",
+    tx_type=TxType.OPEN_POSITION,
+    tx_direction="buy",
+    timestamp=0,
+    pre_token_amount=0,
+    post_token_amount=100,
+)
+
+
+class FakeResolver:
+    def __init__(self):
+        self.calls: list[str] = []
+
+    async def resolve(self, mint: str) -> TokenEnrichment:
+        self.calls.append(mint)
+        return TokenEnrichment(symbol="TKN", token_name="Token", route="raydium_v4", pool_id="pool")
+
+
+def test_tx_event_json_round_trip():
+    tx_event = replace(TX_EVENT, enrichment=TokenEnrichment(symbol="TKN", route="pump"))
+    assert TxEvent.from_json(tx_event.to_json()) == tx_event
+    # 没有附带代币信息的事件
+    assert TxEvent.from_json(TX_EVENT.to_json()).enrichment is None
+
+
+@pytest.mark.asyncio
+async def test_enrich_from_cache_and_resolve_misses_in_background():
+    resolver = FakeResolver()
+    enricher = TokenEnricher(resolve=resolver.resolve, workers=1)
+    await enricher.start()
+    try:
+        # 未命中时不阻塞，后台查询
+        assert enricher.enrich(replace(TX_EVENT)).enrichment is None
+        assert enricher.enrich(replace(TX_EVENT)).enrichment is None
+        await asyncio.sleep(0.01)
+        assert resolver.calls == ["mint"]
+
+        tx_event = enricher.enrich(replace(TX_EVENT))
+        assert tx_event.enrichment is not None
+        # 记录路由的查询时间，下游服务据此忽略过旧的提示
+        assert tx_event.enrichment.resolved_at == pytest.approx(time.time(), abs=5)
+        assert replace(tx_event.enrichment, resolved_at=None) == TokenEnrichment(
+            symbol="TKN", token_name="Token", route="raydium_v4", pool_id="pool"
+        )
+        assert enricher.get_stats() == {
+            "cached": 1,
+            "hits": 1,
+            "misses": 2,
+            "resolved": 1,
+            "queued": 0,
+        }
+    finally:
+        await enricher.stop()
+
+
+@pytest.mark.asyncio
+async def test_expired_route_is_dropped_and_resolved_again():
+    resolver = FakeResolver()
+    enricher = TokenEnricher(resolve=resolver.resolve, ttl=0)
+    enricher.put("mint", TokenEnrichment(symbol="TKN", route="dex"))
+    await enricher.start()
+    try:
+        assert enricher.enrich(replace(TX_EVENT)).enrichment == TokenEnrichment(symbol="TKN")
+        await asyncio.sleep(0.01)
+        assert resolver.calls == ["mint"]
+    finally:
+        await enricher.stop()
+
+
+def test_pump_program_route_hint_without_lookup():
+    enricher = TokenEnricher(maxsize=1)
+    # 未启动后台查询时只使用交易本身的路由提示
+    tx_event = enricher.enrich(replace(TX_EVENT, program_id=PUMP_FUN_PROGRAM_ID))
+    assert tx_event.enrichment is not None
+    assert tx_event.enrichment.resolved_at is not None
+    assert replace(tx_event.enrichment, resolved_at=None) == TokenEnrichment(route="pump")
+    assert enricher.enrich(replace(TX_EVENT, program_id=None)).enrichment is None
+
+    enricher.put("mint", TokenEnrichment(symbol="TKN", route="raydium_v4", pool_id="pool"))
+    enricher.put(MINT, TokenEnrichment(symbol="SOL"))
+    # 超过容量时淘汰最早的代币
+    assert enricher.get_stats()["cached"] == 1
+    assert enricher.enrich(replace(TX_EVENT)).enrichment is None
@@ -0,0 +1,125 @@
+from types import SimpleNamespace
+
+import pytest
+from solders.pubkey import Pubkey
+from solders.rpc.responses import RpcConfirmedTransactionStatusWithSignature
+from solders.signature import Signature
+from wallet_tracker.dedup import SignatureDeduplicator
+from wallet_tracker.geyser.backfill import SlotGapBackfiller
+
+
+class SignaturesClient:
+    """按 slot 从新到旧返回钱包的交易签名"""
+
+    def __init__(self, history: dict[str, list[RpcConfirmedTransactionStatusWithSignature]]):
+        self.history = history
+        self.calls = 0
+
+    async def get_signatures_for_address(self, account, before=None, limit=None, **kwargs):
+        self.calls += 1
+        statuses = self.history[str(account)]
+        if before is not None:
+            index = [status.signature for status in statuses].index(before)
+            statuses = statuses[index + 1 :]
+        return SimpleNamespace(value=statuses[:limit])
+
+
+def make_history(slots: list[int]) -> list[RpcConfirmedTransactionStatusWithSignature]:
+    return [
+        RpcConfirmedTransactionStatusWithSignature(Signature.new_unique(), slot)
+        for slot in sorted(slots, reverse=True)
+    ]
+
+
+@pytest.mark.asyncio
+async def test_backfill_gap_exactly_once():
+    wallet1, wallet2 = str(Pubkey.new_unique()), str(Pubkey.new_unique())
+    history1 = make_history(list(range(90, 110)))
+    history2 = make_history([95, 105])
+    # 同一笔交易同时涉及两个钱包
+    history2.insert(0, history1[0])
+    client = SignaturesClient({wallet1: history1, wallet2: history2})
+
+    dedup = SignatureDeduplicator()
+    # 断开前已经从订阅流收到 slot 100 的交易
+    already_seen = next(status for status in history1 if status.slot == 100)
+    await dedup.is_duplicate(str(already_seen.signature))
+
+    handled = []
+
+    async def fetch_tx_detail(signature):
+        return {"signature": str(signature)}
+
+    async def handler(tx_detail):
+        handled.append(tx_detail["signature"])
+
+    backfiller = SlotGapBackfiller(client, fetch_tx_detail, handler, dedup, page_limit=4)  # type: ignore
+    count = await backfiller.backfill({wallet1: 99, wallet2: 99})
+
+    expected = {
+        str(status.signature)
+        for status in history1 + history2
+        if status.slot >= 100 and status.signature != already_seen.signature
+    }
+    assert count == len(expected)
+    assert sorted(handled) == sorted(expected)
+
+    # 再次补齐时所有交易都会被去重
+    handled.clear()
+    assert await backfiller.backfill({wallet1: 99, wallet2: 99}) == 0
+    assert handled == []
+
+
+@pytest.mark.asyncio
+async def test_failed_fetch_is_retried_by_next_backfill():
+    wallet = str(Pubkey.new_unique())
+    history = make_history([100, 101])
+    client = SignaturesClient({wallet: history})
+    dedup = SignatureDeduplicator()
+    handled = []
+    # slot 101 的交易第一次拉取时尚不可见，第二次拉取时抛出异常
+    failures = {str(history[0].signature): [None, RuntimeError("timeout")]}
+
+    async def fetch_tx_detail(signature):
+        pending = failures.get(str(signature))
+        if pending:
+            result = pending.pop(0)
+            if isinstance(result, Exception):
+                raise result
+            return result
+        return {"signature": str(signature)}
+
+    async def handler(tx_detail):
+        handled.append(tx_detail["signature"])
+
+    backfiller = SlotGapBackfiller(client, fetch_tx_detail, handler, dedup)  # type: ignore
+    assert await backfiller.backfill({wallet: 99}) == 1
+    assert handled == [str(history[1].signature)]
+
+    assert await backfiller.backfill({wallet: 99}) == 0
+    assert await backfiller.backfill({wallet: 99}) == 1
+    assert handled == [str(history[1].signature), str(history[0].signature)]
+    assert await backfiller.backfill({wallet: 99}) == 0
+
+
+@pytest.mark.asyncio
+async def test_reconnect_after_dedup_ttl_does_not_replay_last_trade():
+    wallet, late_wallet = str(Pubkey.new_unique()), str(Pubkey.new_unique())
+    history = make_history([90, 100, 101])
+    # late_wallet 在 slot 105 才被订阅，之前的交易是订阅前的历史
+    late_history = make_history([103, 106])
+    client = SignaturesClient({wallet: history, late_wallet: late_history})
+    # 去重记录已经过期，只能依靠补齐的起点避免重放
+    dedup = SignatureDeduplicator(ttl=0)
+    handled = []
+
+    async def fetch_tx_detail(signature):
+        return {"signature": str(signature)}
+
+    async def handler(tx_detail):
+        handled.append(tx_detail["signature"])
+
+    backfiller = SlotGapBackfiller(client, fetch_tx_detail, handler, dedup)  # type: ignore
+    # 订阅流断开前已经处理到 slot 100（包括该 slot 的交易）
+    assert await backfiller.backfill({wallet: 100, late_wallet: 105}) == 2
+    assert sorted(handled) == sorted([str(history[0].signature), str(late_history[0].signature)])
@@ -0,0 +1,106 @@
+import json
+from pathlib import Path
+
+import pytest
+from solders.pubkey import Pubkey
+from solders.signature import Signature
+from wallet_tracker.exceptions import NotSwapTransaction
+from wallet_tracker.parser import GeyserTXParser, RawTXParser
+from yellowstone_grpc.grpc import geyser_pb2, solana_storage_pb2
+
+
+def read_raw_tx(name: str) -> dict:
+    path = Path(__file__).parent / "tx_examples" / f"{name}.json"
+    with open(path) as f:
+        return json.load(f)["result"]
+
+
+def _token_balances(balances: list[dict]) -> list[solana_storage_pb2.TokenBalance]:
+    return [
+        solana_storage_pb2.TokenBalance(
+            account_index=balance["accountIndex"],
+            mint=balance["mint"],
+            owner=balance.get("owner", ""),
+            program_id=balance.get("programId", ""),
+            ui_token_amount=solana_storage_pb2.UiTokenAmount(
+                amount=balance["uiTokenAmount"]["amount"],
+                decimals=balance["uiTokenAmount"]["decimals"],
+            ),
+        )
+        for balance in balances
+    ]
+
+
+def raw_tx_to_proto(tx: dict) -> geyser_pb2.SubscribeUpdateTransaction:
+    """将 RPC 返回的交易结构转换为 Geyser 推送的 protobuf 消息"""
+    message = tx["transaction"]["message"]
+    account_keys = [
+        bytes(Pubkey.from_string(key if isinstance(key, str) else key["pubkey"]))
+        for key in message["accountKeys"]
+    ]
+    signatures = [bytes(Signature.from_string(sig)) for sig in tx["transaction"]["signatures"]]
+    meta = tx["meta"]
+    return geyser_pb2.SubscribeUpdateTransaction(
+        slot=tx["slot"],
+        transaction=geyser_pb2.SubscribeUpdateTransactionInfo(
+            signature=signatures[0],
+            transaction=solana_storage_pb2.Transaction(
+                signatures=signatures,
+                message=solana_storage_pb2.Message(account_keys=account_keys),
+            ),
+            meta=solana_storage_pb2.TransactionStatusMeta(
+                fee=meta["fee"],
+                pre_balances=meta["preBalances"],
+                post_balances=meta["postBalances"],
+                log_messages=meta["logMessages"],
+                pre_token_balances=_token_balances(meta["preTokenBalances"]),
+                post_token_balances=_token_balances(meta["postTokenBalances"]),
+            ),
+        ),
+    )
+
+
+@pytest.mark.parametrize(
+    "name",
+    [
+        "raw/open",
+        "raw/open1",
+        "raw/open2",
+        "raw/open3",
+        "raw/open4",
+        "raw/reduce",
+        "raw/reduce1",
+        "raw/add",
+        "raw/close",
+        "raw/fail",
+        "raw/fail1",
+        "raw/fail2",
+    ],
+)
+def test_geyser_parser_matches_raw_parser(name: str):
+    tx = read_raw_tx(name)
+    expected = RawTXParser(tx).parse()
+    parsed = GeyserTXParser(raw_tx_to_proto(tx), block_time=tx["blockTime"]).parse()
+    assert parsed == expected
+
+
+def test_geyser_parser_not_swap():
+    path = Path(__file__).parent / "tx_examples" / "raw" / "transfer.json"
+    with open(path) as f:
+        tx = json.load(f)
+    with pytest.raises(NotSwapTransaction):
+        GeyserTXParser(raw_tx_to_proto(tx)).parse()
+
+
+@pytest.mark.parametrize("name", ["raw/open", "raw/reduce", "raw/close"])
+def test_geyser_parser_uses_same_token_index(name: str):
+    tx = read_raw_tx(name)
+    raw_view = RawTXParser(tx).view
+    geyser_view = GeyserTXParser(raw_tx_to_proto(tx)).view
+    assert geyser_view.who == raw_view.who
+    assert geyser_view.mint == raw_view.mint
+    assert geyser_view.balances[raw_view.who] == raw_view.balances[raw_view.who]
+    assert (geyser_view.pre_token_count, geyser_view.post_token_count) == (
+        raw_view.pre_token_count,
+        raw_view.post_token_count,
+    )
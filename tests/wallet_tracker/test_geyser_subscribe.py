@@ -0,0 +1,399 @@
+import asyncio
+
+import pytest
+from solbot_common.constants import SWAP_PROGRAMS
+from solders.pubkey import Pubkey
+from solders.signature import Signature
+from wallet_tracker.geyser import tx_subscriber
+from wallet_tracker.geyser.hash_ring import HashRing
+from wallet_tracker.geyser.tx_subscriber import TransactionDetailSubscriber
+from yellowstone_grpc.grpc import geyser_pb2
+
+
+def make_subscriber(shard_nums: int = 1) -> TransactionDetailSubscriber:
+    subscriber = TransactionDetailSubscriber(
+        "",
+        "",
+        None,  # type: ignore
+        [],
+        debounce_interval=0.05,
+        shard_nums=shard_nums,
+    )
+    for shard in subscriber.shards:
+        shard.request_queue = asyncio.Queue()
+    return subscriber
+
+
+@pytest.mark.asyncio
+async def test_subscribe_many_sends_one_request():
+    subscriber = make_subscriber()
+    wallets = [Pubkey.new_unique() for _ in range(100)]
+
+    await subscriber.subscribe_many(wallets[:50])
+    for wallet in wallets[50:]:
+        await subscriber.subscribe_wallet_transactions(wallet)
+    await asyncio.sleep(0.1)
+
+    request_queue = subscriber.shards[0].request_queue
+    assert request_queue is not None
+    assert request_queue.qsize() == 1
+    request = request_queue.get_nowait()
+    tx_filter = request.transactions["key"]
+    assert set(tx_filter.account_include) == {str(wallet) for wallet in wallets}
+    assert tx_filter.failed is False
+
+
+@pytest.mark.asyncio
+async def test_unsubscribe_all_falls_back_to_ping():
+    subscriber = make_subscriber()
+    wallets = [Pubkey.new_unique() for _ in range(3)]
+
+    await subscriber.subscribe_many(wallets)
+    await subscriber.unsubscribe_many(wallets)
+    await asyncio.sleep(0.1)
+
+    request_queue = subscriber.shards[0].request_queue
+    assert request_queue is not None
+    assert request_queue.qsize() == 1
+    request = request_queue.get_nowait()
+    assert len(request.transactions) == 0
+    assert request.ping.id == 1
+
+
+@pytest.mark.asyncio
+async def test_wallets_are_sharded():
+    subscriber = make_subscriber(shard_nums=4)
+    wallets = [str(Pubkey.new_unique()) for _ in range(400)]
+
+    await subscriber.subscribe_many(Pubkey.from_string(wallet) for wallet in wallets)
+    await asyncio.sleep(0.1)
+
+    subscribed = set()
+    for shard in subscriber.shards:
+        assert shard.request_queue is not None
+        assert shard.request_queue.qsize() == 1
+        request = shard.request_queue.get_nowait()
+        account_include = set(request.transactions["key"].account_include)
+        assert account_include == shard.wallets
+        assert subscribed.isdisjoint(account_include)
+        subscribed |= account_include
+    assert subscribed == set(wallets)
+
+    # 只有发生变化的分片会重新发送订阅请求
+    wallet = wallets[0]
+    await subscriber.unsubscribe_wallet_transactions(Pubkey.from_string(wallet))
+    await asyncio.sleep(0.1)
+    updated = [shard for shard in subscriber.shards if shard.request_queue.qsize() > 0]  # type: ignore
+    assert len(updated) == 1
+    assert updated[0].index == subscriber.hash_ring.get_shard(wallet)
+
+
+def test_hash_ring_is_stable():
+    wallets = [str(Pubkey.new_unique()) for _ in range(1000)]
+    ring = HashRing(4)
+    assignment = {wallet: ring.get_shard(wallet) for wallet in wallets}
+    assert assignment == {wallet: HashRing(4).get_shard(wallet) for wallet in wallets}
+
+    # 增加一个分片时，只有少部分钱包需要迁移
+    resized = HashRing(5)
+    moved = sum(1 for wallet in wallets if resized.get_shard(wallet) != assignment[wallet])
+    assert moved < len(wallets) / 2
+
+
+@pytest.mark.asyncio
+async def test_duplicate_transaction_is_processed_once():
+    subscriber = make_subscriber(shard_nums=2)
+    processed = []
+
+    async def process_transaction(update):
+        processed.append(update)
+
+    subscriber._process_transaction = process_transaction  # type: ignore
+    signature = bytes(Signature.new_unique())
+    for _ in range(2):
+        response = geyser_pb2.SubscribeUpdate(filters=["key"])
+        response.transaction.transaction.signature = signature
+        await subscriber._enqueue(response)
+
+    subscriber.is_running = True
+    await subscriber._start_workers()
+    await subscriber.response_queue.join()
+    subscriber.is_running = False
+    await subscriber._stop_workers()
+
+    assert len(processed) == 1
+
+
+@pytest.mark.asyncio
+async def test_full_queue_sheds_pings_and_spills_transactions():
+    subscriber = TransactionDetailSubscriber(
+        "",
+        "",
+        None,  # type: ignore
+        [],
+        queue_size=1,
+        overload_policy="spill",
+    )
+    spilled = []
+
+    async def push_transaction_to_redis(update):
+        spilled.append(update)
+
+    subscriber._push_transaction_to_redis = push_transaction_to_redis  # type: ignore
+
+    ping = geyser_pb2.SubscribeUpdate()
+    ping.ping.SetInParent()
+    await subscriber._enqueue(ping)
+    await subscriber._enqueue(ping)
+    for _ in range(2):
+        response = geyser_pb2.SubscribeUpdate(filters=["key"])
+        response.transaction.transaction.signature = bytes(Signature.new_unique())
+        await subscriber._enqueue(response)
+    # 订阅流的读取不会等待写入 Redis
+    assert spilled == []
+    assert subscriber.spill_queue.qsize() == 2
+
+    spill_task = asyncio.create_task(subscriber._spill_worker())
+    await subscriber.spill_queue.join()
+    spill_task.cancel()
+
+    assert subscriber.response_queue.qsize() == 1
+    stats = subscriber.get_stats()
+    assert stats["shed_updates"] == 1
+    assert stats["spilled_transactions"] == 2
+    assert len(spilled) == 2
+
+
+@pytest.mark.asyncio
+async def test_full_spill_queue_sheds_transactions():
+    subscriber = TransactionDetailSubscriber(
+        "",
+        "",
+        None,  # type: ignore
+        [],
+        queue_size=1,
+        spill_queue_size=1,
+        overload_policy="spill",
+    )
+    for _ in range(3):
+        response = geyser_pb2.SubscribeUpdate(filters=["key"])
+        response.transaction.transaction.signature = bytes(Signature.new_unique())
+        await subscriber._enqueue(response)
+
+    assert subscriber.response_queue.qsize() == 1
+    assert subscriber.spill_queue.qsize() == 1
+    assert subscriber.get_stats()["shed_transactions"] == 1
+
+
+@pytest.mark.asyncio
+async def test_workers_scale_with_queue_wait(monkeypatch):
+    monkeypatch.setattr(tx_subscriber, "WORKER_IDLE_TIMEOUT", 0.01)
+    subscriber = TransactionDetailSubscriber(
+        "",
+        "",
+        None,  # type: ignore
+        [],
+        worker_nums=1,
+        max_worker_nums=3,
+        scale_up_latency=0.1,
+    )
+    subscriber.is_running = True
+    await subscriber._start_workers()
+
+    subscriber.queue_stats.wait = 1
+    for _ in range(5):
+        subscriber._scale_workers()
+    assert subscriber.get_stats()["workers"] == 3
+
+    subscriber.queue_stats.wait = 0
+    for _ in range(5):
+        subscriber._scale_workers()
+    assert subscriber.get_stats()["workers"] == 1
+
+    # 队列一直为空时，缩容的 worker 也会退出
+    await asyncio.sleep(0.05)
+    assert len(subscriber.workers) == 1
+
+    subscriber.is_running = False
+    await subscriber._stop_workers()
+
+
+def test_server_side_filters():
+    subscriber = TransactionDetailSubscriber(
+        "",
+        "",
+        None,  # type: ignore
+        [],
+        swap_programs=SWAP_PROGRAMS,
+        account_required=["Required111111111111111111111111111111111111"],
+    )
+    wallets = [str(Pubkey.new_unique()) for _ in range(3)]
+
+    request = subscriber._build_subscribe_request(wallets)
+
+    assert set(request.transactions) == {f"swap:{program}" for program in SWAP_PROGRAMS}
+    for program in SWAP_PROGRAMS:
+        tx_filter = request.transactions[f"swap:{program}"]
+        assert list(tx_filter.account_include) == wallets
+        assert list(tx_filter.account_required) == [
+            "Required111111111111111111111111111111111111",
+            program,
+        ]
+        assert tx_filter.vote is False
+        assert tx_filter.failed is False
+
+
+def test_signer_check_before_decode():
+    wallet = Pubkey.new_unique()
+    subscriber = TransactionDetailSubscriber("", "", None, [wallet])  # type: ignore
+
+    def transaction_update(signer: Pubkey) -> geyser_pb2.SubscribeUpdate:
+        response = geyser_pb2.SubscribeUpdate(filters=["key"])
+        response.transaction.transaction.signature = bytes(Signature.new_unique())
+        message = response.transaction.transaction.transaction.message
+        message.account_keys.extend([bytes(signer), bytes(wallet)])
+        return response
+
+    ping = geyser_pb2.SubscribeUpdate()
+    ping.ping.SetInParent()
+    own = transaction_update(wallet)
+    # 被跟踪的钱包只是交易中的一个账户，例如收到空投
+    mentioned = transaction_update(Pubkey.new_unique())
+
+    assert subscriber._accept(own)
+    assert not subscriber._accept(mentioned)
+    assert subscriber._accept(ping)
+
+    stats = subscriber.get_stats()
+    assert stats["received_messages"] == 3
+    assert stats["accepted_messages"] == 2
+    assert stats["dropped_not_signer"] == 1
+    assert stats["received_bytes"] == own.ByteSize() + mentioned.ByteSize() + ping.ByteSize()
+    assert stats["accepted_bytes"] == own.ByteSize() + ping.ByteSize()
+
+    subscriber.signer_only = False
+    assert subscriber._accept(mentioned)
+
+
+@pytest.mark.asyncio
+async def test_programs_strategy_matches_wallets_locally():
+    subscriber = TransactionDetailSubscriber(
+        "",
+        "",
+        None,  # type: ignore
+        [],
+        debounce_interval=0.05,
+        shard_nums=4,
+        signer_only=False,
+        strategy="programs",
+    )
+    assert len(subscriber.shards) == 1
+    assert subscriber.signer_only
+    request_queue = subscriber.shards[0].request_queue = asyncio.Queue()
+    wallets = [Pubkey.new_unique() for _ in range(100)]
+
+    await subscriber.subscribe_many(wallets[:50])
+    await asyncio.sleep(0.1)
+    request = request_queue.get_nowait()
+    assert set(request.transactions) == {"programs"}
+    assert list(request.transactions["programs"].account_include) == SWAP_PROGRAMS
+
+    # 之后的订阅变更只更新本地匹配的钱包，不再发送订阅请求
+    await subscriber.subscribe_many(wallets[50:])
+    await subscriber.unsubscribe_wallet_transactions(wallets[0])
+    await asyncio.sleep(0.1)
+    assert request_queue.empty()
+    assert len(subscriber.matcher) == 99
+    assert str(wallets[0]) not in subscriber.matcher
+    assert str(wallets[1]) in subscriber.matcher
+
+    await subscriber.unsubscribe_many(wallets[1:])
+    await asyncio.sleep(0.1)
+    assert request_queue.get_nowait().ping.id == 1
+
+
+def test_backfill_starts_after_shard_progress_and_wallet_subscription():
+    subscriber = make_subscriber(shard_nums=2)
+    wallets = [str(Pubkey.new_unique()) for _ in range(20)]
+    shard0 = [wallet for wallet in wallets if subscriber.hash_ring.get_shard(wallet) == 0]
+    early, late = shard0[0], shard0[1]
+    subscriber._add_wallet(early)
+    # 分片 0 断开时处理到 slot 100，分片 1 继续推进到 slot 150 后才订阅 late
+    subscriber.shards[0].last_slot = 100
+    subscriber.shards[1].last_slot = 150
+    subscriber._add_wallet(late)
+
+    assert subscriber._backfill_slots(subscriber.shards[0]) == {early: 100, late: 150}
+    # 订阅 slot 状态，没有交易的时间段也会推进分片的进度
+    request = subscriber._build_subscribe_request([early])
+    assert request.slots["slots"].filter_by_commitment
+
+
+@pytest.mark.asyncio
+async def test_slot_updates_advance_shard_progress():
+    subscriber = make_subscriber()
+    shard = subscriber.shards[0]
+
+    async def responses():
+        yield geyser_pb2.SubscribeUpdate(slot=geyser_pb2.SubscribeUpdateSlot(slot=120))
+        response = geyser_pb2.SubscribeUpdate(filters=["key"])
+        response.transaction.slot = 110
+        yield response
+        subscriber.is_running = False
+        yield response
+
+    shard.responses = responses()  # type: ignore
+    subscriber.is_running = True
+    await subscriber._receive_shard(shard)
+    assert shard.last_slot == 120
+    # slot 状态只推进进度，不会作为推送处理
+    assert subscriber.get_stats()["received_messages"] == 1
+
+
+@pytest.mark.asyncio
+async def test_backfilled_transaction_requires_tracked_signer():
+    from tests.wallet_tracker.test_geyser_parser import read_raw_tx
+
+    subscriber = make_subscriber()
+    processed = []
+
+    class FakePipeline:
+        async def process(self, tx_parser, tx_detail, spill_channel=None):
+            processed.append(tx_parser.get_tx_hash())
+
+    subscriber.pipeline = FakePipeline()  # type: ignore
+    tx_detail = read_raw_tx("raw/add")
+    signer = tx_detail["transaction"]["message"]["accountKeys"][0]
+
+    await subscriber._process_tx_detail(tx_detail)
+    assert processed == []
+
+    subscriber._add_wallet(signer)
+    await subscriber._process_tx_detail(tx_detail)
+    assert processed == [tx_detail["transaction"]["signatures"][0]]
+
+
+def test_programs_backfill_is_capped_to_active_wallets():
+    subscriber = TransactionDetailSubscriber(
+        "",
+        "",
+        None,  # type: ignore
+        [],
+        strategy="programs",
+        max_backfill_wallets=3,
+    )
+    shard = subscriber.shards[0]
+    wallets = [Pubkey.new_unique() for _ in range(10)]
+    for wallet in wallets:
+        subscriber._add_wallet(str(wallet))
+    shard.last_slot = 100
+    # 最近有交易的钱包优先补齐
+    for wallet in (wallets[7], wallets[2]):
+        update = geyser_pb2.SubscribeUpdateTransaction()
+        update.transaction.transaction.message.account_keys.append(bytes(wallet))
+        subscriber._mark_active(update)
+
+    slots = subscriber._backfill_slots(shard)
+    assert len(slots) == 3
+    assert list(slots)[:2] == [str(wallets[2]), str(wallets[7])]
+    assert set(slots.values()) == {100}
@@ -0,0 +1,103 @@
+import asyncio
+
+import pytest
+from solders.signature import Signature
+from wallet_tracker.wss.hedged_fetcher import Endpoint, HedgedTxDetailFetcher
+
+
+class FakeEndpoint:
+    def __init__(self, delay: float, result: dict | None = None, error: bool = False):
+        self.delay = delay
+        self.result = result
+        self.error = error
+        self.calls = 0
+
+    async def fetch(self, signature: Signature) -> dict | None:
+        self.calls += 1
+        await asyncio.sleep(self.delay)
+        if self.error:
+            raise Exception("rpc error")
+        return self.result
+
+
+def make_endpoint(name: str, fake: FakeEndpoint, cost: float = 1.0, p50: float = 0.01):
+    endpoint = Endpoint(name, fake.fetch, cost)
+    for _ in range(10):
+        endpoint.stats.record(p50)
+    return endpoint
+
+
+@pytest.mark.asyncio
+async def test_fastest_endpoint_only():
+    fast = FakeEndpoint(0.01, {"from": "fast"})
+    slow = FakeEndpoint(0.01, {"from": "slow"})
+    fetcher = HedgedTxDetailFetcher(
+        [make_endpoint("slow", slow, p50=0.2), make_endpoint("fast", fast, p50=0.02)]
+    )
+
+    assert await fetcher.fetch(Signature.new_unique()) == {"from": "fast"}
+    assert fast.calls == 1
+    assert slow.calls == 0
+
+
+@pytest.mark.asyncio
+async def test_hedge_after_delay():
+    stuck = FakeEndpoint(1, {"from": "stuck"})
+    backup = FakeEndpoint(0.01, {"from": "backup"})
+    fetcher = HedgedTxDetailFetcher(
+        [make_endpoint("stuck", stuck, p50=0.01), make_endpoint("backup", backup, p50=0.05)]
+    )
+
+    result = await asyncio.wait_for(fetcher.fetch(Signature.new_unique()), timeout=0.5)
+
+    assert result == {"from": "backup"}
+    assert stuck.calls == 1
+    assert backup.calls == 1
+
+
+@pytest.mark.asyncio
+async def test_fallback_on_error_and_cost_ordering():
+    broken = FakeEndpoint(0, error=True)
+    shyft = FakeEndpoint(0, {"from": "shyft"})
+    solscan = FakeEndpoint(0, {"from": "solscan"})
+    fetcher = HedgedTxDetailFetcher(
+        [
+            make_endpoint("solscan", solscan, cost=5),
+            make_endpoint("shyft", shyft, cost=3),
+            make_endpoint("rpc", broken),
+        ]
+    )
+
+    assert await fetcher.fetch(Signature.new_unique()) == {"from": "shyft"}
+    assert solscan.calls == 0
+    assert fetcher.get_stats()["rpc"]["error_rate"] > 0
+
+
+@pytest.mark.asyncio
+async def test_not_found_everywhere():
+    fetcher = HedgedTxDetailFetcher(
+        [make_endpoint("a", FakeEndpoint(0)), make_endpoint("b", FakeEndpoint(0))]
+    )
+    assert await fetcher.fetch(Signature.new_unique()) is None
+
+
+@pytest.mark.asyncio
+async def test_hedged_away_endpoint_drops_in_ranking():
+    # primary 的历史延迟很低，但现在变慢，每次都被 backup 抢先返回
+    primary = FakeEndpoint(1, {"from": "primary"})
+    backup = FakeEndpoint(0.01, {"from": "backup"})
+    fetcher = HedgedTxDetailFetcher(
+        [make_endpoint("primary", primary, p50=0.01), make_endpoint("backup", backup, p50=0.05)]
+    )
+    assert fetcher.ranked_endpoints()[0].name == "primary"
+
+    for _ in range(15):
+        assert await fetcher.fetch(Signature.new_unique()) is not None
+        if fetcher.ranked_endpoints()[0].name == "backup":
+            break
+    assert fetcher.ranked_endpoints()[0].name == "backup"
+
+    # 排序翻转后直接请求 backup，不再等待 primary 的对冲延迟
+    calls = primary.calls
+    assert await fetcher.fetch(Signature.new_unique()) == {"from": "backup"}
+    assert primary.calls == calls
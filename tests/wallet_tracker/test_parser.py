@@ -1,4 +1,6 @@
+import gc
 import json
+import weakref
 from pathlib import Path
 
 import pytest
@@ -185,3 +187,85 @@ def test_parse_raw_tx(
     assert parsed.who == expected_who
     assert parsed.tx_type == expected_tx_type
     assert parsed.program_id == expected_program_id
+    assert parsed.slot == tx["slot"]
+
+
+def synthetic_tx(index: int, who: str, mint: str) -> dict:
+    """构造一笔开仓交易，每次都是新的对象"""
+
+    def token_balance(owner: str, token: str, amount: int) -> dict:
+        return {
+            "owner": owner,
+            "mint": token,
+            "programId": "TokenkegQfeZyiNwAJbNbGKPFXCWuBvf9Ss623VQ5DA",
+            "uiTokenAmount": {"amount": str(amount), "decimals": 6},
+        }
+
+    return {
+        "blockTime": 1700000000 + index,
+        "slot": index,
+        "transaction": {
+            "signatures": [f"sig{index}"],
+            "message": {"accountKeys": [{"pubkey": who, "signer": True}]},
+        },
+        "meta": {
+            "preBalances": [10_000_000_000, 0],
+            "postBalances": [9_000_000_000, 0],
+            "preTokenBalances": [token_balance("pool", mint, 10**12)],
+            "postTokenBalances": [
+                token_balance("pool", mint, 10**12 - index - 1),
+                token_balance(who, mint, index + 1),
+            ],
+            "logMessages": ["Program 6EF8rrecthR5Dkzon8Nwu78hRvfCKubJ14M5uBEwF6P invoke [1]"],
+        },
+    }
+
+
+def test_tx_view_index():
+    tx = read_raw_tx("raw/reduce")
+    parser = RawTXParser(tx)
+    view = parser.view
+    assert view.who == parser.get_who()
+    pre, post, decimals = view.token_balance(view.who, parser.get_mint())
+    change = parser.get_token_amount_change()
+    assert (pre, post, decimals) == (
+        change["pre_balance"],
+        change["post_balance"],
+        change["decimals"],
+    )
+    assert view.token_balance("unknown", "unknown") == (0, 0, 6)
+
+
+def test_parser_does_not_retain_instances():
+    tx = read_raw_tx("raw/open")
+    parser = RawTXParser(tx)
+    parser.parse()
+    ref = weakref.ref(parser)
+    del parser
+    assert ref() is None
+
+
+def test_parser_instances_have_no_dict():
+    parser = RawTXParser(read_raw_tx("raw/open"))
+    assert not hasattr(parser, "__dict__")
+
+
+def test_memory_is_stable_over_a_million_transactions():
+    who, mint = (
+        "7DMcENeWGQ9MVqy7jLo54n9ibzH1DQBNtTa7otBsgjnJ",
+        "TokenMint1111111111111111111111111111111pump",
+    )
+    total = 1_000_000
+
+    def parse_range(start: int, stop: int) -> None:
+        for index in range(start, stop):
+            tx_event = RawTXParser(synthetic_tx(index, who, mint)).parse()
+            assert tx_event is not None
+
+    # 预热后统计 gc 跟踪的对象数量，解析过的交易和解析器都不应被保留
+    parse_range(0, 1000)
+    gc.collect()
+    baseline = len(gc.get_objects())
+    parse_range(1000, total)
+    gc.collect()
+    assert len(gc.get_objects()) - baseline < 1000
@@ -0,0 +1,206 @@
+import asyncio
+from dataclasses import replace
+
+import pytest
+from solbot_common.types.tx import TxEvent, TxType
+from wallet_tracker.rate_policy import RATE_WINDOW, WalletRate, WalletRatePolicy, coalesce_events
+
+WALLET = "wallet"
+MINT = "mint"
+
+
+def swap(slot: int, direction: str, sol: int, pre: int, post: int, mint: str = MINT) -> TxEvent:
+    if direction == "buy":
+        from_amount, from_decimals, to_amount, to_decimals = sol, 9, post - pre, 6
+    else:
+        from_amount, from_decimals, to_amount, to_decimals = pre - post, 6, sol, 9
+    if pre == 0:
+        tx_type = TxType.OPEN_POSITION
+    elif post == 0:
+        tx_type = TxType.CLOSE_POSITION
+    else:
+        tx_type = TxType.ADD_POSITION if direction == "buy" else TxType.REDUCE_POSITION
+    return TxEvent(
+        signature=f"sig-{slot}",
+        from_amount=from_amount,
+        from_decimals=from_decimals,
+        to_amount=to_amount,
+        to_decimals=to_decimals,
+        mint=mint,
+        who=WALLET,
+        tx_type=tx_type,
+        tx_direction=direction,  # type: ignore
+        timestamp=slot,
+        pre_token_amount=pre,
+        post_token_amount=post,
+        slot=slot,
+    )
+
+
+class Sink:
+    def __init__(self):
+        self.events: list[TxEvent] = []
+        self.batches: list[list[TxEvent]] = []
+
+    async def produce(self, tx_event: TxEvent) -> None:
+        self.events.append(tx_event)
+
+    async def produce_many(self, tx_events) -> None:
+        self.batches.append(list(tx_events))
+
+
+def test_wallet_rate_sliding_window():
+    rate = WalletRate(0)
+    for i in range(30):
+        rate.add(i)
+    assert rate.current(30) == 30
+    # 上一个窗口的计数按重叠比例折算
+    assert rate.current(RATE_WINDOW + 30) == 15
+    assert rate.current(3 * RATE_WINDOW) == 0
+
+
+def test_coalesce_events_into_net_position_change():
+    events = [
+        swap(3, "sell", 40, pre=150, post=100),
+        swap(1, "buy", 100, pre=0, post=100),
+        swap(2, "buy", 60, pre=100, post=150),
+    ]
+    tx_event = coalesce_events(events)
+    assert tx_event is not None
+    assert tx_event.tx_type == TxType.OPEN_POSITION
+    assert tx_event.tx_direction == "buy"
+    # 净买入使用买入的实际支出
+    assert (tx_event.from_amount, tx_event.to_amount) == (160, 100)
+    assert (tx_event.pre_token_amount, tx_event.post_token_amount) == (0, 100)
+    assert (tx_event.signature, tx_event.to_decimals) == ("sig-3", 6)
+
+    tx_event = coalesce_events(
+        [swap(1, "sell", 50, pre=100, post=40), swap(2, "sell", 30, pre=40, post=0)]
+    )
+    assert tx_event is not None
+    assert tx_event.tx_type == TxType.CLOSE_POSITION
+    assert tx_event.tx_direction == "sell"
+    assert (tx_event.from_amount, tx_event.to_amount) == (100, 80)
+
+    # 买入后全部卖出，持仓没有变化
+    assert coalesce_events([swap(1, "buy", 10, 50, 80), swap(2, "sell", 11, 80, 50)]) is None
+
+
+def test_coalesce_events_keeps_sol_spent_when_selling_at_profit():
+    # 卖出收入超过买入支出，但持仓仍是净买入
+    events = [
+        swap(1, "buy", 10, pre=0, post=100),
+        swap(2, "sell", 30, pre=100, post=0),
+        swap(3, "buy", 5, pre=0, post=50),
+    ]
+    tx_event = coalesce_events(events)
+    assert tx_event is not None
+    assert tx_event.tx_direction == "buy"
+    assert tx_event.tx_type == TxType.OPEN_POSITION
+    assert (tx_event.from_amount, tx_event.to_amount) == (15, 50)
+
+    # 卖出亏损超过买入时，净卖出使用卖出的实际收入
+    events = [
+        swap(1, "sell", 5, pre=100, post=50),
+        swap(2, "buy", 20, pre=50, post=80),
+        swap(3, "sell", 4, pre=80, post=40),
+    ]
+    tx_event = coalesce_events(events)
+    assert tx_event is not None
+    assert tx_event.tx_direction == "sell"
+    assert (tx_event.from_amount, tx_event.to_amount) == (60, 9)
+
+
+def test_coalesce_events_orders_by_slot_and_detects_dust_close():
+    # 卖到只剩粉尘余额时，与解析器一样视为清仓
+    events = [
+        swap(2, "sell", 30, pre=40_000, post=500),
+        swap(1, "sell", 50, pre=100_000, post=40_000),
+    ]
+    tx_event = coalesce_events(events)
+    assert tx_event is not None
+    assert tx_event.tx_type == TxType.CLOSE_POSITION
+    assert (tx_event.pre_token_amount, tx_event.post_token_amount) == (100_000, 500)
+
+    # 没有 slot 的事件按区块时间排序，而不是排在最前面
+    first = replace(swap(1, "buy", 100, pre=0, post=100), slot=None)
+    second = replace(swap(2, "buy", 60, pre=100, post=150), slot=None)
+    tx_event = coalesce_events([second, first])
+    assert tx_event is not None
+    assert tx_event.tx_type == TxType.OPEN_POSITION
+    assert (tx_event.signature, tx_event.pre_token_amount) == ("sig-2", 0)
+
+
+@pytest.mark.asyncio
+async def test_coalesce_policy_merges_events_within_window():
+    sink = Sink()
+    policy = WalletRatePolicy(wallets={WALLET: "coalesce"}, coalesce_window=0.05)
+    await policy.submit(swap(1, "buy", 100, pre=0, post=100), sink.produce)
+    await policy.submit(swap(2, "buy", 60, pre=100, post=150), sink.produce)
+    await policy.submit(swap(3, "buy", 10, pre=0, post=10, mint="other"), sink.produce)
+    assert sink.events == []
+
+    await asyncio.sleep(0.1)
+    assert sorted((event.mint, event.to_amount) for event in sink.events) == [
+        (MINT, 150),
+        ("other", 10),
+    ]
+    stats = policy.get_stats()
+    assert stats["coalesced"] == 3
+    assert stats["coalesced_emitted"] == 2
+    assert stats["pending"] == 0
+    assert stats["top_wallets"][0]["policy"] == "coalesce"
+
+
+@pytest.mark.asyncio
+async def test_flush_emits_pending_events():
+    sink = Sink()
+    policy = WalletRatePolicy(default="coalesce", coalesce_window=60)
+    await policy.submit(swap(1, "buy", 100, pre=0, post=100), sink.produce)
+    await policy.submit(swap(2, "sell", 100, pre=100, post=0), sink.produce)
+    await policy.submit(swap(3, "buy", 10, pre=0, post=10, mint="other"), sink.produce)
+    await policy.flush()
+    assert [event.mint for event in sink.events] == ["other"]
+    assert policy.get_stats()["netted_out"] == 1
+
+
+@pytest.mark.asyncio
+async def test_flush_emits_pending_events_in_one_batch():
+    sink = Sink()
+    policy = WalletRatePolicy(default="coalesce", coalesce_window=60)
+    await policy.submit(swap(1, "buy", 100, pre=0, post=100), sink.produce)
+    await policy.submit(swap(2, "buy", 50, pre=100, post=150), sink.produce)
+    await policy.submit(swap(3, "buy", 10, pre=0, post=10, mint="other"), sink.produce)
+    await policy.flush(sink.produce_many)
+    assert sink.events == []
+    assert [[(event.mint, event.signature) for event in batch] for batch in sink.batches] == [
+        [(MINT, "sig-2"), ("other", "sig-3")]
+    ]
+    assert policy.get_stats()["pending"] == 0
+
+
+@pytest.mark.asyncio
+async def test_sample_policy_keeps_open_and_close():
+    sink = Sink()
+    policy = WalletRatePolicy(wallets={WALLET: "sample"}, sample_rate=0.25)
+    await policy.submit(swap(0, "buy", 1, pre=0, post=1), sink.produce)
+    for slot in range(1, 9):
+        await policy.submit(swap(slot, "buy", 1, pre=slot, post=slot + 1), sink.produce)
+    await policy.submit(swap(9, "sell", 1, pre=9, post=0), sink.produce)
+    assert [event.slot for event in sink.events] == [0, 1, 5, 9]
+    assert policy.get_stats()["sampled_out"] == 6
+
+
+@pytest.mark.asyncio
+async def test_hyperactive_wallet_switches_policy():
+    sink = Sink()
+    policy = WalletRatePolicy(hyperactive_threshold=3, hyperactive_policy="sample", sample_rate=0.5)
+    for slot in range(1, 8):
+        await policy.submit(swap(slot, "buy", 1, pre=slot, post=slot + 1), sink.produce)
+    # 前 3 个事件直接发送，之后每 2 个事件发送 1 个
+    assert [event.slot for event in sink.events] == [1, 2, 3, 4, 6]
+
+    # 单独指定的策略优先于按速率切换的策略
+    policy.set_policy(WALLET, "pass")
+    await policy.submit(swap(8, "buy", 1, pre=8, post=9), sink.produce)
+    assert sink.events[-1].slot == 8
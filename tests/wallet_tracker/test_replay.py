@@ -0,0 +1,151 @@
+import json
+from pathlib import Path
+
+import pytest
+from wallet_tracker.replay import IngestRecorder, InMemoryRedis, RecordKind, read_records
+from wallet_tracker.replay.replayer import IngestReplayer, diff_events
+from yellowstone_grpc.grpc import geyser_pb2
+
+from tests.wallet_tracker.test_geyser_parser import raw_tx_to_proto
+
+SWAP_EXAMPLES = ["raw/open", "raw/add", "raw/reduce", "raw/close"]
+
+
+def read_raw_tx(name: str) -> dict:
+    path = Path(__file__).parent / "tx_examples" / f"{name}.json"
+    with open(path) as f:
+        return json.load(f)["result"]
+
+
+def geyser_update(tx: dict) -> bytes:
+    response = geyser_pb2.SubscribeUpdate(filters=["key"])
+    response.transaction.CopyFrom(raw_tx_to_proto(tx))
+    return response.SerializeToString()
+
+
+def block_meta(slot: int, block_time: int) -> bytes:
+    response = geyser_pb2.SubscribeUpdate(filters=["blocks_meta"])
+    response.block_meta.slot = slot
+    response.block_meta.block_time.timestamp = block_time
+    return response.SerializeToString()
+
+
+def logs_notification(tx: dict) -> str:
+    value = {
+        "signature": tx["transaction"]["signatures"][0],
+        "err": None,
+        "logs": tx["meta"]["logMessages"],
+    }
+    return json.dumps(
+        {
+            "jsonrpc": "2.0",
+            "method": "logsNotification",
+            "params": {"subscription": 1, "result": {"context": {"slot": 1}, "value": value}},
+        }
+    )
+
+
+def stream_notification(tx: dict) -> str:
+    result = {
+        "transaction": {
+            "transaction": tx["transaction"],
+            "meta": tx["meta"],
+            "version": tx["version"],
+        },
+        "signature": tx["transaction"]["signatures"][0],
+        "slot": tx["slot"],
+    }
+    return json.dumps(
+        {
+            "jsonrpc": "2.0",
+            "method": "transactionNotification",
+            "params": {"subscription": 1, "result": result},
+        }
+    )
+
+
+def record(path: Path, messages: list[tuple[RecordKind, bytes | str]]) -> None:
+    recorder = IngestRecorder()
+    recorder.open(str(path))
+    for kind, payload in messages:
+        recorder.record(kind, payload)
+    recorder.close()
+
+
+def test_read_records_ignores_truncated_tail(tmp_path: Path):
+    path = tmp_path / "ingest.rec.gz"
+    record(path, [(RecordKind.LOGS, "a"), (RecordKind.GEYSER, b"\x00\x01")])
+    assert [(kind, payload) for kind, _, payload in read_records(str(path))] == [
+        (RecordKind.LOGS, b"a"),
+        (RecordKind.GEYSER, b"\x00\x01"),
+    ]
+
+    data = path.read_bytes()
+    path.write_bytes(data[: len(data) - 4])
+    assert len(list(read_records(str(path)))) <= 2
+
+
+@pytest.mark.asyncio
+async def test_in_memory_redis_list_and_pipeline():
+    redis = InMemoryRedis()
+    assert await redis.brpop("q", timeout=0.01) is None
+    await redis.lpush("q", "a", "b")
+    assert await redis.brpop("q", timeout=1) == ("q", "a")
+    async with redis.pipeline(transaction=False) as pipe:
+        pipe.rpop("q")
+        pipe.rpop("q")
+        assert await pipe.execute() == ["b", None]
+    assert await redis.set("k", "1", ex=10, nx=True)
+    assert await redis.set("k", "1", ex=10, nx=True) is None
+
+
+@pytest.mark.asyncio
+@pytest.mark.parametrize("mode", ["geyser", "logs", "stream"])
+async def test_replay_produces_tx_events(tmp_path: Path, mode: str):
+    transactions = [read_raw_tx(name) for name in SWAP_EXAMPLES]
+    messages: list[tuple[RecordKind, bytes | str]] = []
+    for tx in transactions + transactions[:1]:
+        if mode == "geyser":
+            messages.append((RecordKind.GEYSER, block_meta(tx["slot"], tx["blockTime"])))
+            messages.append((RecordKind.GEYSER, geyser_update(tx)))
+        elif mode == "logs":
+            messages.append((RecordKind.LOGS, logs_notification(tx)))
+            messages.append((RecordKind.TX_DETAIL, json.dumps(tx)))
+        else:
+            messages.append((RecordKind.STREAM, stream_notification(tx)))
+    path = tmp_path / "ingest.rec.gz"
+    record(path, messages)
+
+    replayer = IngestReplayer(str(path), speed=0, settle_time=0.05, log_prefilter=False)
+    report = await replayer.run()
+
+    # 重复的交易只处理一次
+    assert len(report.events) == len(transactions)
+    assert {event["signature"] for event in report.events} == {
+        tx["transaction"]["signatures"][0] for tx in transactions
+    }
+    assert report.end_to_end["count"] == len(transactions)
+    assert report.dedup["local_hits"] == 1
+    assert report.stages["parse"]["count"] == len(transactions)
+    if mode == "geyser":
+        # 区块时间来自录制的 block_meta
+        assert {event["timestamp"] for event in report.events} == {
+            tx["blockTime"] for tx in transactions
+        }
+
+
+def test_diff_events():
+    before = [
+        {"signature": "a", "to_amount": 1, "timestamp": 1},
+        {"signature": "b", "to_amount": 2, "timestamp": 1},
+    ]
+    after = [
+        {"signature": "a", "to_amount": 1, "timestamp": 2},
+        {"signature": "b", "to_amount": 3, "timestamp": 1},
+        {"signature": "c", "to_amount": 1, "timestamp": 1},
+    ]
+    assert diff_events(before, after) == {
+        "missing": [],
+        "extra": ["c"],
+        "changed": [{"signature": "b", "fields": {"to_amount": [2, 3]}}],
+    }
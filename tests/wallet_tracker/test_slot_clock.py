@@ -0,0 +1,65 @@
+import pytest
+from solders.pubkey import Pubkey
+from solders.signature import Signature
+from wallet_tracker.geyser.slot_clock import SlotClock
+from wallet_tracker.geyser.tx_subscriber import TransactionDetailSubscriber
+from yellowstone_grpc.grpc import geyser_pb2
+
+
+def test_block_time_exact_and_estimated():
+    clock = SlotClock(max_slots=3)
+    assert clock.block_time(100) is None
+
+    for slot in range(100, 105):
+        clock.record(slot, 1_700_000_000 + (slot - 100) // 2)
+    assert clock.block_time(104) == 1_700_000_002
+    # 超过 max_slots 的旧 slot 被淘汰，根据最近的 slot 推算
+    assert 100 not in clock.block_times
+    assert clock.block_time(114) == 1_700_000_006
+    assert clock.block_time(100) == 1_700_000_000
+
+    stats = clock.as_dict()
+    assert stats["block_time_exact"] == 1
+    assert stats["block_time_estimated"] == 2
+
+
+def test_detect_latency_percentiles():
+    clock = SlotClock()
+    assert clock.as_dict()["detect_latency_p50_ms"] is None
+    for latency in range(1, 101):
+        clock.observe_latency(latency / 100)
+    stats = clock.as_dict()
+    assert stats["detect_latency_p50_ms"] == 510
+    assert stats["detect_latency_p99_ms"] == 1000
+
+
+def test_blocks_meta_is_subscribed_on_first_shard():
+    subscriber = TransactionDetailSubscriber("", "", None, [], shard_nums=2)  # type: ignore
+    wallets = [str(Pubkey.new_unique())]
+
+    assert "blocks_meta" in subscriber._build_subscribe_request(wallets, True).blocks_meta
+    assert len(subscriber._build_subscribe_request(wallets).blocks_meta) == 0
+    # 没有钱包时仍然订阅区块元数据
+    request = subscriber._build_subscribe_request([], True)
+    assert "blocks_meta" in request.blocks_meta
+    assert request.ping.id == 1
+
+
+@pytest.mark.asyncio
+async def test_transaction_uses_block_time_of_its_slot():
+    subscriber = TransactionDetailSubscriber("", "", None, [])  # type: ignore
+    subscriber.slot_clock.record(200, 1_700_000_123)
+    parsed = []
+
+    async def process(tx_parser, dump_tx_detail, spill_channel):
+        parsed.append((tx_parser.get_slot(), tx_parser.get_block_time()))
+
+    subscriber.pipeline.process = process  # type: ignore
+    update = geyser_pb2.SubscribeUpdateTransaction(slot=200)
+    update.transaction.signature = bytes(Signature.new_unique())
+
+    await subscriber._process_transaction(update)
+
+    assert parsed == [(200, 1_700_000_123)]
+    assert len(subscriber.slot_clock.latencies) == 1
+    assert subscriber._build_tx_detail(update)["blockTime"] == 1_700_000_123
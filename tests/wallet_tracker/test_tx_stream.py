@@ -0,0 +1,157 @@
+import asyncio
+import json
+from pathlib import Path
+
+import pytest
+import websockets
+from solders.pubkey import Pubkey
+from wallet_tracker.wss.tx_stream import TransactionStreamSubscriber
+
+TX_EXAMPLES = ["raw/open", "raw/add", "raw/reduce", "raw/close", "raw/transfer"]
+
+
+def read_raw_tx(name: str) -> dict:
+    path = Path(__file__).parent / "tx_examples" / f"{name}.json"
+    with open(path) as f:
+        tx = json.load(f)
+    return tx.get("result", tx)
+
+
+def signer(tx: dict) -> str:
+    account = tx["transaction"]["message"]["accountKeys"][0]
+    return account if isinstance(account, str) else account["pubkey"]
+
+
+class TransactionStreamServer:
+    """模拟 transactionSubscribe 的 websocket 节点，回放 tx_examples 中的交易"""
+
+    def __init__(self, transactions: list[dict]):
+        self.transactions = transactions
+        self.next_subscription_id = 0
+        # 订阅 id -> accountInclude
+        self.subscriptions: dict[int, set[str]] = {}
+        self.requests: list[dict] = []
+        self.connections = []
+
+    async def handler(self, websocket, *args):
+        self.connections.append(websocket)
+        async for raw in websocket:
+            request = json.loads(raw)
+            self.requests.append(request)
+            if request["method"] == "transactionSubscribe":
+                self.next_subscription_id += 1
+                self.subscriptions[self.next_subscription_id] = set(
+                    request["params"][0]["accountInclude"]
+                )
+                result = self.next_subscription_id
+            else:
+                result = self.subscriptions.pop(request["params"][0], None) is not None
+            await websocket.send(
+                json.dumps({"jsonrpc": "2.0", "result": result, "id": request["id"]})
+            )
+
+    async def replay(self):
+        """按订阅推送涉及订阅钱包的交易，推送结构与 Helius 的 transactionNotification 一致"""
+        for tx in self.transactions:
+            for subscription_id, accounts in self.subscriptions.items():
+                if signer(tx) not in accounts:
+                    continue
+                message = {
+                    "jsonrpc": "2.0",
+                    "method": "transactionNotification",
+                    "params": {
+                        "subscription": subscription_id,
+                        "result": {
+                            "transaction": {
+                                "transaction": tx["transaction"],
+                                "meta": tx["meta"],
+                                "version": tx["version"],
+                            },
+                            "signature": tx["transaction"]["signatures"][0],
+                            "slot": tx["slot"],
+                        },
+                    },
+                }
+                await self.connections[-1].send(json.dumps(message))
+
+
+class FakeRedis:
+    def __init__(self):
+        self.events = []
+        self.lists: dict[str, list] = {}
+
+    async def xadd(self, name, fields, maxlen=None, approximate=True):
+        self.events.append(json.loads(fields["data"]))
+
+    async def lpush(self, name, value):
+        self.lists.setdefault(name, []).append(value)
+
+
+async def wait_until(predicate, timeout: float = 3):
+    async def _wait():
+        while not predicate():
+            await asyncio.sleep(0.01)
+
+    await asyncio.wait_for(_wait(), timeout)
+
+
+@pytest.mark.asyncio
+async def test_stream_parses_transactions_without_fetching():
+    transactions = [read_raw_tx(name) for name in TX_EXAMPLES]
+    server = TransactionStreamServer(transactions)
+    redis = FakeRedis()
+    wallets = {signer(tx) for tx in transactions[:4]}
+
+    async with websockets.serve(server.handler, "127.0.0.1", 0) as ws_server:
+        port = ws_server.sockets[0].getsockname()[1]
+        subscriber = TransactionStreamSubscriber(
+            f"ws://127.0.0.1:{port}",
+            redis,  # type: ignore
+            [Pubkey.from_string(wallet) for wallet in wallets],
+        )
+        await subscriber.start()
+        await wait_until(lambda: subscriber.subscription_id is not None)
+        assert server.requests[0]["params"][0]["accountInclude"] == sorted(wallets)
+
+        await server.replay()
+        # 同一笔交易重复推送时只处理一次
+        await server.replay()
+        await wait_until(lambda: len(redis.events) == 4)
+        await asyncio.sleep(0.05)
+        await subscriber.stop()
+
+    assert len(redis.events) == 4
+    assert {event["signature"] for event in redis.events} == {
+        tx["transaction"]["signatures"][0] for tx in transactions[:4]
+    }
+    assert redis.lists == {}
+
+
+@pytest.mark.asyncio
+async def test_resubscribe_replaces_old_subscription():
+    server = TransactionStreamServer([])
+    wallet1, wallet2 = Pubkey.new_unique(), Pubkey.new_unique()
+
+    async with websockets.serve(server.handler, "127.0.0.1", 0) as ws_server:
+        port = ws_server.sockets[0].getsockname()[1]
+        subscriber = TransactionStreamSubscriber(
+            f"ws://127.0.0.1:{port}",
+            FakeRedis(),  # type: ignore
+            [wallet1],
+            debounce_interval=0.01,
+        )
+        await subscriber.start()
+        await wait_until(lambda: subscriber.subscription_id == 1)
+
+        await subscriber.subscribe_many([wallet2])
+        await subscriber.unsubscribe_wallet_transactions(wallet1)
+        await wait_until(lambda: subscriber.subscription_id == 2)
+        await wait_until(lambda: 1 not in server.subscriptions)
+        assert server.subscriptions == {2: {str(wallet2)}}
+
+        # 连接断开后按当前的钱包集合重新订阅
+        subscriber.base_delay = 0.01
+        await server.connections[-1].close()
+        await wait_until(lambda: len(server.connections) == 2 and subscriber.subscription_id == 3)
+        assert server.subscriptions[3] == {str(wallet2)}
+        await subscriber.stop()
@@ -0,0 +1,132 @@
+import asyncio
+import json
+import pickle
+from concurrent.futures import ProcessPoolExecutor
+from pathlib import Path
+
+import pytest
+from wallet_tracker.constants import NEW_TX_DETAIL_CHANNEL
+from wallet_tracker.exceptions import ZeroChangeAmountError
+from wallet_tracker.parser import GeyserTXParser, RawTXParser
+from wallet_tracker.tx_worker import TransactionWorker
+
+from tests.wallet_tracker.test_geyser_parser import raw_tx_to_proto
+
+
+def read_raw_tx(name: str) -> dict:
+    path = Path(__file__).parent / "tx_examples" / f"{name}.json"
+    with open(path) as f:
+        return json.load(f)["result"]
+
+
+def test_zero_change_amount_error_is_picklable():
+    error = pickle.loads(pickle.dumps(ZeroChangeAmountError(1, 1)))
+    assert error.pre_amount == 1
+    assert error.post_amount == 1
+
+
+@pytest.mark.parametrize("name", ["raw/open", "raw/add", "raw/reduce", "raw/close"])
+def test_parse_in_process_pool(name: str):
+    tx = read_raw_tx(name)
+    with ProcessPoolExecutor(max_workers=1) as executor:
+        tx_event = executor.submit(RawTXParser(tx).parse).result()
+    assert tx_event == RawTXParser(tx).parse()
+
+
+def test_geyser_parse_in_process_pool():
+    update = raw_tx_to_proto(read_raw_tx("raw/open"))
+    tx_parser = GeyserTXParser(update, block_time=1)
+    with ProcessPoolExecutor(max_workers=1) as executor:
+        tx_event = executor.submit(tx_parser.parse).result()
+    assert tx_event == GeyserTXParser(update, block_time=1).parse()
+
+
+class ListRedis:
+    """只实现 tx_detail:new 列表的 BRPOP、RPOP（pipeline）和 LLEN，记录往返次数"""
+
+    def __init__(self, items: list[str]):
+        # LPUSH 写入列表左端，RPOP 从右端取出
+        self.items = list(reversed(items))
+        self.round_trips = 0
+
+    async def brpop(self, key, timeout=0):
+        self.round_trips += 1
+        # 让出事件循环，模拟多个 worker 交替访问
+        await asyncio.sleep(0)
+        if not self.items:
+            return None
+        return key, self.items.pop()
+
+    async def llen(self, key):
+        return len(self.items)
+
+    def pipeline(self, transaction=True):
+        redis = self
+
+        class Pipeline:
+            def __init__(self):
+                self.commands = 0
+
+            async def __aenter__(self):
+                return self
+
+            async def __aexit__(self, *args):
+                pass
+
+            def rpop(self, key):
+                assert key == NEW_TX_DETAIL_CHANNEL
+                self.commands += 1
+
+            async def execute(self):
+                redis.round_trips += 1
+                return [redis.items.pop() if redis.items else None for _ in range(self.commands)]
+
+        return Pipeline()
+
+
+@pytest.mark.asyncio
+async def test_pop_batch_uses_brpop_and_pipelined_rpop():
+    redis = ListRedis([f"tx-{i}" for i in range(5)])
+    worker = TransactionWorker(redis, batch_size=3)  # type: ignore
+
+    assert await worker.pop_batch() == ["tx-0", "tx-1", "tx-2"]
+    assert redis.round_trips == 2
+    # 列表中剩余的交易不足一批时，pipeline 中多余的 RPOP 返回 None
+    assert await worker.pop_batch() == ["tx-3", "tx-4"]
+    assert await worker.pop_batch() == []
+    assert redis.round_trips == 5
+
+
+@pytest.mark.asyncio
+async def test_concurrent_workers_pop_each_transaction_once():
+    items = [f"tx-{i}" for i in range(100)]
+    redis = ListRedis(items)
+    worker = TransactionWorker(redis, batch_size=8)  # type: ignore
+
+    async def drain() -> list[str]:
+        popped = []
+        while batch := await worker.pop_batch():
+            popped.extend(batch)
+        return popped
+
+    results = await asyncio.gather(*(drain() for _ in range(4)))
+    assert sorted(item for popped in results for item in popped) == sorted(items)
+    assert all(results)
+
+
+@pytest.mark.asyncio
+async def test_report_stats_throughput_and_queue_depth():
+    redis = ListRedis([f"tx-{i}" for i in range(7)])
+    worker = TransactionWorker(redis, stats_interval=0.05)  # type: ignore
+    worker.is_running = True
+    task = asyncio.create_task(worker.report_stats())
+    await asyncio.sleep(0)
+    worker.processed_count = 10
+    await asyncio.sleep(0.08)
+    worker.is_running = False
+    task.cancel()
+
+    stats = worker.get_stats()
+    assert stats["queue_depth"] == 7
+    assert stats["processed"] == 10
+    assert 0 < stats["throughput"] <= 10 / 0.05